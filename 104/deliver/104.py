@@ -1,7 +1,5 @@
 import asyncio
 from playwright.async_api import async_playwright, Page, BrowserContext
-import json
-import csv
 import os
 import time
 from datetime import datetime
@@ -11,59 +9,26 @@ from fake_useragent import UserAgent
 import sys
 import re # 引入 re 模組，用於正則表達式提取 company_id
 
+# 共用核心套件 scraper_core 位於 repo 根目錄
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scraper_core import DEFAULT_LAUNCH_ARGS
+from scraper_core import save_results as core_save_results
+
 # 解決 CMD 輸出亂碼問題 (這行必須放在所有 print 語句和相關模組導入之後)
 sys.stdout.reconfigure(encoding='utf-8')
 
+# 直接指定欄位順序，提升效率與穩定性
+CSV_FIELDS = [
+    "公司名稱", "公司網址", "產業類別", "公司地址", "主要服務", "資本額", "員工人數", "公司官網", "公司簡介"
+]
+
 # 輔助函數：儲存結果
 def save_results(data, output_format='json'):
-    if not os.path.exists("./output"):
-        os.makedirs("./output")
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    if output_format == 'json':
-        filename = f"./output/104_company_info_{timestamp}.json"
-        print(f"嘗試將資料儲存至 {filename}...")
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            print(f"資料已成功儲存至 {filename}")
-        except Exception as e:
-            print(f"儲存 JSON 檔案時發生錯誤 {filename}: {e}")
-    elif output_format == 'csv':
-        filename = f"./output/104_company_info_{timestamp}.csv"
-        print(f"嘗試將資料儲存至 {filename}...")
-        if not data:
-            print("沒有資料可儲存至 CSV。")
-            return
-
-        # 直接指定欄位順序，提升效率與穩定性
-        keys = [
-            "公司名稱", "公司網址", "產業類別", "公司地址", "主要服務", "資本額", "員工人數", "公司官網", "公司簡介"
-        ]
-
-        try:
-            with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=keys)
-                writer.writeheader()
-                writer.writerows(data)
-            print(f"資料已成功儲存至 {filename}")
-        except Exception as e:
-            print(f"儲存 CSV 檔案時發生錯誤 {filename}: {e}")
-    else:
-        print("輸出格式無效。請選擇 'json' 或 'csv'。")
+    return core_save_results(data, "./output", "104_company_info", CSV_FIELDS, output_format)
 
 # 瀏覽器啟動參數
 def args_for_browser():
-    return [
-        '--no-sandbox',
-        '--disable-setuid-sandbox',
-        '--disable-blink-features=AutomationControlled',
-        '--no-default-browser-check',
-        '--no-first-run',
-        '--disable-infobars',
-        '--start-maximized'
-    ]
+    return list(DEFAULT_LAUNCH_ARGS)
 
 # 核心邏輯：透過名稱搜尋公司並獲取其 ID
 async def find_company_id_by_name(target_company_name: str, page: Page, headless_mode: bool, debug_screenshot: bool) -> str | None:
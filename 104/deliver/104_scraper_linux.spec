@@ -0,0 +1,53 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Linux 建置設定：onedir，啟動時直接從資料夾載入，不像 one-file 每次都要解壓到暫存目錄。
+#   cd 104/deliver && pyinstaller --noconfirm 104_scraper_linux.spec
+#   -> dist/104_scraper/104_scraper
+# Chromium 裝在執行檔旁（由 pyi_rth_playwright_browsers.py 自動找到）：
+#   PLAYWRIGHT_BROWSERS_PATH=dist/104_scraper/ms-playwright python -m playwright install chromium
+# 啟動時間比較：python bench/startup_bench.py --only 104bat --frozen 104/deliver/dist/104_scraper/104_scraper
+import os
+
+REPO_ROOT = os.path.abspath(os.path.join(SPECPATH, '..', '..'))
+
+a = Analysis(
+    [os.path.join(SPECPATH, '104bat.py')],
+    pathex=[REPO_ROOT],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[os.path.join(SPECPATH, 'pyi_rth_playwright_browsers.py')],
+    # 104bat 用不到的大型套件，避免被其他套件間接帶入
+    excludes=['tkinter', 'pandas', 'matplotlib', 'IPython', 'pytest'],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='104_scraper',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=True,
+    upx=False,  # UPX 壓縮的共用函式庫每次載入都要先解壓，反而拖慢啟動
+    console=True,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=True,
+    upx=False,
+    upx_exclude=[],
+    name='104_scraper',
+)
@@ -1,176 +1,163 @@
+from __future__ import annotations
+
 import asyncio
-from playwright.async_api import async_playwright, Page, BrowserContext
-import json
-import csv
 import os
-import time
-from datetime import datetime
 import argparse
 import random
-from fake_useragent import UserAgent
 import sys
 import re # 引入 re 模組，用於正則表達式提取 company_id
+from typing import TYPE_CHECKING
+
+# playwright / fake_useragent 匯入成本高，只在實際需要時才於函數內載入
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+# 共用核心套件 scraper_core 位於 repo 根目錄
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from scraper_core import (
+    DEFAULT_LAUNCH_ARGS, HARVEST_COMMON_FIELDS, TYPED_FORMATS, BlockedError, BrowserPool, ChallengeError, IdentityPool,
+    ResultCache, ResultStore, ResultWriter, Scheduler, SiteAdapter, StreamWriter, add_change_arguments,
+    add_log_arguments, is_navigation_error, run_harvest_mode, load_ua_pool, log_print, setup_log_from_args,
+    tracker_from_args, ua_cache_path,
+)
+from scraper_core.adapter import add_field_arguments, parse_fields
+from scraper_core.archive import REPLAY_CONTEXT_OPTIONS, add_archive_arguments, archive_from_args, run_reextract_mode
+from scraper_core.artifacts import ArtifactRecorder, add_artifact_arguments, recorder_from_args
+from scraper_core.budget import add_budget_arguments, deadline_from_args, phase_timeout
+from scraper_core.normalize import clean_text, parse_amount, parse_headcount, split_address
+from scraper_core.profiling import add_profile_arguments, profiler_from_args
+from scraper_core.progress import add_progress_arguments, progress_from_args
+from scraper_core.proxies import ProxyPool, add_proxy_arguments, proxy_pool_from_args
+from scraper_core.selector_stats import SelectorRegistry
+from scraper_core.watch import add_watch_arguments, watcher_from_args
+from scraper_core.workqueue import add_queue_arguments, queue_from_args
+from scraper_core.files import has_priority_column, input_priority, open_company_list
+from scraper_core import save_results as core_save_results
 
 # 解決 CMD 輸出亂碼問題 (這行必須放在所有 print 語句和相關模組導入之後)
 sys.stdout.reconfigure(encoding='utf-8')
 
+OUTPUT_DIR = "./output"
+OUTPUT_PREFIX = "104_company_info"
+ARTIFACT_DIR = os.path.join(OUTPUT_DIR, "artifacts")  # 除錯截圖/HTML 與 fixtures.jsonl
+ARCHIVE_DIR = os.path.join(OUTPUT_DIR, "archive")  # 詳情頁 HTML 封存（--archive / --reextract）
+SELECTOR_STATS_FILE = os.path.join(OUTPUT_DIR, "selector_stats.json")  # 各欄位 selector 命中統計（跨次執行保存）
+# 直接指定欄位順序，提升效率與穩定性
+CSV_FIELDS = [
+    "公司名稱", "公司網址", "產業類別", "公司地址", "主要服務", "資本額", "員工人數", "公司官網", "公司簡介"
+]
+# 型別化輸出欄位（--typed）
+TYPED_FIELDS = [
+    "company_id", "公司名稱", "公司網址", "產業類別", "地址", "縣市", "鄉鎮市區", "路段門牌",
+    "主要服務", "資本額", "員工人數", "公司官網", "公司簡介"
+]
+
 # 輔助函數：儲存結果
 def save_results(data, output_format='json'):
-    if not os.path.exists("./output"):
-        os.makedirs("./output")
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    if output_format == 'json':
-        filename = f"./output/104_company_info_{timestamp}.json"
-        print(f"嘗試將資料儲存至 {filename}...")
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            print(f"資料已成功儲存至 {filename}")
-        except Exception as e:
-            print(f"儲存 JSON 檔案時發生錯誤 {filename}: {e}")
-    elif output_format == 'csv':
-        filename = f"./output/104_company_info_{timestamp}.csv"
-        print(f"嘗試將資料儲存至 {filename}...")
-        if not data:
-            print("沒有資料可儲存至 CSV。")
-            return
-
-        # 直接指定欄位順序，提升效率與穩定性
-        keys = [
-            "公司名稱", "公司網址", "產業類別", "公司地址", "主要服務", "資本額", "員工人數", "公司官網", "公司簡介"
-        ]
+    return core_save_results(data, OUTPUT_DIR, OUTPUT_PREFIX, CSV_FIELDS, output_format)
 
-        try:
-            with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=keys)
-                writer.writeheader()
-                writer.writerows(data)
-            print(f"資料已成功儲存至 {filename}")
-        except Exception as e:
-            print(f"儲存 CSV 檔案時發生錯誤 {filename}: {e}")
-    else:
-        print("輸出格式無效。請選擇 'json' 或 'csv'。")
-
-# 輔助函數：讀取公司清單
-def read_company_list(input_file=None):
-    import os
-    company_names = []
-    checked_sources = []
-    def read_txt(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return [line.strip() for line in f if line.strip()]
-    def read_csv(path):
-        with open(path, 'r', encoding='utf-8-sig') as f:  # 強制帶 BOM，解決 Excel 亂碼
-            reader = csv.reader(f)
-            return [row[0].strip() for row in reader if row and row[0].strip() and '公司名稱' not in row[0]]
-
-    if input_file:
-        ext = os.path.splitext(input_file)[1].lower()
-        if ext == '.txt':
-            company_names = read_txt(input_file)
-            print(f"[INFO] 使用來源檔案: {input_file}")
-        elif ext == '.csv':
-            company_names = read_csv(input_file)
-            print(f"[INFO] 使用來源檔案: {input_file}")
-        else:
-            print(f"[錯誤] 不支援的公司清單檔案格式: {input_file}")
-    else:
-        # 依序檢查：當前目錄 txt > csv > ./104/txt > ./104/csv
-        candidates = [
-            'company_list.txt',
-            'company_list.csv',
-            os.path.join('104', 'company_list.txt'),
-            os.path.join('104', 'company_list.csv'),
-        ]
-        for path in candidates:
-            if os.path.exists(path):
-                checked_sources.append(path)
-                if path.endswith('.txt'):
-                    company_names = read_txt(path)
-                else:
-                    company_names = read_csv(path)
-                print(f"[INFO] 自動偵測到來源檔案: {path}")
-                break
-        if not company_names:
-            print("[錯誤] 未找到公司名稱清單 company_list.txt 或 company_list.csv，請用 --input-file 指定！")
-    return company_names
+# 輔助函數：讀取公司清單（逐筆讀取）
+def read_company_list(input_file=None, name_column=None):
+    return open_company_list(input_file, name_column)
 
 # 瀏覽器啟動參數
 def args_for_browser():
-    return [
-        '--no-sandbox',
-        '--disable-setuid-sandbox',
-        '--disable-blink-features=AutomationControlled',
-        '--no-default-browser-check',
-        '--no-first-run',
-        '--disable-infobars',
-        '--start-maximized'
-    ]
+    return list(DEFAULT_LAUNCH_ARGS)
+
+# 每個 context 處理幾筆後換新身分（0 表示不回收）
+CONTEXT_MAX_REQUESTS = 50
+# 瀏覽器行程 RSS 超過此值 (MB) 時回收所有 context（0 表示只取樣、不回收）
+BROWSER_MAX_RSS_MB = 3072
+
+# 瀏覽器池：每個 worker 各自獨立 context，UA/viewport/locale 由本地 UA 池組合，回收後換新身分
+def build_browser_pool(headless: bool, ua_pool: list[str], max_requests: int = CONTEXT_MAX_REQUESTS,
+                       max_rss_mb: float = BROWSER_MAX_RSS_MB, proxies: ProxyPool | None = None) -> BrowserPool:
+    return BrowserPool(
+        headless=headless,
+        launch_args=args_for_browser(),
+        context_options=IdentityPool(ua_pool),
+        max_requests=max_requests,
+        memory_limit_mb=max_rss_mb,
+        proxies=proxies,
+    )
+
+CHALLENGE_KEYWORDS = ['captcha', 'bot_challenge', 'cloudflare']
+COMPANY_SEARCH_URL = "https://www.104.com.tw/company/search/"
+
+def challenge_error(message: str, headless_mode: bool) -> BlockedError:
+    """有頭模式可在視窗中人工驗證（排程器暫停該筆，其他 worker 繼續），無頭模式只能換身分重試。"""
+    return BlockedError(message) if headless_mode else ChallengeError(message)
+
+def is_challenge_url(url: str) -> bool:
+    """是否被重定向到 CAPTCHA 或反爬蟲頁面"""
+    return any(keyword in url.lower() for keyword in CHALLENGE_KEYWORDS)
+
+def company_id_from_href(href: str) -> str | None:
+    """從搜尋結果連結取出 company_id；r.104.com.tw 跳轉連結需先 decode 取出真正的公司網址。"""
+    import urllib.parse
+    if href.startswith("https://r.104.com.tw/m104?url="):
+        parsed = urllib.parse.urlparse(href)
+        query = urllib.parse.parse_qs(parsed.query)
+        real_url = query.get("url", [""])[0]
+        real_url = urllib.parse.unquote(real_url)
+    else:
+        real_url = href
+    match = re.search(r'/company/([^/?#]+)', real_url)
+    return match.group(1) if match else None
 
 # 核心邏輯：透過名稱搜尋公司並獲取其 ID
-async def find_company_id_by_name(target_company_name: str, page: Page, headless_mode: bool, debug_screenshot: bool) -> str | None:
+async def find_company_id_by_name(target_company_name: str, page: Page, headless_mode: bool,
+                                  recorder: ArtifactRecorder | None = None) -> str | None:
     """
     透過公司名稱在 104 網站上搜尋，並返回第一個匹配公司的 company_id。
     :param target_company_name: 要搜尋的公司名稱。
     :param page: Playwright Page 物件。
-    :param headless_mode: 是否為無頭模式 (用於 CAPTCHA 提示)。
+    :param headless_mode: 是否為無頭模式 (決定 CAPTCHA 交由人工驗證或換身分重試)。
+    :param recorder: 除錯檔案紀錄器（抽樣或失敗時保存截圖/HTML）。
     :return: 找到的公司 ID (字串) 或 None (如果未找到)。
+    :raises BlockedError: 遇到 CAPTCHA/bot 挑戰頁面（有頭模式為 ChallengeError）。
     """
-    print(f"\n--- 正在搜尋公司名稱: {target_company_name} 以取得 Company ID ---")
-    search_url = "https://www.104.com.tw/company/search/" # 公司搜尋頁面 (注意: 是 /company/search/ 而非 /company/main/)
+    log_print(f"\n--- 正在搜尋公司名稱: {target_company_name} 以取得 Company ID ---")
+    search_url = COMPANY_SEARCH_URL # 公司搜尋頁面 (注意: 是 /company/search/ 而非 /company/main/)
     
     try:
         # 導航至公司搜尋頁面
-        await page.goto(search_url, wait_until='domcontentloaded', timeout=45000)
+        await page.goto(search_url, wait_until='domcontentloaded', timeout=phase_timeout(45000))
         await page.wait_for_timeout(random.uniform(500, 1000))
 
-        # 偵錯用：截圖搜尋頁面剛載入時的狀態
-        if debug_screenshot:
-            await page.screenshot(path=f"./output/debug_search_page_before_typing_{target_company_name}.png")
-
         # 檢查是否被重定向到 CAPTCHA 或反爬蟲頁面
-        if any(keyword in page.url.lower() for keyword in ['captcha', 'bot_challenge', 'cloudflare']):
-            print(f"  偵測到 CAPTCHA/bot 挑戰頁面 for 搜尋頁面。")
-            if not headless_mode:
-                print("  請在瀏覽器視窗中解決 CAPTCHA 後，回到終端機按 Enter 鍵繼續...")
-                input()
-                await page.wait_for_timeout(random.uniform(5000, 8000)) 
-                # 再次檢查 CAPTCHA 是否解決
-                if any(keyword in page.url.lower() for keyword in ['captcha', 'bot_challenge', 'cloudflare']):
-                    print("  CAPTCHA 仍未解決，無法繼續。")
-                    return None
-            else:
-                print("  無頭模式無法處理 CAPTCHA，終止搜尋。")
-                return None
+        if is_challenge_url(page.url):
+            log_print(f"  偵測到 CAPTCHA/bot 挑戰頁面 for 搜尋頁面。")
+            if recorder:
+                await recorder.capture(page, target_company_name, 'challenge', failed=True)
+            raise challenge_error("搜尋頁面出現 CAPTCHA/bot 挑戰", headless_mode)
 
         # 找到搜尋框並輸入公司名稱
         search_input_selector = 'input[placeholder^="關鍵字"]' # 只選第一個關鍵字 input
         search_button_selector = 'button.btn.btn-primary.search-btn' # 搜尋按鈕的選擇器
 
         search_input = page.locator(search_input_selector).first
-        await search_input.wait_for(state='visible', timeout=10000)
+        await search_input.wait_for(state='visible', timeout=phase_timeout(10000))
         await search_input.fill(target_company_name)
-        print(f"  已輸入 '{target_company_name}' 到搜尋框。")
+        log_print(f"  已輸入 '{target_company_name}' 到搜尋框。")
         
         # 送出 Enter 鍵觸發搜尋
         await search_input.press('Enter')
-        print("  送出 Enter 鍵觸發搜尋...")
+        log_print("  送出 Enter 鍵觸發搜尋...")
         
         # 等待搜尋結果的公司連結元素出現（桌機版 class）
         company_link_selector = 'a.company-name-link--pc'
-        await page.wait_for_selector(company_link_selector, timeout=15000)
+        await page.wait_for_selector(company_link_selector, timeout=phase_timeout(15000))
         await page.wait_for_timeout(random.uniform(300, 600)) # 額外等待，模擬人類行為
 
-        # 偵錯用：截圖搜尋結果頁面
-        if debug_screenshot:
-            await page.screenshot(path=f"./output/debug_search_results_page_{target_company_name}.png")
+        # 偵錯用：保存搜尋結果頁面（抽樣）
+        if recorder:
+            await recorder.capture(page, target_company_name, 'search')
 
         # 檢查是否有「沒有找到公司」的提示 (根據 104 實際提示文字調整)
         no_results_locator = page.locator("text=目前站臺並無此公司")
         if await no_results_locator.is_visible():
-             print(f"  搜尋 '{target_company_name}' 未找到結果。")
+             log_print(f"  搜尋 '{target_company_name}' 未找到結果。")
              return None
 
         # 獲取搜尋結果中第一個真的可見的公司連結的 href 屬性
@@ -183,160 +170,168 @@ async def find_company_id_by_name(target_company_name: str, page: Page, headless
                 first_visible_link = link
                 break
         if not first_visible_link:
-            print(f"  沒有找到任何可見的公司連結。")
+            log_print(f"  沒有找到任何可見的公司連結。")
             return None
         href = await first_visible_link.get_attribute('href')
         
         if not href:
-            print(f"  找到公司連結但無法提取其 href 屬性。")
+            log_print(f"  找到公司連結但無法提取其 href 屬性。")
             return None
         
-        # 若為 r.104.com.tw 跳轉連結，需先 decode 取出真正的公司網址
-        import urllib.parse
-        if href.startswith("https://r.104.com.tw/m104?url="):
-            parsed = urllib.parse.urlparse(href)
-            query = urllib.parse.parse_qs(parsed.query)
-            real_url = query.get("url", [""])[0]
-            real_url = urllib.parse.unquote(real_url)
-        else:
-            real_url = href
-
-        # 從 real_url 中提取 company_id
-        match = re.search(r'/company/([^/?#]+)', real_url)
-        if match:
-            company_id = match.group(1)
-            print(f"  成功從 '{target_company_name}' 的搜尋結果中提取到 Company ID: {company_id}")
+        company_id = company_id_from_href(href)
+        if company_id:
+            log_print(f"  成功從 '{target_company_name}' 的搜尋結果中提取到 Company ID: {company_id}")
             return company_id
         else:
-            print(f"  無法從 URL '{real_url}' 中提取 Company ID。URL 不符合預期格式。")
+            log_print(f"  無法從 URL '{href}' 中提取 Company ID。URL 不符合預期格式。")
             return None
 
+    except BlockedError:
+        raise
     except Exception as e:
-        print(f"  搜尋 '{target_company_name}' 時發生錯誤: {e}")
-        print(f"  請檢查 output/debug_search_results_page_{target_company_name}.png 截圖和您 F12 檢查的選擇器。")
-        await page.screenshot(path=f"./output/fail_search_for_{target_company_name}.png")
+        if is_navigation_error(e):
+            raise  # 交由排程器回收 context 後重試同一筆
+        log_print(f"  搜尋 '{target_company_name}' 時發生錯誤: {e}")
+        if recorder:
+            await recorder.capture(page, target_company_name, 'search', failed=True, error=e)
+            log_print(f"  請檢查 {recorder.output_dir} 內的截圖/HTML 和您 F12 檢查的選擇器。")
         return None
 
-# 核心邏輯：抓取單一公司詳細資訊
-async def scrape_single_company_info(company_id: str, page: Page, debug_screenshot: bool):
+def company_detail_url(company_id: str) -> str:
+    return f"https://www.104.com.tw/company/{company_id}?tab=cmp_1"
+
+# 核心邏輯：導航至公司詳情頁
+async def open_company_detail(company_id: str, page: Page, recorder: ArtifactRecorder | None = None,
+                              headless_mode: bool = True) -> bool:
     """
-    抓取單一公司 ID 的詳細資訊。
-    :param company_id: 104 公司連結中的 ID 部分，例如 '5fw9oqo'
-    :param page: Playwright Page 物件 (為了避免獨立啟動瀏覽器，直接傳入)。
+    導航至公司詳情頁。
+    :return: 成功進入詳情頁時為 True。
+    :raises BlockedError: 被導向 CAPTCHA/bot 挑戰頁面。
+    """
+    url = company_detail_url(company_id)
+    log_print(f"  導航至公司詳情頁: {url}")
+    await page.goto(url, wait_until='domcontentloaded', timeout=phase_timeout(45000))
+    await page.wait_for_timeout(random.uniform(500, 1000)) # 隨機等待 0.5-1 秒確保頁面加載
+    # 檢查是否被重定向到 CAPTCHA 或反爬蟲頁面
+    if is_challenge_url(page.url):
+        log_print(f"  偵測到 CAPTCHA/bot 挑戰頁面 for 詳細頁面。無法繼續抓取。")
+        if recorder:
+            await recorder.capture(page, company_id, 'challenge', failed=True)
+        raise challenge_error("詳情頁出現 CAPTCHA/bot 挑戰", headless_mode)
+
+    # 偵錯用：保存詳情頁（抽樣），HTML 可作為離線擷取的基準測試素材
+    if recorder:
+        await recorder.capture(page, company_id, 'detail')
+    return True
+
+# p.t3.mb-0 段落分類（純 Python，剖析時可單獨看出耗時）
+def classify_profile_paragraphs(texts, 公司產業):
+    """
+    依內容判斷詳情頁各 p.t3.mb-0 段落是公司地址、資本額、員工人數或主要服務。
+    :param texts: 各段落的文字。
+    :param 公司產業: 產業類別，用於排除誤判為主要服務的段落。
+    :return: {'公司地址', '主要服務', '資本額', '員工人數'}，未判斷到的欄位為 N/A_欄位名。
+    """
+    公司地址 = "N/A_公司地址"
+    主要服務 = "N/A_主要服務"
+    資本額 = "N/A_資本額"
+    員工人數 = "N/A_員工人數"
+    for txt in texts:
+        txt = txt.strip()
+        if not txt or txt == "暫不提供":
+            continue
+        # 地址判斷：有「地址」或明顯地址格式
+        if "地址" in txt or (any(x in txt for x in ["路", "街", "號"]) and len(txt) > 6):
+            公司地址 = txt.replace("地址", "").strip()
+        # 資本額判斷：有「資本額」或金額格式或查詢字眼
+        elif ("資本額" in txt or re.search(r"[億萬,0-9]+元", txt) or ("元" in txt or "萬" in txt or "億" in txt and "查詢" in txt)):
+            資本額 = re.sub(r"經濟部商業司查詢|查詢", "", txt.replace("資本額", "")).strip()
+        elif "員工人數" in txt:
+            員工人數 = txt.replace("員工人數", "").strip()
+        elif re.match(r'^[\d,]+人$', txt):
+            員工人數 = txt
+        elif txt not in [公司產業] and not any(key in txt for key in ["地址", "資本額", "員工人數"]):
+            主要服務 = txt
+    return {'公司地址': 公司地址, '主要服務': 主要服務, '資本額': 資本額, '員工人數': 員工人數}
+
+# 核心邏輯：從已載入的詳情頁擷取欄位
+async def extract_company_detail(company_id: str, page: Page, selectors: SelectorRegistry | None = None,
+                                 fields: set | None = None) -> dict:
+    """
+    從目前 page 上的公司詳情頁擷取欄位 (不做任何導航)。
+    :param company_id: 104 公司 ID，用於組出公司網址。
+    :param page: 已載入詳情頁的 Playwright Page 物件。
+    :param selectors: selector 統計；依歷史命中率決定候選 selector 的嘗試順序（None 時只在本次記憶體中統計）。
+    :param fields: 只擷取這些欄位（--fields）；None 表示全部。未指定的欄位不查找、不等待。
     """
-    print(f"\n--- 正在抓取公司 ID: {company_id} 的詳細資訊 ---")
-
-    company_detail_url = f"https://www.104.com.tw/company/{company_id}?tab=cmp_1"
     scraped_data_entry = {}
+    selectors = selectors or SelectorRegistry()
 
-    # ===== 協助函數：多 selector 嘗試抓欄位 =====
+    def 需要(*欄位名):
+        return fields is None or any(name in fields for name in 欄位名)
+
+    # ===== 協助函數：多 selector 嘗試抓欄位（歷史命中率高者優先，失效者只短暫探測） =====
     async def 抓欄位(selector_list, 欄位名, get_text_func=None, extra_fallback=None):
-        for sel in selector_list:
-            try:
-                el = page.locator(sel).first
-                if await el.count() == 0:
-                    continue
-                await el.wait_for(state='attached', timeout=5000)
-                if get_text_func:
-                    text = await get_text_func(el)
-                else:
-                    text = await el.inner_text()
-                if text and text.strip():
-                    return text.strip()
-            except Exception as e:
-                print(f"[警告] {欄位名} selector 失敗: {sel}，錯誤: {e}")
+        text = await selectors.first_text(page, Site104Adapter.name, 欄位名, selector_list, get_text_func)
+        if text:
+            return text
         # 額外備用
         if extra_fallback:
             try:
                 return await extra_fallback()
             except Exception as e:
-                print(f"[警告] {欄位名} 額外備用抓取失敗: {e}")
-        print(f"[錯誤] 無法抓取 {欄位名}")
+                log_print(f"[警告] {欄位名} 額外備用抓取失敗: {e}")
+        log_print(f"[錯誤] 無法抓取 {欄位名}")
         return f"N/A_{欄位名}"
 
-    try:
-        print(f"  導航至公司詳情頁: {company_detail_url}")
-        await page.goto(company_detail_url, wait_until='domcontentloaded', timeout=45000)
-        await page.wait_for_timeout(random.uniform(500, 1000)) # 隨機等待 0.5-1 秒確保頁面加載
-        if debug_screenshot:
-            await page.screenshot(path=f"./output/debug_detail_page_{company_id}.png")
-            try:
-                html_content = await page.content()
-                html_filename = f"./output/dump_detail_html_{company_id}.html"
-                with open(html_filename, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                print(f"  當前頁面 HTML 已保存至: {html_filename}")
-            except Exception as html_err:
-                print(f"  保存 HTML 失敗: {html_err}")
-
-        # 檢查是否被重定向到 CAPTCHA 或反爬蟲頁面
-        if any(keyword in page.url.lower() for keyword in ['captcha', 'bot_challenge', 'cloudflare']):
-            print(f"  偵測到 CAPTCHA/bot 挑戰頁面 for 詳細頁面。無法繼續抓取。")
-            return None
-
-        # ===== 主要欄位抓取（僅抓實際存在且需要的欄位） =====
-        # 公司名稱
+    # ===== 主要欄位抓取（僅抓實際存在且需要的欄位） =====
+    # 公司名稱
+    公司名稱 = company_id
+    if 需要('公司名稱'):
         公司名稱 = await 抓欄位([
             'div.company-main__name h1',
             'h1.d-inline',
             'h1',
         ], '公司名稱')
         scraped_data_entry['公司名稱'] = 公司名稱
-        scraped_data_entry['公司網址'] = company_detail_url
-        print(f"  公司名稱: {公司名稱}")
+        log_print(f"  公司名稱: {公司名稱}")
+    scraped_data_entry['公司網址'] = company_detail_url(company_id)
 
-
-        # 產業類別（a.t3.jb-link.jb-link-blue）
+    # 產業類別（a.t3.jb-link.jb-link-blue）；主要服務需以產業類別排除誤判，一併抓取
+    公司產業 = "N/A_產業類別"
+    if 需要('產業類別', '主要服務'):
         公司產業 = await 抓欄位([
             'a.t3.jb-link.jb-link-blue',
         ], '產業類別')
-        scraped_data_entry['產業類別'] = 公司產業
-        print(f"  產業類別: {公司產業}")
-
-        # 主要服務/產品、資本額、員工人數（遍歷所有 p.t3.mb-0 判斷內容）
-        公司地址 = "N/A_公司地址"
-        主要服務 = "N/A_主要服務"
-        資本額 = "N/A_資本額"
-        員工人數 = "N/A_員工人數"
+        if 需要('產業類別'):
+            scraped_data_entry['產業類別'] = 公司產業
+            log_print(f"  產業類別: {公司產業}")
+
+    # 主要服務/產品、資本額、員工人數（遍歷所有 p.t3.mb-0 判斷內容）
+    掃描欄位 = [name for name in ('公司地址', '主要服務', '資本額', '員工人數') if 需要(name)]
+    if 掃描欄位:
         try:
-            all_p = page.locator('p.t3.mb-0')
-            for i in range(await all_p.count()):
-                txt = (await all_p.nth(i).inner_text()).strip()
-                if not txt or txt == "暫不提供":
-                    continue
-                # 地址判斷：有「地址」或明顯地址格式
-                if "地址" in txt or (any(x in txt for x in ["路", "街", "號"]) and len(txt) > 6):
-                    公司地址 = txt.replace("地址", "").strip()
-                # 資本額判斷：有「資本額」或金額格式或查詢字眼
-                elif ("資本額" in txt or re.search(r"[億萬,0-9]+元", txt) or ("元" in txt or "萬" in txt or "億" in txt and "查詢" in txt)):
-                    資本額 = re.sub(r"經濟部商業司查詢|查詢", "", txt.replace("資本額", "")).strip()
-                elif "員工人數" in txt:
-                    員工人數 = txt.replace("員工人數", "").strip()
-                elif re.match(r'^[\d,]+人$', txt):
-                    員工人數 = txt
-                elif txt not in [公司產業] and not any(key in txt for key in ["地址", "資本額", "員工人數"]):
-                    主要服務 = txt
+            # 一次取回所有段落文字，再於 Python 端分類（不必每段各來回瀏覽器兩次）
+            values = classify_profile_paragraphs(await page.locator('p.t3.mb-0').all_inner_texts(), 公司產業)
         except Exception as e:
-            print(f"[警告] 主要服務/產品/資本額/員工人數/地址抓取失敗: {e}")
-        scraped_data_entry['公司地址'] = 公司地址
-        scraped_data_entry['主要服務'] = 主要服務
-        scraped_data_entry['資本額'] = 資本額
-        scraped_data_entry['員工人數'] = 員工人數
-        print(f"  公司地址: {公司地址}")
-        print(f"  主要服務: {主要服務}")
-        print(f"  資本額: {資本額}")
-        print(f"  員工人數: {員工人數}")
-
-        # 公司官網（a[data-gtm-content='公司網址']，直接取 href）
+            log_print(f"[警告] 主要服務/產品/資本額/員工人數/地址抓取失敗: {e}")
+            values = {name: f"N/A_{name}" for name in 掃描欄位}
+        for name in 掃描欄位:
+            scraped_data_entry[name] = values[name]
+            log_print(f"  {name}: {values[name]}")
+
+    # 公司官網（a[data-gtm-content='公司網址']，直接取 href）
+    if 需要('公司官網'):
         async def 網址_get_text(el):
             return await el.get_attribute('href')
         公司官網 = await 抓欄位([
             "a[data-gtm-content='公司網址']",
         ], '公司官網', get_text_func=網址_get_text)
         scraped_data_entry['公司官網'] = 公司官網
-        print(f"  公司官網: {公司官網}")
+        log_print(f"  公司官網: {公司官網}")
 
-        # 公司簡介
+    # 公司簡介
+    if 需要('公司簡介'):
         company_desc_el = page.locator('div.company-main__content').first.or_(
             page.locator('div.profile-content__text').first)
         try:
@@ -347,82 +342,296 @@ async def scrape_single_company_info(company_id: str, page: Page, debug_screensh
             except Exception:
                 company_desc = "N/A_公司簡介"
         scraped_data_entry['公司簡介'] = company_desc.strip()
-        print(f"    公司簡介: {company_desc[:50]}...") # 打印前50字
+        log_print(f"    公司簡介: {company_desc[:50]}...") # 打印前50字
 
-
-        print(f"  成功抓取 {公司名稱.strip()} 的詳細資訊。")
-        
-    except Exception as e:
-        print(f"  抓取公司 ID {company_id} 詳細資訊失敗: {e}")
-        await page.screenshot(path=f"./output/fail_detail_page_{company_id}.png")
-        scraped_data_entry = None
-    
+    log_print(f"  成功抓取 {公司名稱.strip()} 的詳細資訊。")
     return scraped_data_entry
 
+# ===== 搜尋結果收集模式 =====
+HARVEST_FIELDS = ["公司名稱", "company_id", "公司網址", "搜尋摘要"] + HARVEST_COMMON_FIELDS
+
+# 每個公司連結往上找到只包含它自己的最大容器（即該公司的結果卡片），一次取回所有卡片
+HARVEST_CARDS_JS = """
+links => links.filter(link => link.offsetParent !== null).map(link => {
+    let card = link;
+    while (card.parentElement &&
+           card.parentElement.querySelectorAll('a.company-name-link--pc').length === 1) {
+        card = card.parentElement;
+    }
+    return {name: link.innerText.trim(), href: link.href, text: card.innerText};
+})
+"""
+
+async def harvest_search_page(page: Page, keyword: str, page_no: int) -> list[dict]:
+    """
+    讀取 104 公司搜尋結果第 page_no 頁的所有公司卡片。
+    :return: 收集結果列表；該頁無結果時為空列表。
+    """
+    import urllib.parse
+    url = f"{COMPANY_SEARCH_URL}?{urllib.parse.urlencode({'keyword': keyword, 'page': page_no})}"
+    await page.goto(url, wait_until='domcontentloaded', timeout=45000)
+    if is_challenge_url(page.url):
+        raise BlockedError("偵測到 CAPTCHA/bot 挑戰頁面")
+    try:
+        await page.wait_for_selector('a.company-name-link--pc', timeout=15000)
+    except Exception:
+        return []
+    cards = await page.eval_on_selector_all('a.company-name-link--pc', HARVEST_CARDS_JS)
+    hits = []
+    for card in cards:
+        company_id = company_id_from_href(card['href'] or '')
+        if not company_id:
+            continue
+        summary = [line.strip() for line in card['text'].splitlines() if line.strip() and line.strip() != card['name']]
+        hits.append({
+            "公司名稱": card['name'],
+            "company_id": company_id,
+            "公司網址": company_detail_url(company_id),
+            "搜尋摘要": " | ".join(summary),
+        })
+    return hits
+
+# ===== 104 站點轉接器：供 scraper_core 排程器使用 =====
+class Site104Adapter(SiteAdapter):
+    name = "104"
+    output_dir = OUTPUT_DIR
+    output_prefix = OUTPUT_PREFIX
+    fieldnames = CSV_FIELDS
+
+    def __init__(self, headless: bool, recorder: ArtifactRecorder | None = None,
+                 selectors: SelectorRegistry | None = None):
+        self.headless = headless
+        self.recorder = recorder
+        self.selectors = selectors or SelectorRegistry()
+
+    typed_fieldnames = TYPED_FIELDS
+    change_fields = ["公司名稱", "產業類別", "地址", "資本額", "員工人數"]
+    # 簡介與服務說明常被改寫措辭，列入雜湊會讓幾乎每筆都判定為「有變更」
+    hash_exclude_fields = ["公司簡介", "主要服務"]
+    identity_fields = ["公司網址"]
+    search_fields = ["公司網址"]
+    harvest_key = "company_id"
+    harvest_fieldnames = HARVEST_FIELDS
+
+    async def harvest_page(self, page, keyword, page_no):
+        return await harvest_search_page(page, keyword, page_no)
+
+    def harvest_ref(self, hit):
+        return hit["company_id"]
+
+    def is_challenge(self, page):
+        return is_challenge_url(page.url)
+
+    def search_record(self, company_id, query):
+        return {"公司網址": company_detail_url(company_id)}
+
+    def record_key(self, record):
+        return company_id_from_href(record.get("公司網址") or "")
+
+    def normalize(self, record):
+        """資本額、員工人數轉整數，地址拆出縣市/鄉鎮市區，缺值 (N/A_xxx) 轉為 None。"""
+        return {
+            "company_id": company_id_from_href(record.get("公司網址") or ""),
+            "公司名稱": clean_text(record.get("公司名稱")),
+            "公司網址": record.get("公司網址"),
+            "產業類別": clean_text(record.get("產業類別")),
+            **split_address(record.get("公司地址")),
+            "主要服務": clean_text(record.get("主要服務")),
+            "資本額": parse_amount(record.get("資本額")),
+            "員工人數": parse_headcount(record.get("員工人數")),
+            "公司官網": clean_text(record.get("公司官網")),
+            "公司簡介": (record.get("公司簡介") or "").strip() or None,
+        }
+
+    def progress_message(self, item, total):
+        return f"\n[批次 {item.index}/{total if total is not None else '?'}] 來源公司名稱: {item.name}"
+
+    async def search(self, page, query):
+        if self.recorder:
+            self.recorder.begin_item(query)  # 搜尋以名稱、詳情以公司 ID 存檔，抽樣一律依查詢名稱
+        company_id = await find_company_id_by_name(query, page, self.headless, self.recorder)
+        if not company_id:
+            log_print(f"  [查詢失敗] 找不到 {query} 的公司 ID，略過。")
+            return None
+        log_print(f"  [查詢成功] {query} 的 104 公司 ID: {company_id}")
+        return company_id
+
+    async def fetch_detail(self, page, company_id):
+        log_print(f"\n--- 正在抓取公司 ID: {company_id} 的詳細資訊 ---")
+        try:
+            return await open_company_detail(company_id, page, self.recorder, self.headless)
+        except BlockedError:
+            raise
+        except Exception as e:
+            if is_navigation_error(e):
+                raise
+            log_print(f"  抓取公司 ID {company_id} 詳細資訊失敗: {e}")
+            if self.recorder:
+                await self.recorder.capture(page, company_id, 'detail', failed=True, error=e)
+            return False
+
+    async def extract(self, page, company_id, query, detail=None):
+        try:
+            entry = await extract_company_detail(company_id, page, self.selectors, self.fields)
+        except Exception as e:
+            log_print(f"  抓取公司 ID {company_id} 詳細資訊失敗: {e}")
+            if self.recorder:
+                await self.recorder.capture(page, company_id, 'extract', failed=True, error=e)
+            entry = None
+        if entry:
+            log_print(f"  [LOG] 來源名稱: {query}，104 首筆名稱: {entry.get('公司名稱', 'N/A')}")
+        else:
+            log_print(f"  [查詢失敗] 無法抓取 {query} 詳細資料。")
+        return entry
+
 async def unified_main():
     import argparse
     parser = argparse.ArgumentParser()
     group = parser.add_mutually_exclusive_group()
     group.add_argument('company_name', nargs='?', type=str, help='要查詢的公司名稱')
-    group.add_argument('-i', '--input-file', type=str, default=None, help='公司名稱清單檔案（txt 或 csv）')
+    group.add_argument('-i', '--input-file', type=str, default=None, help='公司名稱清單檔案（txt / csv / tsv / xlsx / jsonl）')
+    group.add_argument('--harvest', type=str, default=None, metavar='KEYWORD', help='收集模式：翻頁記錄關鍵字的所有搜尋結果')
+    parser.add_argument('--name-column', type=str, default=None, help='清單檔的公司名稱欄位名稱（預設自動偵測，其餘欄位一併輸出）')
     parser.add_argument('--headless', action='store_true', help='是否啟用無頭模式')
-    parser.add_argument('--debug-screenshot', action='store_true', help='是否保存 debug 截圖/HTML')
+    parser.add_argument('--debug-screenshot', action='store_true', help='保存每家公司的截圖/HTML（等同 --artifacts all）')
+    parser.add_argument('--refresh-ua', action='store_true', help='強制重建本地 UA 快取')
+    parser.add_argument('--park-timeout', type=float, default=600, help='有頭模式遇到 CAPTCHA 時等待人工驗證的秒數，逾時移至重試佇列')
+    parser.add_argument('--recycle-after', type=int, default=CONTEXT_MAX_REQUESTS, help='每個 context 處理幾筆後換新身分，0 表示不回收')
+    parser.add_argument('--max-rss-mb', type=float, default=BROWSER_MAX_RSS_MB, help='瀏覽器記憶體超過此值 (MB) 時回收 context，0 表示不回收')
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='同時查詢的公司數（每個 worker 各自一個 context）')
+    parser.add_argument('--cache-ttl', type=float, default=0, help='結果快取有效時數，0 表示停用')
+    parser.add_argument('--max-pages', type=int, default=None, help='收集模式最多翻幾頁（預設翻到沒有新結果為止）')
+    parser.add_argument('--harvest-details', action='store_true', help='收集模式完成後，再以收集到的 ID 抓取詳情頁')
+    parser.add_argument('--typed', action='store_true', help='另外輸出型別化欄位 (104_company_info_typed_*.csv / .parquet)')
+    parser.add_argument('--db', type=str, default=os.path.join(OUTPUT_DIR, 'results.db'), help='SQLite 結果庫路徑（以 company_id upsert）')
+    parser.add_argument('--no-db', action='store_true', help='不寫入 SQLite 結果庫')
+    add_change_arguments(parser)
+    add_artifact_arguments(parser)
+    add_queue_arguments(parser)
+    add_watch_arguments(parser)
+    add_progress_arguments(parser)
+    add_budget_arguments(parser)
+    add_profile_arguments(parser)
+    add_proxy_arguments(parser)
+    add_archive_arguments(parser, ARCHIVE_DIR)
+    add_field_arguments(parser)
+    add_log_arguments(parser)
     args = parser.parse_args()
-
-    from playwright.async_api import async_playwright
-    from fake_useragent import UserAgent
-
-    all_scraped_data = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=args.headless, args=args_for_browser())
-        context = await browser.new_context(
-            user_agent=UserAgent().random,
-            viewport={"width": 1280, "height": 800},
-            locale="zh-TW"
-        )
-        page = await context.new_page()
-        if args.company_name:
-            cname = args.company_name
-            print(f"[單筆查詢] 公司名稱: {cname}")
-            company_id = await find_company_id_by_name(cname, page, args.headless, args.debug_screenshot)
-            if not company_id:
-                print(f"  [查詢失敗] 找不到 {cname} 的公司 ID。")
-            else:
-                print(f"  [查詢成功] {cname} 的 104 公司 ID: {company_id}")
-                scraped_data_entry = await scrape_single_company_info(company_id, page, args.debug_screenshot)
-                if scraped_data_entry:
-                    print(f"  [LOG] 來源名稱: {cname}，104 首筆名稱: {scraped_data_entry.get('公司名稱', 'N/A')}")
-                    all_scraped_data.append(scraped_data_entry)
-                    save_results(all_scraped_data, output_format='csv')
-                    save_results(all_scraped_data, output_format='json')
-                else:
-                    print(f"  [查詢失敗] 無法抓取 {cname} 詳細資料。")
+    setup_log_from_args(args)
+
+    work_queue = None
+    input_list = None
+    deadline = deadline_from_args(args)
+    if args.watch and not args.harvest and not args.reextract:
+        work_queue = watcher_from_args(args, OUTPUT_DIR, OUTPUT_PREFIX, deadline)
+        company_names = work_queue.items()
+    elif args.reextract:
+        company_names = []
+        log_print(f"[重新擷取模式] 封存資料夾: {args.archive_dir}")
+    elif args.queue and not args.harvest:
+        work_queue = queue_from_args(args, Site104Adapter.name)
+        company_names = work_queue.items(batch_size=args.concurrency)
+    elif args.harvest:
+        company_names = []
+        log_print(f"[收集模式] 關鍵字: {args.harvest}")
+    elif args.company_name:
+        company_names = [args.company_name]
+        log_print(f"[單筆查詢] 公司名稱: {args.company_name}")
+    else:
+        input_list = company_names = read_company_list(args.input_file, args.name_column)
+        if input_list is None:
+            log_print("[錯誤] 沒有可查詢的公司名稱，請檢查來源檔案！")
+            return
+        if deadline:
+            # 接近截止時間時要依優先順序排序剩餘名稱，需要完整清單
+            company_names = list(input_list)
+            log_print(f"[批次查詢] 將查詢公司數量: {len(company_names)}")
         else:
-            company_names = read_company_list(args.input_file)
+            log_print("[批次查詢] 逐筆讀取清單並查詢")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    ua_pool = load_ua_pool(ua_cache_path(__file__), args.refresh_ua)
+    recorder = recorder_from_args(args, ARTIFACT_DIR, site="104")
+    if args.debug_screenshot:
+        recorder.mode = 'all'
+    selectors = SelectorRegistry(SELECTOR_STATS_FILE)
+    adapter = Site104Adapter(args.headless, recorder, selectors)
+    if args.fields:
+        try:
+            output_fields = adapter.project_fields(parse_fields(args.fields))
+        except ValueError as e:
+            log_print(f"[錯誤] --fields: {e}")
+            return
+        log_print(f"[INFO] 只擷取欄位: {', '.join(output_fields)}（不寫入結果庫、快取與變更偵測，避免以部分欄位覆蓋完整資料）")
+        args.no_db = True
+        args.cache_ttl = 0
+    archive = archive_from_args(args)
+    if args.archive and not args.reextract:
+        adapter.archive = archive
+    writer_class = StreamWriter if args.watch else ResultWriter
+    fieldnames = [field for field in CSV_FIELDS if adapter.wants(field)]
+    fieldnames += [column for column in getattr(input_list, 'extra_columns', ()) if column not in fieldnames]
+    writer = writer_class(OUTPUT_DIR, OUTPUT_PREFIX, fieldnames,
+                          **adapter.writer_options(TYPED_FORMATS if args.typed else ()))
+    cache = ResultCache(os.path.join(OUTPUT_DIR, f"{OUTPUT_PREFIX}_cache.json"), args.cache_ttl)
+    if args.reextract:
+        pool = BrowserPool(headless=True, context_options=REPLAY_CONTEXT_OPTIONS)
+    else:
+        pool = build_browser_pool(args.headless, ua_pool, args.recycle_after, args.max_rss_mb,
+                                  proxy_pool_from_args(args))
+    store = None if args.no_db else ResultStore(args.db)
+    tracker = tracker_from_args(args, store)
+    if args.incremental and not args.harvest and not args.reextract and not work_queue:
+        if tracker is None:
+            log_print("[WARN] 增量模式需要 SQLite 結果庫，已忽略 --incremental")
+        else:
+            company_names = list(tracker.filter_due(adapter.name, company_names))
             if not company_names:
-                print("[錯誤] 沒有可查詢的公司名稱，請檢查來源檔案！")
+                log_print("[INFO] 沒有到期需要重抓的公司")
+                store.close()
                 return
-            print(f"[批次查詢] 將查詢公司數量: {len(company_names)}")
-            for idx, cname in enumerate(company_names, 1):
-                print(f"\n[批次 {idx}/{len(company_names)}] 來源公司名稱: {cname}")
-                company_id = await find_company_id_by_name(cname, page, args.headless, args.debug_screenshot)
-                if not company_id:
-                    print(f"  [查詢失敗] 找不到 {cname} 的公司 ID，略過。")
-                    continue
-                print(f"  [查詢成功] {cname} 的 104 公司 ID: {company_id}")
-                scraped_data_entry = await scrape_single_company_info(company_id, page, args.debug_screenshot)
-                if scraped_data_entry:
-                    print(f"  [LOG] 來源名稱: {cname}，104 首筆名稱: {scraped_data_entry.get('公司名稱', 'N/A')}")
-                    all_scraped_data.append(scraped_data_entry)
-                else:
-                    print(f"  [查詢失敗] 無法抓取 {cname} 詳細資料。")
-            if all_scraped_data:
-                save_results(all_scraped_data, output_format='csv')
-                save_results(all_scraped_data, output_format='json')
-            else:
-                print("[INFO] 無任何公司資料可匯出。")
-        await browser.close()
+    scheduler = None
+    profiler = profiler_from_args(args, os.path.join(OUTPUT_DIR, 'profile'))
+    if profiler:
+        profiler.start()
+    try:
+        async with pool:
+            if args.harvest:
+                await run_harvest_mode(adapter, pool, args.harvest, args.max_pages, args.harvest_details,
+                                       args.concurrency, cache, store=store)
+                return
+            if args.reextract:
+                await run_reextract_mode(adapter, pool, archive, args.concurrency, store=store,
+                                         **adapter.writer_options(TYPED_FORMATS if args.typed else ()))
+                return
+            scheduler = Scheduler(adapter, concurrency=args.concurrency, pool=pool, cache=cache,
+                                  writer=writer, store=store, tracker=tracker, park_timeout=args.park_timeout,
+                                  work_queue=work_queue, progress=progress_from_args(args),
+                                  item_budget=args.item_budget, deadline=deadline,
+                                  priority=input_priority if has_priority_column(input_list) else None,
+                                  profiler=profiler, keep_results=not args.watch)
+            await scheduler.run(company_names)
+    finally:
+        if profiler:
+            await profiler.stop()
+        if work_queue:
+            await work_queue.close()
+        await recorder.close()
+        if archive:
+            await archive.close()
+        selectors.flush()
+        selectors.log_report()
+        if store:
+            store.close()
+    if args.watch or writer.records:
+        writer.save()
+    else:
+        log_print("[INFO] 無任何公司資料可匯出。")
+    if scheduler:
+        scheduler.save_unprocessed(OUTPUT_DIR, OUTPUT_PREFIX)
+    if tracker:
+        tracker.write_report(OUTPUT_DIR, OUTPUT_PREFIX)
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(unified_main())
\ No newline at end of file
+    asyncio.run(unified_main())
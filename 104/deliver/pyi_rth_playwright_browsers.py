@@ -0,0 +1,14 @@
+"""
+PyInstaller runtime hook：打包後優先使用執行檔旁的 ms-playwright/ 瀏覽器，
+onedir 版直接從該資料夾啟動 Chromium，不需解壓；沒有時沿用 Playwright 預設位置（~/.cache/ms-playwright）。
+已設定 PLAYWRIGHT_BROWSERS_PATH 時不覆蓋。
+"""
+import os
+import sys
+
+if getattr(sys, 'frozen', False):
+    for base_dir in (os.path.dirname(sys.executable), getattr(sys, '_MEIPASS', '')):
+        browsers = os.path.join(base_dir, 'ms-playwright')
+        if base_dir and os.path.isdir(browsers):
+            os.environ.setdefault('PLAYWRIGHT_BROWSERS_PATH', browsers)
+            break
@@ -0,0 +1,179 @@
+"""
+啟動時間基準測試
+
+以 `python -X importtime` 載入各入口腳本（只執行模組頂層，不進入 main），
+統計匯入耗時，並檢查 playwright / pandas 等重量級模組是否在啟動階段就被載入。
+任一入口超出預算或載入了重量級模組時以非零狀態碼結束，可直接放進 CI。
+
+`--frozen` 另外比較打包後的執行檔與 `python 104bat.py` 的整個行程啟動時間（皆以 --help 呼叫，
+argparse 輸出說明後即結束，量到的是每次單筆查詢都要付出的啟動成本）。
+
+用法:
+    python bench/startup_bench.py
+    python bench/startup_bench.py --runs 10 --budget-ms 200
+    python bench/startup_bench.py --only 104bat --frozen 104/deliver/dist/104_scraper/104_scraper
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口腳本（相對 repo 根目錄）
+ENTRY_POINTS = {
+    "104bat": os.path.join("104", "deliver", "104bat.py"),
+    "bizbat": os.path.join("商工", "bizbat.py"),
+    "template": os.path.join("template", "template.py"),
+    "combinebat": os.path.join("combined", "combinebat.py"),
+}
+
+# 啟動時不應被載入的模組（應延遲到實際使用時）
+HEAVY_MODULES = ["playwright", "fake_useragent", "pandas", "bs4", "requests", "greenlet"]
+
+# 以檔案路徑載入模組；__name__ 不是 "__main__"，因此不會執行主程式
+LOADER = (
+    "import importlib.util, sys\n"
+    "spec = importlib.util.spec_from_file_location('entry_under_bench', sys.argv[1])\n"
+    "mod = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(mod)\n"
+)
+
+
+def parse_importtime(stderr: str):
+    """
+    解析 -X importtime 輸出。
+    :return: (頂層模組累計微秒總和, {模組名稱: 累計微秒})
+    """
+    modules = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = _split(line)
+        except ValueError:
+            continue
+        stripped = name.lstrip()
+        modules[stripped] = cumulative_us
+        # 縮排深度 0 表示由入口直接匯入的模組
+        if len(name) - len(stripped) == 1:
+            total_us += cumulative_us
+    return total_us, modules
+
+
+def _split(line: str):
+    # 格式: "import time:   self [us] | cumulative | imported package"
+    _, rest = line.split(":", 1)
+    self_us, cumulative_us, name = rest.split("|", 2)
+    return int(self_us), int(cumulative_us), name
+
+
+def bench_entry(path: str, runs: int):
+    wall_ms = []
+    import_us = []
+    modules = {}
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", LOADER, path],
+            cwd=os.path.dirname(path),
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            tail = proc.stderr.strip().splitlines()[-1:] or [""]
+            raise RuntimeError(f"載入失敗 (exit {proc.returncode}): {tail[0]}")
+        total_us, modules = parse_importtime(proc.stderr)
+        import_us.append(total_us)
+    heavy = sorted({m.split(".")[0] for m in modules if m.split(".")[0] in HEAVY_MODULES})
+    top = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    return {
+        "wall_ms": statistics.median(wall_ms),
+        "import_ms": statistics.median(import_us) / 1000,
+        "heavy": heavy,
+        "top": top,
+    }
+
+
+def bench_command(cmd, runs: int, cwd: str):
+    """
+    量測整個行程的執行時間。
+    :return: (第一次毫秒, 中位數毫秒)；第一次包含檔案系統快取未命中的成本。
+    """
+    wall_ms = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=cwd, capture_output=True)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        if proc.returncode != 0:
+            tail = proc.stderr.decode("utf-8", "replace").strip().splitlines()[-1:] or [""]
+            raise RuntimeError(f"執行失敗 (exit {proc.returncode}): {tail[0]}")
+    return wall_ms[0], statistics.median(wall_ms)
+
+
+def compare_frozen(executables, runs: int) -> bool:
+    """比較打包執行檔與 python 104bat.py 的啟動時間；任一執行失敗時回傳 False。"""
+    script = os.path.join(REPO_ROOT, ENTRY_POINTS["104bat"])
+    commands = [("python 104bat.py", [sys.executable, script, "--help"])]
+    commands += [(exe, [os.path.abspath(exe), "--help"]) for exe in executables]
+    baseline = None
+    ok = True
+    for label, cmd in commands:
+        try:
+            first_ms, median_ms = bench_command(cmd, runs, os.path.dirname(script))
+        except (OSError, RuntimeError) as e:
+            print(f"[FAIL] {label}: {e}")
+            ok = False
+            continue
+        diff = "" if baseline is None else f"（相較腳本 {median_ms - baseline:+.1f} ms）"
+        print(f"[比較] {label} --help：中位數 {median_ms:.1f} ms，第一次 {first_ms:.1f} ms{diff}")
+        if baseline is None:
+            baseline = median_ms
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口腳本啟動時間基準測試")
+    parser.add_argument("--runs", type=int, default=5, help="每個入口重複次數（取中位數）")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="單一入口匯入耗時預算（毫秒）")
+    parser.add_argument("--only", nargs="*", choices=sorted(ENTRY_POINTS), help="只測指定入口")
+    parser.add_argument("--frozen", nargs="+", metavar="EXE",
+                        help="與打包後的 104 執行檔比較整個行程的啟動時間（可同時列出 onedir 與 one-file 版）")
+    args = parser.parse_args()
+
+    failed = False
+    for name, rel_path in ENTRY_POINTS.items():
+        if args.only and name not in args.only:
+            continue
+        path = os.path.join(REPO_ROOT, rel_path)
+        try:
+            result = bench_entry(path, args.runs)
+        except RuntimeError as e:
+            print(f"[FAIL] {name}: {e}")
+            failed = True
+            continue
+        status = "OK"
+        if result["heavy"]:
+            status = "FAIL"
+            failed = True
+        elif result["import_ms"] > args.budget_ms:
+            status = "SLOW"
+            failed = True
+        print(f"[{status}] {name}: 匯入 {result['import_ms']:.1f} ms，行程總耗時 {result['wall_ms']:.1f} ms")
+        if result["heavy"]:
+            print(f"    啟動時載入了重量級模組: {', '.join(result['heavy'])}")
+        for mod, us in result["top"]:
+            print(f"    {us / 1000:8.1f} ms  {mod}")
+    if args.frozen and not compare_frozen(args.frozen, args.runs):
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+104 公司資料 + 商工登記 合併查詢
+
+同一份公司清單同時交給 104bat.py 與 bizbat.py 的站點轉接器，兩個來源各自一個瀏覽器池並行執行，
+總耗時約為較慢的來源，而非兩者相加。結果以統一編號 / 正規化公司名稱合併成一筆。
+
+用法:
+    python combinebat.py -i company_list.txt
+    python combinebat.py -i company_list.txt -c 2 --headed
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+from scraper_core import (
+    ResultCache, ResultStore, ResultWriter, Scheduler, add_log_arguments, load_ua_pool, log_print,
+    read_company_list, setup_log_from_args, ua_cache_path,
+)
+from scraper_core.artifacts import add_artifact_arguments, recorder_from_args
+from scraper_core.proxies import add_proxy_arguments, proxy_pool_from_args
+from scraper_core.matching import name_similarity, normalize_company_name
+from scraper_core.normalize import clean_ban, clean_company_name
+
+OUTPUT_DIR = "./output_combined"
+OUTPUT_PREFIX = "combined_company_info"
+COMPANY_LIST_FILE = "company_list.txt"
+MERGED_FIELDS = [
+    "查詢公司名稱", "統一編號", "公司名稱", "登記現況", "資本總額(元)", "代表人姓名", "公司所在地",
+    "104公司名稱", "104公司網址", "產業類別", "主要服務", "資本額(104)", "員工人數", "公司官網",
+    "合併依據", "名稱相似度",
+]
+# 104 名稱與商工登記名稱的最低相似度，低於此值視為 104 搜尋到另一家公司
+MIN_SIMILARITY = 0.8
+
+# 入口腳本（檔名以數字開頭，無法直接 import）
+SOURCE_SCRIPTS = {
+    "104": os.path.join("104", "deliver", "104bat.py"),
+    "biz": os.path.join("商工", "bizbat.py"),
+}
+
+
+def load_script(name):
+    """以檔案路徑載入入口腳本（不執行其 main）。"""
+    spec = importlib.util.spec_from_file_location(f"{name}_source", os.path.join(REPO_ROOT, SOURCE_SCRIPTS[name]))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def merge_record(query, biz, site104, basis, similarity):
+    biz = biz or {}
+    site104 = site104 or {}
+    return {
+        "查詢公司名稱": query,
+        "統一編號": clean_ban(biz.get("統一編號")),
+        "公司名稱": clean_company_name(biz.get("公司名稱"))[0],
+        "登記現況": biz.get("登記現況"),
+        "資本總額(元)": biz.get("資本總額(元)"),
+        "代表人姓名": biz.get("代表人姓名"),
+        "公司所在地": biz.get("公司所在地"),
+        "104公司名稱": site104.get("公司名稱"),
+        "104公司網址": site104.get("公司網址"),
+        "產業類別": site104.get("產業類別"),
+        "主要服務": site104.get("主要服務"),
+        "資本額(104)": site104.get("資本額"),
+        "員工人數": site104.get("員工人數"),
+        "公司官網": site104.get("公司官網"),
+        "合併依據": basis,
+        "名稱相似度": similarity,
+    }
+
+
+def join_results(names, biz_results, site104_results, min_similarity=MIN_SIMILARITY, log_enable=True):
+    """
+    以輸入序號對齊兩個來源的結果並合併：
+      - 104 公司名稱與商工登記名稱正規化後相同（不限同一輸入序號）-> 「名稱」
+      - 同一輸入序號、名稱相似度達門檻 -> 「相似名稱」
+      - 只有單一來源有結果 -> 「僅商工」/「僅104」
+    同一統一編號只輸出一筆（清單內重複或別名）；每筆 104 結果最多併入一筆輸出，
+    以名稱對到其他序號的 104 結果不再以「僅104」重複輸出，被取代的同序號 104 結果記入 log。
+    :param biz_results / site104_results: {輸入序號: 原始結果}
+    :return: [(輸入序號, 合併結果)]
+    """
+    by_name_104 = {}
+    for record in site104_results.values():
+        by_name_104.setdefault(normalize_company_name(record.get("公司名稱")), record)
+
+    def name_match(biz):
+        return by_name_104.get(normalize_company_name(clean_company_name(biz.get("公司名稱"))[0]))
+
+    # 以名稱對到其他序號商工結果的 104 紀錄，不論先後都不再以「僅104」單獨輸出
+    claimed = {id(record) for record in map(name_match, biz_results.values()) if record is not None}
+    used = set()  # 已併入輸出的 104 紀錄
+
+    merged = []
+    seen_keys = set()
+    for index, query in enumerate(names, 1):
+        biz = biz_results.get(index)
+        site104 = site104_results.get(index)
+        if site104 is not None and id(site104) in used:
+            site104 = None
+        if biz is None and (site104 is None or id(site104) in claimed):
+            continue
+        biz_name = clean_company_name(biz.get("公司名稱"))[0] if biz else None
+        key = (clean_ban(biz.get("統一編號")) if biz else None) or f"query:{normalize_company_name(query)}"
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+
+        similarity = None
+        matched = name_match(biz) if biz else None
+        if biz is None:
+            basis = "僅104"
+        elif matched is not None and id(matched) not in used:
+            if site104 is not None and site104 is not matched and id(site104) not in claimed:
+                log_print(f"  [合併] {query}: 登記名稱「{biz_name}」對到其他序號的 104 結果，"
+                          f"同序號的 104 結果「{site104.get('公司名稱')}」不合併", log_enable, company=query)
+            site104 = matched
+            basis, similarity = "名稱", 1.0
+        elif site104 is not None and id(site104) not in claimed:
+            similarity = round(name_similarity(biz_name, site104.get("公司名稱")), 2)
+            if similarity >= min_similarity:
+                basis = "相似名稱"
+            else:
+                log_print(f"  [合併] {query}: 104 名稱「{site104.get('公司名稱')}」與登記名稱「{biz_name}」"
+                          f"相似度 {similarity} 過低，不合併", log_enable, company=query)
+                site104, basis = None, "僅商工"
+        else:
+            site104, basis = None, "僅商工"
+        if site104 is not None:
+            used.add(id(site104))
+        merged.append((index, merge_record(query, biz, site104, basis, similarity)))
+    return merged
+
+
+async def run_source(label, scheduler, names, log_enable):
+    start = time.time()
+    async with scheduler.pool:
+        await scheduler.run(names)
+    stats = scheduler.stats
+    log_print(f"[INFO] {label} 完成：成功 {stats['done']}、失敗 {stats['failed']}、快取 {stats['cached']}，"
+              f"耗時 {time.time() - start:.2f} 秒", log_enable)
+    return scheduler.results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="104 公司資料 + 商工登記 合併查詢")
+    parser.add_argument('-i', '--input-file', type=str, default=COMPANY_LIST_FILE, help='公司名稱清單檔案（txt 或 csv）')
+    parser.add_argument('--headed', action='store_true', help='顯示瀏覽器視窗（預設 headless）')
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='每個來源同時查詢的公司數')
+    parser.add_argument('--cache-ttl', type=float, default=0, help='結果快取有效時數，0 表示停用')
+    parser.add_argument('--min-similarity', type=float, default=MIN_SIMILARITY, help='104 與商工名稱合併的最低相似度')
+    parser.add_argument('--refresh-ua', action='store_true', help='強制重建 104 的本地 UA 快取')
+    parser.add_argument('--db', type=str, default=os.path.join(OUTPUT_DIR, 'results.db'), help='SQLite 結果庫路徑（兩個來源共用）')
+    parser.add_argument('--no-db', action='store_true', help='不寫入 SQLite 結果庫')
+    add_artifact_arguments(parser)
+    add_proxy_arguments(parser)
+    add_log_arguments(parser)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    setup_log_from_args(args)
+    log_enable = True
+    start_time = time.time()
+    log_print(f"[INFO] 啟動時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", log_enable)
+
+    names = read_company_list(args.input_file, log_enable=log_enable)
+    if not names:
+        log_print("[ERROR] 沒有可查詢的公司名稱", log_enable)
+        return
+    bat104 = load_script("104")
+    bizbat = load_script("biz")
+    recorder = recorder_from_args(args, os.path.join(OUTPUT_DIR, "artifacts"), site="104", log_enable=log_enable)
+
+    adapter104 = bat104.Site104Adapter(not args.headed, recorder)
+    adapter_biz = bizbat.BizAdapter(log_enable)
+    ua_pool = load_ua_pool(ua_cache_path(bat104.__file__), args.refresh_ua)
+    store = None if args.no_db else ResultStore(args.db)
+    pools = {
+        adapter104.name: bat104.build_browser_pool(not args.headed, ua_pool, proxies=proxy_pool_from_args(args)),
+        adapter_biz.name: bizbat.build_browser_pool(not args.headed, proxies=proxy_pool_from_args(args)),
+    }
+    schedulers = {}
+    for adapter in (adapter104, adapter_biz):
+        cache = ResultCache(os.path.join(OUTPUT_DIR, f"{adapter.output_prefix}_cache.json"), args.cache_ttl)
+        schedulers[adapter.name] = Scheduler(adapter, concurrency=args.concurrency, pool=pools[adapter.name],
+                                             cache=cache, store=store, log_enable=log_enable)
+    try:
+        # 兩個來源並行：總耗時約為較慢者
+        results104, results_biz = await asyncio.gather(
+            run_source("104", schedulers[adapter104.name], names, log_enable),
+            run_source("商工", schedulers[adapter_biz.name], names, log_enable),
+        )
+    finally:
+        await recorder.close()
+        if store:
+            store.close()
+
+    writer = ResultWriter(OUTPUT_DIR, OUTPUT_PREFIX, MERGED_FIELDS, formats=('json', 'csv'),
+                          json_indent=2, log_enable=log_enable)
+    for index, record in join_results(names, results_biz, results104, args.min_similarity, log_enable):
+        writer.add(record, index)
+    if writer.records:
+        writer.save()
+    else:
+        log_print("[INFO] 無任何公司資料可匯出。", log_enable)
+    log_print(f"[INFO] 總運行時間: {time.time() - start_time:.2f} 秒", log_enable)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""
+scraper_core：104bat.py、bizbat.py、template.py 共用的爬蟲核心。
+
+各腳本只需實作 SiteAdapter（search / fetch_detail / extract），
+即可共用排程器、瀏覽器池、快取與輸出層。
+匯入本套件不會載入 playwright 等重量級模組。
+"""
+from .adapter import SiteAdapter, add_field_arguments, parse_fields
+from .archive import ArchiveReplayAdapter, PageArchive, add_archive_arguments, archive_from_args, run_reextract_mode
+from .artifacts import ArtifactRecorder, add_artifact_arguments, load_fixtures, read_fixture_html, recorder_from_args
+from .browser import DEFAULT_LAUNCH_ARGS, BlockedError, BrowserPool, ChallengeError, is_navigation_error
+from .budget import BudgetExceeded, add_budget_arguments, deadline_from_args, phase_timeout
+from .cache import ResultCache
+from .changes import ChangeTracker, add_change_arguments, tracker_from_args
+from .files import CompanyList, CompanyName, open_company_list, read_company_list, save_results
+from .frontier import BloomFilter, UrlFrontier, add_crawl_arguments, frontier_from_args
+from .harvest import HARVEST_COMMON_FIELDS, HarvestDetailAdapter, harvest, run_harvest_mode
+from .log import add_log_arguments, close_log, log_print, set_log_file, setup_log, setup_log_from_args
+from .memory import MemoryMonitor, process_tree_rss
+from .profiling import SamplingProfiler, add_profile_arguments, profiler_from_args
+from .progress import ProgressMonitor, add_progress_arguments, progress_from_args
+from .proxies import ProxyPool, add_proxy_arguments, load_proxies, proxy_pool_from_args
+from .scheduler import Scheduler, WorkItem
+from .selector_stats import SelectorRegistry
+from .store import ResultStore
+from .useragents import IdentityPool, load_ua_pool, ua_cache_path
+from .watch import NameWatcher, add_watch_arguments, watcher_from_args
+from .workqueue import WorkQueue, add_queue_arguments, queue_from_args
+from .writer import TYPED_FORMATS, ResultWriter, StreamWriter
+
+__all__ = [
+    'SiteAdapter', 'add_field_arguments', 'parse_fields', 'ArchiveReplayAdapter', 'PageArchive', 'add_archive_arguments', 'archive_from_args',
+    'run_reextract_mode', 'ArtifactRecorder', 'add_artifact_arguments', 'load_fixtures', 'read_fixture_html',
+    'recorder_from_args', 'DEFAULT_LAUNCH_ARGS', 'BlockedError', 'BrowserPool', 'ChallengeError', 'is_navigation_error',
+    'BudgetExceeded', 'add_budget_arguments', 'deadline_from_args', 'phase_timeout',
+    'ResultCache', 'CompanyList', 'CompanyName', 'open_company_list', 'read_company_list',
+    'save_results', 'log_print', 'set_log_file', 'setup_log',
+    'setup_log_from_args', 'add_log_arguments', 'close_log',
+    'BloomFilter', 'UrlFrontier', 'add_crawl_arguments', 'frontier_from_args',
+    'HARVEST_COMMON_FIELDS', 'HarvestDetailAdapter', 'harvest', 'run_harvest_mode',
+    'ChangeTracker', 'add_change_arguments', 'tracker_from_args', 'MemoryMonitor', 'process_tree_rss',
+    'SamplingProfiler', 'add_profile_arguments', 'profiler_from_args',
+    'ProgressMonitor', 'add_progress_arguments', 'progress_from_args',
+    'ProxyPool', 'add_proxy_arguments', 'load_proxies', 'proxy_pool_from_args',
+    'ResultStore', 'Scheduler', 'SelectorRegistry', 'WorkItem', 'IdentityPool', 'load_ua_pool', 'ua_cache_path',
+    'NameWatcher', 'add_watch_arguments', 'watcher_from_args',
+    'WorkQueue', 'add_queue_arguments', 'queue_from_args', 'TYPED_FORMATS', 'ResultWriter', 'StreamWriter',
+]
@@ -0,0 +1,108 @@
+"""
+站點轉接器介面：每個站點只需實作 search / fetch_detail / extract 三個步驟，
+排程、瀏覽器池、快取與輸出皆由核心負責。
+"""
+
+
+class SiteAdapter:
+    """
+    站點轉接器基底類別。
+    子類別覆寫類別屬性描述輸出格式，並實作三個非同步步驟：
+      search(page, query)            -> 詳情頁參照 (ID/URL/索引)，找不到時回傳 None
+      fetch_detail(page, ref)        -> 導航/下載詳情頁，失敗回傳 falsy
+      extract(page, ref, query, detail) -> 單筆結果 dict，失敗回傳 None
+    指定 fields（--fields）時 extract 只擷取需要的欄位；需要的欄位全部包含在 search_fields 時，
+    scrape 以 search_record 組出結果，不進入詳情頁。
+    """
+    name = "site"                 # 站點代號，用於快取 key
+    output_dir = "./output"
+    output_prefix = "company_info"
+    fieldnames = []               # CSV 欄位順序
+    needs_browser = True          # False 時排程器不建立瀏覽器，page 參數為 None
+    typed_fieldnames = []         # normalize() 輸出的欄位順序
+    change_fields = []            # 變更偵測差異報告列出的型別化欄位
+    hash_exclude_fields = []      # 不列入內容雜湊的欄位（查詢名稱、匹配信心等）
+    archive = None                # PageArchive；設定時 scrape 在 extract 前封存詳情頁 HTML
+    fields = None                 # 只擷取的欄位集合（project_fields 設定）；None 表示全部
+    identity_fields = []          # 指定 fields 時仍一律輸出的欄位（查詢名稱、網址等不需額外擷取者）
+    search_fields = []            # 不需進入詳情頁、由搜尋結果即可取得的欄位
+
+    def progress_message(self, item, total):
+        return f"[INFO] 處理第 {item.index}/{total if total is not None else '?'} 筆：{item.name}"
+
+    def project_fields(self, fields):
+        """
+        設定只擷取/輸出的欄位。
+        :return: 實際輸出的欄位順序（依 fieldnames，含 identity_fields）。
+        """
+        unknown = [field for field in fields if field not in self.fieldnames]
+        if unknown:
+            raise ValueError(f"未知欄位: {', '.join(unknown)}（可用欄位: {', '.join(self.fieldnames)}）")
+        self.fields = set(fields) | set(self.identity_fields)
+        return [field for field in self.fieldnames if field in self.fields]
+
+    def wants(self, field):
+        return self.fields is None or field in self.fields
+
+    def search_record(self, ref, query):
+        """只由 search 的結果組出的記錄（欄位為 search_fields）。"""
+        raise NotImplementedError
+
+    def normalize(self, record):
+        """原始結果 -> 型別化結果（整數金額、乾淨 ID 等）；預設原樣回傳。"""
+        return dict(record)
+
+    def record_key(self, record):
+        """結果的唯一鍵（例如統一編號、company_id），用於結果庫 upsert；None 表示無法識別。"""
+        return None
+
+    def record_name(self, record):
+        """結果中的公司名稱，用於結果庫的名稱索引。"""
+        return record.get("公司名稱")
+
+    def is_challenge(self, page):
+        """page 是否仍停在驗證/封鎖頁面；暫停區以此判斷人工驗證是否完成。"""
+        return False
+
+    def writer_options(self, typed_formats=()):
+        """ResultWriter 的型別化輸出參數。"""
+        if not typed_formats:
+            return {}
+        return {
+            'normalizer': self.normalize,
+            'typed_fieldnames': self.typed_fieldnames or self.fieldnames,
+            'typed_formats': typed_formats,
+        }
+
+    async def search(self, page, query):
+        raise NotImplementedError
+
+    async def fetch_detail(self, page, ref):
+        raise NotImplementedError
+
+    async def extract(self, page, ref, query, detail=None):
+        raise NotImplementedError
+
+    async def scrape(self, page, query):
+        """依序執行 search → fetch_detail → extract；任一步驟失敗即回傳 None。"""
+        ref = await self.search(page, query)
+        if ref is None:
+            return None
+        if self.fields is not None and self.fields <= set(self.search_fields):
+            return self.search_record(ref, query)
+        detail = await self.fetch_detail(page, ref)
+        if not detail:
+            return None
+        if self.archive:
+            await self.archive.save(self.name, page, ref, query, detail)
+        return await self.extract(page, ref, query, detail)
+
+
+def add_field_arguments(parser):
+    """在 argparse parser 加上 --fields 欄位投影參數。"""
+    parser.add_argument('--fields', type=str, default=None,
+                        help='只擷取並輸出的欄位，以逗號分隔（例如 統一編號,資本總額(元)）；未指定的欄位不等待、不查找')
+
+
+def parse_fields(value):
+    return [field.strip() for field in value.split(',') if field.strip()] if value else None
@@ -0,0 +1,189 @@
+"""
+原始頁面封存與離線重新擷取。
+
+封存（`--archive`）：每筆成功載入的詳情頁在擷取前保存 HTML（page.content()，即渲染後的 DOM），
+以內容 SHA-256 為檔名 gzip 存放（objects/ab/abcd....html.gz，內容相同只存一份），
+並在 index.jsonl 附加一行：站點、查詢名稱、ref、detail、網址、雜湊、時間。
+壓縮與寫檔在背景執行緒進行。
+
+重新擷取（`--reextract`）：擷取規則修正後，以封存的 HTML 重跑轉接器的 extract，不連線到網站。
+HTML 以 page.set_content 載入停用 JavaScript 的 context，所有網路請求（CSS、圖片等）一律中止；
+每家公司只取最新一次封存。
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import weakref
+from datetime import datetime
+
+from .adapter import SiteAdapter
+from .log import log_print
+from .scheduler import Scheduler
+from .writer import ResultWriter
+
+INDEX_FILENAME = "index.jsonl"
+# 重新擷取用的 context：頁面已是渲染後的 DOM，不需再執行 JavaScript
+REPLAY_CONTEXT_OPTIONS = {'java_script_enabled': False}
+
+
+class PageArchive:
+    """
+    :param root: 封存資料夾。
+    """
+
+    def __init__(self, root, log_enable=True):
+        self.root = root
+        self.log_enable = log_enable
+        self.saved = 0
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.html.gz")
+
+    async def save(self, site, page, ref, query, detail=None):
+        """擷取目前 page 的 HTML 後立即返回；雜湊、壓縮與寫檔在背景進行。擷取失敗只記錄 log。"""
+        try:
+            html = await page.content()
+            url = page.url
+        except Exception as e:
+            log_print(f"  [封存] {query} 擷取 HTML 失敗: {e}", self.log_enable)
+            return
+        entry = {
+            'site': site,
+            'query': query,
+            'ref': ref,
+            'detail': detail,
+            'url': url,
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        task = asyncio.create_task(asyncio.to_thread(self._write, entry, html))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _write(self, entry, html):
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        entry['sha256'] = digest
+        entry['size'] = len(data)
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            with open(os.path.join(self.root, INDEX_FILENAME), 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.saved += 1
+
+    async def close(self):
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self.saved:
+            log_print(f"[INFO] 已封存 {self.saved} 個頁面於 {self.root}", self.log_enable)
+
+    # ===== 讀取 =====
+    def entries(self, site=None):
+        """
+        每個 (站點, 查詢名稱) 的最新封存紀錄，依第一次封存的順序排列；內容檔遺失者略過。
+        """
+        index_path = os.path.join(self.root, INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return []
+        latest = {}
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if site is None or entry['site'] == site:
+                    latest[(entry['site'], entry['query'])] = entry  # dict 保留第一次出現的順序
+        return [entry for entry in latest.values() if os.path.exists(self.object_path(entry['sha256']))]
+
+    def read_html(self, entry):
+        with gzip.open(self.object_path(entry['sha256']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+
+class ArchiveReplayAdapter(SiteAdapter):
+    """
+    以封存頁面重跑 extract 的轉接器：工作項目是查詢名稱，
+    search 回傳封存時的 ref，fetch_detail 以 set_content 載入封存 HTML（不連線）。
+    """
+
+    def __init__(self, adapter, archive, entries):
+        self.adapter = adapter
+        self.archive = None  # 重新擷取時不再封存
+        self.page_archive = archive
+        self.entries = {entry['query']: entry for entry in entries}
+        self.name = adapter.name
+        self.output_dir = adapter.output_dir
+        self.output_prefix = adapter.output_prefix
+        self.fieldnames = adapter.fieldnames
+        self.typed_fieldnames = adapter.typed_fieldnames
+        self.record_key = adapter.record_key
+        self.record_name = adapter.record_name
+        self.normalize = adapter.normalize
+        # 已攔截所有網路請求的 page；以 page 本身為鍵，回收後的新 page 不會因 id 重複而漏掉攔截
+        self._blocked_pages = weakref.WeakSet()
+
+    def progress_message(self, item, total):
+        return f"[INFO] 重新擷取 {item.index}/{total if total is not None else '?'}：{item.name}"
+
+    async def search(self, page, query):
+        return self.entries[query]['ref']
+
+    async def fetch_detail(self, page, ref):
+        if page not in self._blocked_pages:
+            await page.route("**/*", lambda route: route.abort())
+            self._blocked_pages.add(page)
+        return True
+
+    async def extract(self, page, ref, query, detail=None):
+        entry = self.entries[query]
+        html = await asyncio.to_thread(self.page_archive.read_html, entry)
+        await page.set_content(html, wait_until='domcontentloaded')
+        return await self.adapter.extract(page, ref, query, entry.get('detail'))
+
+
+async def run_reextract_mode(adapter, pool, archive, concurrency=1, log_enable=True, store=None, **writer_options):
+    """
+    重新擷取主流程：以封存頁面重跑 adapter.extract，寫出 {prefix}_reextract_*；
+    store 時同時 upsert 至結果庫（覆蓋擷取錯誤的舊資料）。
+    :param pool: 以 REPLAY_CONTEXT_OPTIONS 建立的 BrowserPool。
+    :return: 重新擷取的結果列表。
+    """
+    entries = archive.entries(adapter.name)
+    if not entries:
+        log_print(f"[INFO] {archive.root} 沒有 {adapter.name} 的封存頁面。", log_enable)
+        return []
+    log_print(f"[INFO] 重新擷取 {len(entries)} 個封存頁面（不連線）", log_enable)
+    replay = ArchiveReplayAdapter(adapter, archive, entries)
+    writer = ResultWriter(adapter.output_dir, f"{adapter.output_prefix}_reextract", adapter.fieldnames,
+                          log_enable=log_enable, **writer_options)
+    scheduler = Scheduler(replay, concurrency=concurrency, pool=pool, writer=writer, store=store,
+                          log_enable=log_enable)
+    results = await scheduler.run(list(replay.entries))
+    if writer.records:
+        writer.save()
+    return results
+
+
+def add_archive_arguments(parser, default_dir):
+    """在 argparse parser 加上共用的封存參數。"""
+    parser.add_argument('--archive', action='store_true', help='封存每筆詳情頁的 HTML（內容雜湊去重，gzip 壓縮）')
+    parser.add_argument('--archive-dir', type=str, default=default_dir, help='封存資料夾')
+    parser.add_argument('--reextract', action='store_true', help='以封存的頁面離線重新擷取欄位，不連線到網站')
+
+
+def archive_from_args(args, log_enable=True):
+    """--archive 或 --reextract 時建立 PageArchive，否則回傳 None。"""
+    if not args.archive and not args.reextract:
+        return None
+    return PageArchive(args.archive_dir, log_enable)
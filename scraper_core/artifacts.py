@@ -0,0 +1,200 @@
+"""
+除錯檔案紀錄器：取代逐筆同步寫入的截圖與 HTML dump。
+
+  - 模式：off / failure（只在失敗時）/ sample（每 N 家抽 1 家，另含失敗）/ all
+  - 抽樣以查詢名稱的 CRC32 決定（轉接器以 begin_item() 設定，之後各階段沿用），
+    同一家公司的搜尋、詳情、擷取各階段一起抽中或一起略過，重跑時抽中的公司相同
+  - 截圖為 JPEG（quality 60）：playwright 的 screenshot 只能輸出 PNG / JPEG，WebP 需另外以 Pillow 轉檔，
+    為此增加相依套件與每張的轉檔成本不划算；HTML 以 gzip 壓縮；壓縮與寫檔在背景執行緒進行，不佔用 event loop
+  - 總容量超過 max_mb 時刪除最舊的檔案
+  - 每筆紀錄附加至 fixtures.jsonl（網址、階段、檔名），HTML 可直接當作離線擷取的基準測試素材
+"""
+import asyncio
+import contextvars
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime
+
+from .log import log_print
+
+ARTIFACT_MODES = ('off', 'failure', 'sample', 'all')
+INDEX_FILENAME = "fixtures.jsonl"
+SCREENSHOT_QUALITY = 60
+_UNSAFE_RE = re.compile(r'[\\/:*?"<>|\s]+')
+_item_key = contextvars.ContextVar('artifact_item', default=None)  # 目前處理中公司的抽樣鍵（每個 worker task 各自一份）
+
+
+class ArtifactRecorder:
+    """
+    :param output_dir: 輸出資料夾。
+    :param mode: ARTIFACT_MODES 之一。
+    :param sample_every: sample 模式每幾家抽 1 家。
+    :param max_mb: 資料夾總容量上限（MB）；0 表示不限制。
+    :param screenshot: 是否截圖（HTML 一律保存）。
+    :param site: 站點代號，寫入索引。
+    """
+
+    def __init__(self, output_dir, mode='failure', sample_every=20, max_mb=200, screenshot=True, site=None,
+                 log_enable=True):
+        if mode not in ARTIFACT_MODES:
+            raise ValueError(f"未知的 artifact 模式: {mode}")
+        self.output_dir = output_dir
+        self.mode = mode
+        self.sample_every = max(1, sample_every)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.screenshot = screenshot
+        self.site = site
+        self.log_enable = log_enable
+        self.captured = 0
+        self._pending = set()
+        self._files = None  # [(mtime, path, size)]，第一次寫入時掃描
+        self._total = 0
+        self._lock = threading.Lock()  # 多個背景寫入共用檔案清單與索引
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    @staticmethod
+    def begin_item(query):
+        """開始處理一家公司時呼叫：之後各階段（即使以公司 ID 命名檔案）都以此查詢名稱決定抽樣。"""
+        _item_key.set(query)
+
+    def wants(self, key, failed=False):
+        """此公司在此情況下是否要保存；抽樣以 begin_item() 的查詢名稱為準，未設定時用 key。"""
+        if self.mode == 'off':
+            return False
+        if failed or self.mode == 'all':
+            return True
+        if self.mode == 'sample':
+            sample_key = _item_key.get() or key
+            return zlib.crc32(str(sample_key).encode('utf-8')) % self.sample_every == 0
+        return False
+
+    async def capture(self, page, key, stage, failed=False, error=None):
+        """
+        擷取 page 的 HTML（與截圖）後立即返回；壓縮與寫檔在背景進行。
+        擷取本身失敗時只記錄 log，不影響主流程。
+        """
+        if not self.wants(key, failed):
+            return
+        try:
+            html = await page.content()
+            image = await page.screenshot(type='jpeg', quality=SCREENSHOT_QUALITY) if self.screenshot else None
+            url = page.url
+        except Exception as e:
+            log_print(f"  [artifact] 擷取 {key} ({stage}) 失敗: {e}", self.log_enable)
+            return
+        self.captured += 1
+        entry = {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'site': self.site,
+            'key': key,
+            'query': _item_key.get(),
+            'stage': stage,
+            'failed': failed,
+            'error': str(error) if error else None,
+            'url': url,
+        }
+        task = asyncio.create_task(asyncio.to_thread(self._write, entry, html, image))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def close(self):
+        """等待背景寫入完成。"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self.captured:
+            log_print(f"[INFO] 已保存 {self.captured} 筆除錯檔案於 {self.output_dir}", self.log_enable)
+
+    # ===== 背景執行緒 =====
+    def _write(self, entry, html, image):
+        with self._lock:
+            self._write_locked(entry, html, image)
+
+    def _write_locked(self, entry, html, image):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self._files is None:
+            self._scan()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        base = f"{_UNSAFE_RE.sub('_', str(entry['key']))[:60]}_{entry['stage']}_{stamp}"
+        html_path = os.path.join(self.output_dir, f"{base}.html.gz")
+        with gzip.open(html_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            f.write(html)
+        entry['html'] = os.path.basename(html_path)
+        self._track(html_path)
+        if image:
+            image_path = os.path.join(self.output_dir, f"{base}.jpg")
+            with open(image_path, 'wb') as f:
+                f.write(image)
+            entry['screenshot'] = os.path.basename(image_path)
+            self._track(image_path)
+        with open(os.path.join(self.output_dir, INDEX_FILENAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._prune()
+
+    def _scan(self):
+        self._files = []
+        for name in os.listdir(self.output_dir):
+            if name == INDEX_FILENAME:
+                continue
+            path = os.path.join(self.output_dir, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                self._files.append((stat.st_mtime, path, stat.st_size))
+        self._files.sort()
+        self._total = sum(size for _, _, size in self._files)
+
+    def _track(self, path):
+        size = os.path.getsize(path)
+        self._files.append((os.path.getmtime(path), path, size))
+        self._total += size
+
+    def _prune(self):
+        while self.max_bytes and self._total > self.max_bytes and len(self._files) > 1:
+            _, path, size = self._files.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self._total -= size
+
+
+def load_fixtures(output_dir, stage=None):
+    """
+    讀取 fixtures.jsonl，回傳仍存在的紀錄（附 html_path），可作為離線擷取的基準測試素材。
+    """
+    index_path = os.path.join(output_dir, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return []
+    fixtures = []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            path = os.path.join(output_dir, entry.get('html') or '')
+            if (stage is None or entry['stage'] == stage) and os.path.isfile(path):
+                entry['html_path'] = path
+                fixtures.append(entry)
+    return fixtures
+
+
+def read_fixture_html(entry):
+    with gzip.open(entry['html_path'], 'rt', encoding='utf-8') as f:
+        return f.read()
+
+
+def add_artifact_arguments(parser, default_mode='failure'):
+    """在 argparse parser 加上共用的除錯檔案參數。"""
+    parser.add_argument('--artifacts', choices=ARTIFACT_MODES, default=default_mode,
+                        help='除錯截圖/HTML 保存方式：off、failure（只在失敗時）、sample（抽樣）、all')
+    parser.add_argument('--artifact-every', type=int, default=20, help='sample 模式每幾家公司抽 1 家')
+    parser.add_argument('--artifact-max-mb', type=float, default=200, help='除錯檔案總容量上限 (MB)，超過時刪除最舊的檔案')
+
+
+def recorder_from_args(args, output_dir, site=None, log_enable=True):
+    return ArtifactRecorder(output_dir, args.artifacts, args.artifact_every, args.artifact_max_mb,
+                            site=site, log_enable=log_enable)
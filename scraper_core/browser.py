@@ -0,0 +1,210 @@
+"""
+瀏覽器池：單一 Chromium 實例，每個 worker 各自擁有獨立 context 與 page。
+context 可在處理 N 筆後、偵測到封鎖（BlockedError）、導航錯誤或瀏覽器記憶體超過門檻時回收，
+下一筆改用新的 context 與新身分；回收只發生在兩筆之間，不會中斷處理中的項目。
+指定代理池（ProxyPool）時每個 context 經由該 worker 分配到的代理連線，代理被剔除時於下一筆前回收 context。
+"""
+import asyncio
+import sys
+import weakref
+
+from .log import log_print
+from .memory import MemoryMonitor, child_pids
+
+# 瀏覽器啟動參數
+DEFAULT_LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--no-default-browser-check',
+    '--no-first-run',
+    '--disable-infobars',
+    '--start-maximized'
+]
+
+
+# 導航失敗、分頁崩潰等錯誤訊息片段；出現時回收 context 再重試
+NAVIGATION_ERROR_MARKERS = (
+    "net::ERR_",
+    "navigating to",
+    "Navigation failed",
+    "Target closed",
+    "Target page, context or browser has been closed",
+    "Page crashed",
+    "frame was detached",
+)
+
+# 每個 event loop 一把鎖，讓同一程式的多個瀏覽器池逐一啟動 playwright driver
+_DRIVER_START_LOCKS = weakref.WeakKeyDictionary()
+
+
+def _driver_start_lock():
+    loop = asyncio.get_running_loop()
+    lock = _DRIVER_START_LOCKS.get(loop)
+    if lock is None:
+        lock = _DRIVER_START_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+
+def is_navigation_error(error):
+    message = str(error)
+    return any(marker in message for marker in NAVIGATION_ERROR_MARKERS)
+
+
+class BlockedError(Exception):
+    """站點回應封鎖/驗證頁面；排程器會回收該 worker 的 context，稍後以新身分重試。"""
+
+
+class ChallengeError(BlockedError):
+    """可由人工在瀏覽器視窗完成的驗證（有頭模式）；排程器把 page 移到暫停區等待，不阻塞其他 worker。"""
+
+
+class BrowserPool:
+    """
+    :param headless: 是否啟用無頭模式。
+    :param launch_args: Chromium 啟動參數，None 時使用 DEFAULT_LAUNCH_ARGS。
+    :param context_options: new_context 參數 dict，或 callable(worker_id) -> dict（每個 worker 各自產生，
+                            context 回收後重新呼叫，可藉此輪替 UA/viewport/locale）。
+    :param max_requests: 每個 context 處理幾筆後回收；0 表示不回收。
+    :param memory_limit_mb: 本池瀏覽器（playwright driver 行程樹）RSS 總和超過此值時，所有 worker 於下一筆前回收 context；0 表示只取樣。
+    :param memory_interval: 記憶體取樣間隔（秒）；0 表示不取樣。
+    :param proxies: ProxyPool；每個 worker 的 context 經由分配到的代理連線，處理結果以 report() 回報評分。
+    """
+
+    def __init__(self, headless=True, launch_args=None, context_options=None, max_requests=0,
+                 memory_limit_mb=0, memory_interval=10.0, log_enable=True, proxies=None):
+        self.headless = headless
+        self.launch_args = DEFAULT_LAUNCH_ARGS if launch_args is None else launch_args
+        self.context_options = context_options
+        self.max_requests = max_requests
+        self.memory_limit_mb = memory_limit_mb
+        self.memory_interval = memory_interval
+        self.proxies = proxies
+        self.log_enable = log_enable
+        self.browser = None
+        self.memory = None
+        self.driver_pid = None
+        self._playwright = None
+        self._slots = {}  # worker_id -> (context, page)
+        self._uses = {}   # worker_id -> 目前 context 已處理筆數
+        self._pending_recycle = set()  # 下一筆前需回收的 worker
+        self.recycled = 0
+
+    async def start(self):
+        from playwright.async_api import async_playwright  # 延遲載入，縮短啟動時間
+        # 以啟動前後的子行程差異找出本池的 playwright driver，記憶體取樣只計算它的行程樹；
+        # 多個瀏覽器池同時啟動時（combinebat）逐一啟動 driver，差異才不會混在一起
+        async with _driver_start_lock():
+            before = child_pids()
+            self._playwright = await async_playwright().start()
+            after = child_pids()
+        started = after - before if before is not None and after is not None else set()
+        self.driver_pid = started.pop() if len(started) == 1 else None
+        launch_options = {}
+        if self.proxies and sys.platform == 'win32':
+            # Windows 的 Chromium 需在啟動時指定代理，各 context 的 proxy 設定才會生效
+            launch_options['proxy'] = {'server': 'http://per-context'}
+        self.browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args,
+                                                              **launch_options)
+        if self.memory_interval:
+            self.memory = MemoryMonitor(self.memory_limit_mb, self.memory_interval,
+                                        on_limit=self.request_recycle_all, log_enable=self.log_enable,
+                                        root_pid=self.driver_pid).start()
+        return self
+
+    def _options_for(self, worker_id):
+        if callable(self.context_options):
+            options = self.context_options(worker_id)
+        else:
+            options = dict(self.context_options or {})
+        if self.proxies:
+            proxy = self.proxies.assign(worker_id)
+            if proxy:
+                options['proxy'] = proxy
+            elif sys.platform == 'win32':
+                # 直連項目須明確不走代理，否則 context 會沿用啟動時的假代理 http://per-context 而連不上
+                options['proxy'] = {'server': 'direct://'}
+        return options
+
+    def report(self, worker_id, outcome, seconds=None):
+        """
+        回報 worker 處理一筆的結果（'ok'、'blocked'、'error'）供代理評分；
+        代理因此被剔除時，該 worker 於下一筆前回收 context 並換代理。
+        """
+        if self.proxies and self.proxies.report(worker_id, outcome, seconds):
+            self._pending_recycle.add(worker_id)
+
+    async def page_for(self, worker_id):
+        """取得 worker 專屬 page；第一次呼叫、context 已達 max_requests 或被要求回收時建立新的 context。"""
+        if worker_id in self._pending_recycle or (
+                self.max_requests and self._uses.get(worker_id, 0) >= self.max_requests):
+            await self.recycle(worker_id)
+        slot = self._slots.get(worker_id)
+        if slot is None or slot[1].is_closed():
+            context = await self.browser.new_context(**self._options_for(worker_id))
+            page = await context.new_page()
+            slot = (context, page)
+            self._slots[worker_id] = slot
+            self._uses[worker_id] = 0
+        self._uses[worker_id] += 1
+        return slot[1]
+
+    async def recycle(self, worker_id):
+        """關閉 worker 的 context；下次 page_for 會以新的 context_options 重建。"""
+        slot = self._slots.pop(worker_id, None)
+        self._uses.pop(worker_id, None)
+        self._pending_recycle.discard(worker_id)
+        if slot is None:
+            return
+        self.recycled += 1
+        try:
+            await slot[0].close()
+        except Exception:
+            pass
+
+    def request_recycle_all(self):
+        """要求所有 worker 在下一筆開始前回收 context（處理中的項目不受影響）。"""
+        self._pending_recycle.update(self._slots)
+
+    def detach(self, worker_id):
+        """
+        把 worker 的 context/page 移出池（不關閉），交由呼叫端管理；worker 下次 page_for 會建立新的 context。
+        :return: (context, page)；worker 尚無 context 時為 None。
+        """
+        self._uses.pop(worker_id, None)
+        return self._slots.pop(worker_id, None)
+
+    def current_page(self, worker_id):
+        slot = self._slots.get(worker_id)
+        return slot[1] if slot else None
+
+    async def close(self):
+        if self.memory:
+            await self.memory.stop()
+            summary = self.memory.summary()
+            if summary:
+                log_print(f"{summary}，context 回收 {self.recycled} 次", self.log_enable)
+            self.memory = None
+        if self.proxies:
+            for line in self.proxies.summary_lines():
+                log_print(line, self.log_enable)
+        for context, _ in self._slots.values():
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._slots.clear()
+        self._uses.clear()
+        self._pending_recycle.clear()
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
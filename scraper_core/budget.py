@@ -0,0 +1,104 @@
+"""
+時間預算：每家公司的處理時間上限（`--item-budget`）與整批執行的截止時間（`--deadline` / `--max-runtime`）。
+
+單筆預算由 Scheduler 在處理每一筆時設定（contextvar，各 worker 互不影響），
+轉接器的 goto、等待搜尋結果、networkidle、selector 等待等階段以 phase_timeout(原本逾時) 取得實際逾時：
+取原本逾時與剩餘預算的較小值，因此前面的階段耗時越久，後面的階段等待越短；
+預算用完時 Scheduler 中止該筆、回收 context 並記為失敗（不重試）。
+接近截止時間時 Scheduler 改為依優先順序處理剩餘名稱，截止後不再開始新的一筆，
+未處理的名稱另外輸出 {prefix}_unprocessed_*.csv。
+"""
+import contextvars
+import time
+from datetime import datetime, timedelta
+
+from .log import log_print
+
+MIN_PHASE_TIMEOUT_MS = 100  # Playwright 的 timeout=0 代表不限時，剩餘預算再少也至少給這麼多
+
+_current = contextvars.ContextVar('scraper_budget', default=None)
+
+
+class BudgetExceeded(Exception):
+    """單筆處理超過時間預算或整批截止時間。"""
+
+
+class ItemBudget:
+    """
+    :param seconds: 單筆預算秒數；0 或 None 表示不限。
+    :param deadline: 整批截止時間（time.time() 秒數），單筆預算不會超過它。
+    """
+
+    def __init__(self, seconds=None, deadline=None):
+        now = time.time()
+        limits = [limit for limit in (now + seconds if seconds else None, deadline) if limit is not None]
+        self.expires_at = min(limits) if limits else None
+
+    def remaining(self):
+        """剩餘秒數；不限時為 None。"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.time())
+
+
+def set_budget(budget):
+    return _current.set(budget)
+
+
+def reset_budget(token):
+    _current.reset(token)
+
+
+def phase_timeout(default_ms):
+    """
+    目前這一筆某個階段可用的逾時（毫秒）：原本的逾時與剩餘預算取較小值。
+    不在 Scheduler 處理中（或未設定預算）時回傳原本的逾時。
+    """
+    budget = _current.get()
+    remaining = budget.remaining() if budget else None
+    if remaining is None:
+        return default_ms
+    return max(MIN_PHASE_TIMEOUT_MS, min(default_ms, int(remaining * 1000)))
+
+
+def parse_deadline(value, now=None):
+    """
+    解析截止時間：HH:MM（今天；已過則為明天）或 YYYY-MM-DD HH:MM / ISO 格式。
+    :return: time.time() 秒數。
+    """
+    now = now or datetime.now()
+    value = value.strip()
+    try:
+        clock = datetime.strptime(value, '%H:%M')
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+    deadline = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline.timestamp()
+
+
+def add_budget_arguments(parser):
+    """在 argparse parser 加上共用的時間預算參數。"""
+    parser.add_argument('--item-budget', type=float, default=0,
+                        help='每家公司最多處理幾秒（各階段共用），超過時放棄該筆，0 表示不限')
+    parser.add_argument('--deadline', type=str, default=None,
+                        help='整批截止時間，HH:MM（已過則為明天）或 YYYY-MM-DD HH:MM；截止後不再開始新的一筆')
+    parser.add_argument('--max-runtime', type=float, default=0, help='整批最多執行幾分鐘，0 表示不限')
+
+
+def deadline_from_args(args, log_enable=True):
+    """依 --deadline / --max-runtime 計算截止時間（兩者皆指定時取較早者）；未指定時回傳 None。"""
+    deadlines = []
+    if args.deadline:
+        try:
+            deadlines.append(parse_deadline(args.deadline))
+        except ValueError:
+            log_print(f"[WARN] 無法解析 --deadline {args.deadline}，已忽略", log_enable)
+    if args.max_runtime:
+        deadlines.append(time.time() + args.max_runtime * 60)
+    if not deadlines:
+        return None
+    deadline = min(deadlines)
+    log_print(f"[INFO] 截止時間: {datetime.fromtimestamp(deadline).strftime('%Y-%m-%d %H:%M:%S')}", log_enable)
+    return deadline
@@ -0,0 +1,66 @@
+"""
+結果快取：以 (站點, 查詢名稱) 為 key，TTL 內重複查詢直接沿用上次結果，不再連線。
+"""
+import json
+import os
+import time
+
+from .log import log_print
+
+
+class ResultCache:
+    """
+    :param path: 快取 JSON 檔路徑。
+    :param ttl_hours: 有效時數；<= 0 表示停用快取。
+    """
+
+    def __init__(self, path, ttl_hours=24):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                log_print(f"[警告] 快取讀取失敗，將重新建立 {self.path}: {e}")
+
+    @staticmethod
+    def _key(site, query):
+        return f"{site}:{query}"
+
+    def get(self, site, query):
+        if not self.enabled:
+            return None
+        self._load()
+        entry = self._entries.get(self._key(site, query))
+        if entry and time.time() - entry['ts'] < self.ttl:
+            return entry['record']
+        return None
+
+    def put(self, site, query, record):
+        if not self.enabled or not record:
+            return
+        self._load()
+        self._entries[self._key(site, query)] = {'ts': time.time(), 'record': record}
+        self._dirty = True
+
+    def flush(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,192 @@
+"""
+變更偵測與增量重抓排程。
+
+每家公司在結果庫記錄一份內容雜湊（以型別化欄位計算，排除查詢名稱、匹配信心等與內容無關的欄位），
+每次重抓時比對：
+  - 有變更：記錄變更欄位，下次檢查間隔減半（越常變動越常檢查）
+  - 無變更：下次檢查間隔加倍（穩定的公司越來越少檢查）
+間隔限制在 [min_hours, max_hours]。增量模式只重抓已到期或從未抓過的名稱，
+每次執行結束輸出本次變更欄位的差異報告。
+
+狀態與變更列經由 ResultStore.stage 排入結果庫的批次交易，不逐筆提交。
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from .files import save_results
+from .log import log_print
+from .store import now_iso
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS record_state (
+    site            TEXT NOT NULL,
+    company_key     TEXT NOT NULL,
+    query_name      TEXT,
+    content_hash    TEXT NOT NULL,
+    checks          INTEGER NOT NULL DEFAULT 1,
+    changes         INTEGER NOT NULL DEFAULT 0,
+    interval_hours  REAL NOT NULL,
+    last_checked_at TEXT NOT NULL,
+    last_changed_at TEXT,
+    next_due_at     TEXT NOT NULL,
+    PRIMARY KEY (site, company_key)
+);
+CREATE INDEX IF NOT EXISTS idx_state_query ON record_state (site, query_name);
+CREATE INDEX IF NOT EXISTS idx_state_due ON record_state (site, next_due_at);
+CREATE TABLE IF NOT EXISTS record_changes (
+    site        TEXT NOT NULL,
+    company_key TEXT NOT NULL,
+    name        TEXT,
+    field       TEXT NOT NULL,
+    old_value   TEXT,
+    new_value   TEXT,
+    changed_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_changes_at ON record_changes (site, changed_at);
+"""
+
+STATE_SQL = """
+INSERT OR REPLACE INTO record_state
+    (site, company_key, query_name, content_hash, checks, changes, interval_hours,
+     last_checked_at, last_changed_at, next_due_at)
+VALUES (:site, :company_key, :query_name, :content_hash, :checks, :changes, :interval_hours,
+        :last_checked_at, :last_changed_at, :next_due_at)
+"""
+CHANGE_SQL = "INSERT INTO record_changes VALUES (:site, :company_key, :name, :field, :old_value, :new_value, :changed_at)"
+
+REPORT_FIELDS = ["site", "company_key", "name", "field", "old_value", "new_value", "changed_at"]
+
+
+def content_hash(typed, exclude=()):
+    payload = {k: v for k, v in typed.items() if k not in exclude}
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ChangeTracker:
+    """
+    :param store: ResultStore（共用同一個 SQLite 連線）。
+    :param base_hours: 第一次抓取後的檢查間隔。
+    :param min_hours: 最短檢查間隔。
+    :param max_hours: 最長檢查間隔。
+    """
+
+    def __init__(self, store, base_hours=24 * 7, min_hours=24, max_hours=24 * 56):
+        self.store = store
+        self.conn = store.conn
+        self.base_hours = base_hours
+        self.min_hours = min_hours
+        self.max_hours = max_hours
+        self.conn.executescript(SCHEMA)
+        self.run_changes = []  # 本次執行偵測到的變更（差異報告）
+        self.stats = {'new': 0, 'changed': 0, 'unchanged': 0}
+
+    def observe(self, adapter, record, query_name=None):
+        """
+        比對新抓到的結果與上次內容，更新雜湊與下次到期時間；須在 upsert 至結果庫之前呼叫。
+        :return: 'new' / 'changed' / 'unchanged'，無法識別公司鍵時為 None。
+        """
+        key = adapter.record_key(record)
+        if not key:
+            return None
+        site = adapter.name
+        typed = adapter.normalize(record)
+        new_hash = content_hash(typed, adapter.hash_exclude_fields)
+        now = datetime.now()
+        state = self.store.staged(('record_state', site, str(key))) or self.conn.execute(
+            "SELECT * FROM record_state WHERE site = ? AND company_key = ?", (site, str(key))).fetchone()
+
+        if state is None:
+            interval = self.base_hours
+            outcome = 'new'
+            self._save_state(site, key, query_name, new_hash, 1, 0, interval, now, None)
+        else:
+            checks = state['checks'] + 1
+            if state['content_hash'] != new_hash:
+                outcome = 'changed'
+                interval = max(self.min_hours, state['interval_hours'] / 2)
+                self._record_diff(adapter, site, key, typed, now)
+                self._save_state(site, key, query_name or state['query_name'], new_hash, checks,
+                                 state['changes'] + 1, interval, now, now)
+            else:
+                outcome = 'unchanged'
+                interval = min(self.max_hours, state['interval_hours'] * 2)
+                self._save_state(site, key, query_name or state['query_name'], new_hash, checks,
+                                 state['changes'], interval, now, state['last_changed_at'])
+        self.stats[outcome] += 1
+        return outcome
+
+    def _save_state(self, site, key, query_name, content_hash_, checks, changes, interval, now, changed_at):
+        state = {
+            'site': site, 'company_key': str(key), 'query_name': query_name, 'content_hash': content_hash_,
+            'checks': checks, 'changes': changes, 'interval_hours': interval,
+            'last_checked_at': now.isoformat(timespec='seconds'),
+            'last_changed_at': changed_at.isoformat(timespec='seconds') if isinstance(changed_at, datetime) else changed_at,
+            'next_due_at': (now + timedelta(hours=interval)).isoformat(timespec='seconds'),
+        }
+        self.store.stage(STATE_SQL, state, key=('record_state', site, str(key)))
+
+    def _record_diff(self, adapter, site, key, typed, now):
+        previous = self.store.peek(site, key)  # 不強制 flush，保留批次寫入
+        old_typed = (previous or {}).get('typed') or {}
+        name = adapter.record_name(previous['data']) if previous else None
+        rows = []
+        for field in adapter.change_fields:
+            old, new = old_typed.get(field), typed.get(field)
+            if old != new:
+                rows.append({'site': site, 'company_key': str(key), 'name': name or typed.get('公司名稱'),
+                             'field': field, 'old_value': old, 'new_value': new,
+                             'changed_at': now.isoformat(timespec='seconds')})
+        for row in rows:
+            self.store.stage(CHANGE_SQL, {**row, 'old_value': _as_text(row['old_value']),
+                                          'new_value': _as_text(row['new_value'])})
+        self.run_changes.extend(rows)
+
+    def filter_due(self, site, names, log_enable=True):
+        """
+        增量模式：只保留已到期或從未抓過的名稱（逐筆產生，可直接交給排程器）。
+        """
+        now = now_iso()
+        skipped = 0
+        for name in names:
+            rows = self.conn.execute(
+                "SELECT next_due_at FROM record_state WHERE site = ? AND query_name = ?", (site, name)).fetchall()
+            if rows and all(row['next_due_at'] > now for row in rows):
+                skipped += 1
+                continue
+            yield name
+        log_print(f"[INFO] 增量模式：略過 {skipped} 筆尚未到期的公司", log_enable)
+
+    def write_report(self, output_dir, prefix, log_enable=True):
+        """輸出本次執行的變更差異報告；沒有變更時不產生檔案。"""
+        log_print(f"[INFO] 變更偵測：新增 {self.stats['new']}、有變更 {self.stats['changed']}、"
+                  f"無變更 {self.stats['unchanged']}", log_enable)
+        if not self.run_changes:
+            return []
+        paths = []
+        for fmt in ('csv', 'json'):
+            path = save_results(self.run_changes, output_dir, f"{prefix}_changes", REPORT_FIELDS, fmt,
+                                json_indent=2, log_enable=log_enable)
+            if path:
+                paths.append(path)
+        return paths
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def add_change_arguments(parser):
+    """在 argparse parser 加上共用的增量重抓參數。"""
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量模式：只重抓已到期（依過去變更頻率調整間隔）或從未抓過的公司')
+    parser.add_argument('--min-interval-hours', type=float, default=24, help='增量模式最短重抓間隔（小時）')
+    parser.add_argument('--max-interval-hours', type=float, default=24 * 56, help='增量模式最長重抓間隔（小時）')
+
+
+def tracker_from_args(args, store):
+    """結果庫啟用時一律做變更偵測；未啟用結果庫時回傳 None。"""
+    if store is None:
+        return None
+    base = min(max(24 * 7, args.min_interval_hours), args.max_interval_hours)
+    return ChangeTracker(store, base_hours=base, min_hours=args.min_interval_hours, max_hours=args.max_interval_hours)
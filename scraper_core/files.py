@@ -0,0 +1,314 @@
+"""
+共用輸入/輸出：讀取公司清單、儲存 JSON/CSV 結果。
+
+公司清單以 CompanyList 逐筆讀取（txt / csv / tsv / xlsx / jsonl），不一次載入記憶體，可直接交給 Scheduler.run；
+有標題列時可指定公司名稱欄（--name-column），其餘欄位隨名稱（CompanyName.extra）帶到輸出。
+"""
+import csv
+import json
+import os
+from datetime import datetime
+
+from .log import log_print
+
+# 未指定來源檔時依序檢查：當前目錄 txt > csv > ./104/txt > ./104/csv
+DEFAULT_CANDIDATES = [
+    'company_list.txt',
+    'company_list.csv',
+    os.path.join('104', 'company_list.txt'),
+    os.path.join('104', 'company_list.csv'),
+]
+INPUT_FORMATS = ('.txt', '.csv', '.tsv', '.xlsx', '.jsonl')
+# 未指定公司名稱欄時，依序在標題列尋找這些欄位名稱（不分大小寫）
+NAME_COLUMNS = ('公司名稱', '查詢公司名稱', '名稱', 'name', 'company', 'company_name')
+# 公司清單中表示優先順序的欄位名稱（數字越大越優先）
+PRIORITY_COLUMNS = ('priority', '優先順序', '優先度')
+
+
+class CompanyName(str):
+    """公司名稱；extra 為輸入檔同一列的其他欄位 {欄位: 值}，Scheduler 寫出結果時一併輸出。"""
+
+    def __new__(cls, name, extra=None):
+        obj = super().__new__(cls, name)
+        obj.extra = extra or {}
+        return obj
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # Excel 數字欄（例如統編）讀出為 float
+    return str(value).strip()
+
+
+class ColumnLayout:
+    """
+    表格型清單（csv / tsv / xlsx，及監看模式的 csv 行）的欄位配置：由第一列判斷是否為標題列，
+    找出公司名稱欄（column 或 NAME_COLUMNS）與其他要帶到輸出的欄位。
+    :param first: 第一列的儲存格；None 或找不到名稱欄時視為沒有標題列，第一欄為公司名稱。
+    :param column: 公司名稱欄位名稱；指定但標題列沒有時丟出 ValueError。
+    """
+
+    def __init__(self, first=None, column=None, source=''):
+        self.has_header = False
+        self.name_index = 0
+        self.extra_indexes = []
+        header = [_cell(cell).lstrip('\ufeff') for cell in first or []]
+        lowered = [cell.lower() for cell in header]
+        wanted = [column.lower()] if column else list(NAME_COLUMNS)
+        index = next((lowered.index(name) for name in wanted if name in lowered), None)
+        if index is None and column:
+            raise ValueError(f"{source} 的標題列沒有欄位 {column}")
+        if index is None:
+            # 舊格式：第一欄標題含「公司名稱」字樣（例如「公司名稱（必填）」）
+            index = next((i for i, cell in enumerate(header) if '公司名稱' in cell), None)
+        if index is None:
+            return
+        self.has_header = True
+        self.name_index = index
+        self.extra_indexes = [(i, name) for i, name in enumerate(header) if i != index and name]
+
+    @property
+    def extra_columns(self):
+        return [name for _, name in self.extra_indexes]
+
+    def name(self, row):
+        """一列資料 -> 公司名稱（有其他欄位時為 CompanyName）；名稱為空時回傳 None。"""
+        name = _cell(row[self.name_index]) if len(row) > self.name_index else ''
+        if not name:
+            return None
+        if not self.extra_indexes:
+            return name
+        return CompanyName(name, {column: row[i] if i < len(row) else '' for i, column in self.extra_indexes})
+
+
+class CompanyList:
+    """
+    逐筆讀取公司清單，每次迭代重新從檔案讀取。
+    :param path: txt（每行一個名稱）、csv / tsv / xlsx（有標題列時依欄位名稱，否則取第一欄）或 jsonl
+                 （每行一個 JSON 字串或物件）。
+    :param column: 公司名稱欄位名稱；None 時依 NAME_COLUMNS 偵測。
+    建立時只讀取標題列（jsonl 為第一行），extra_columns 為要帶到輸出的其他欄位；找不到指定欄位時丟出 ValueError。
+    """
+
+    def __init__(self, path, column=None, log_enable=True):
+        self.path = path
+        self.column = column
+        self.format = os.path.splitext(path)[1].lower()
+        self.log_enable = log_enable
+        self.extra_columns = []
+        self.has_header = False
+        self._layout = ColumnLayout()
+        self._name_key = None
+        if self.format not in INPUT_FORMATS:
+            raise ValueError(f"不支援的公司清單檔案格式: {path}")
+        if self.format == '.jsonl':
+            self._locate_key()
+        elif self.format != '.txt':
+            rows = self._rows()
+            try:
+                self._layout = ColumnLayout(next(rows, None), column, path)
+            finally:
+                rows.close()
+            self.has_header = self._layout.has_header
+            self.extra_columns = self._layout.extra_columns
+
+    # ===== 標題列 =====
+    def _locate_key(self):
+        with open(self.path, 'r', encoding='utf-8-sig') as f:
+            first = next((line for line in f if line.strip()), '')
+        try:
+            obj = json.loads(first) if first else None
+        except json.JSONDecodeError:
+            obj = None
+        if not isinstance(obj, dict):
+            if self.column:
+                raise ValueError(f"{self.path} 不是 JSON 物件，無法指定欄位 {self.column}")
+            return
+        keys = {key.lower(): key for key in obj}
+        wanted = [self.column.lower()] if self.column else list(NAME_COLUMNS)
+        self._name_key = next((keys[name] for name in wanted if name in keys), None)
+        if self._name_key is None:
+            raise ValueError(f"{self.path} 沒有公司名稱欄位 {self.column or '/'.join(NAME_COLUMNS)}")
+        self.extra_columns = [key for key in obj if key != self._name_key]
+
+    # ===== 逐列讀取 =====
+    def _rows(self):
+        if self.format == '.xlsx':
+            try:
+                from openpyxl import load_workbook  # 延遲載入，只有讀 xlsx 時才需要
+            except ImportError:
+                raise ValueError("讀取 xlsx 需要 openpyxl，請先執行 pip install openpyxl") from None
+            workbook = load_workbook(self.path, read_only=True, data_only=True)
+            try:
+                for row in workbook.active.iter_rows(values_only=True):
+                    yield [_cell(value) for value in row]
+            finally:
+                workbook.close()
+            return
+        with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:  # 強制帶 BOM，解決 Excel 亂碼
+            yield from csv.reader(f, delimiter='\t' if self.format == '.tsv' else ',')
+
+    def __iter__(self):
+        if self.format == '.txt':
+            with open(self.path, 'r', encoding='utf-8-sig') as f:
+                for line in f:
+                    if line.strip():
+                        yield line.strip()
+        elif self.format == '.jsonl':
+            yield from self._iter_jsonl()
+        else:
+            rows = self._rows()
+            if self.has_header:
+                next(rows, None)
+            for row in rows:
+                name = self._layout.name(row)
+                if name:
+                    yield name
+
+    def _iter_jsonl(self):
+        with open(self.path, 'r', encoding='utf-8-sig') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError as e:
+                    log_print(f"[WARN] {self.path} 第 {number} 行不是有效的 JSON，已略過: {e}", self.log_enable)
+                    continue
+                if isinstance(obj, str):
+                    name, extra = obj.strip(), {}
+                elif isinstance(obj, dict) and self._name_key:
+                    name = _cell(obj.get(self._name_key))
+                    extra = {key: value for key, value in obj.items() if key != self._name_key}
+                else:
+                    continue
+                if name:
+                    yield CompanyName(name, extra) if extra else name
+
+
+def input_priority(name):
+    """名稱所在列的優先順序欄（PRIORITY_COLUMNS 之一），沒有或無法解析時為 0；可直接作為 Scheduler 的 priority。"""
+    for key, value in getattr(name, 'extra', {}).items():
+        if key.strip().lower() in PRIORITY_COLUMNS:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0
+    return 0
+
+
+def has_priority_column(company_list):
+    """公司清單是否有優先順序欄。"""
+    return any(column.strip().lower() in PRIORITY_COLUMNS for column in getattr(company_list, 'extra_columns', ()))
+
+
+def open_company_list(input_file=None, column=None, candidates=None, log_enable=True):
+    """
+    開啟公司名稱清單（逐筆讀取）。
+    :param input_file: 指定來源檔；None 時依 candidates 順序自動偵測。
+    :param column: 公司名稱欄位名稱（csv / tsv / xlsx / jsonl）。
+    :param candidates: 自動偵測的候選路徑，預設為 DEFAULT_CANDIDATES。
+    :return: CompanyList；找不到檔案、格式不支援或找不到欄位時為 None。
+    """
+    path = input_file
+    if input_file:
+        if os.path.splitext(input_file)[1].lower() not in INPUT_FORMATS:
+            log_print(f"[錯誤] 不支援的公司清單檔案格式: {input_file}", log_enable)
+            return None
+        if not os.path.exists(input_file):
+            log_print(f"[錯誤] 找不到公司清單檔案: {input_file}", log_enable)
+            return None
+        log_print(f"[INFO] 使用來源檔案: {input_file}", log_enable)
+    else:
+        path = next((path for path in candidates or DEFAULT_CANDIDATES
+                     if os.path.splitext(path)[1].lower() in INPUT_FORMATS and os.path.exists(path)), None)
+        if path is None:
+            log_print("[錯誤] 未找到公司名稱清單 company_list.txt 或 company_list.csv，請用 --input-file 指定！", log_enable)
+            return None
+        log_print(f"[INFO] 自動偵測到來源檔案: {path}", log_enable)
+    try:
+        company_list = CompanyList(path, column, log_enable)
+    except (OSError, ValueError) as e:
+        log_print(f"[錯誤] {e}", log_enable)
+        return None
+    if company_list.extra_columns:
+        log_print(f"[INFO] 輸入欄位將一併輸出: {', '.join(company_list.extra_columns)}", log_enable)
+    return company_list
+
+
+def read_company_list(input_file=None, candidates=None, log_enable=True, column=None):
+    """
+    讀取整份公司名稱清單（open_company_list 的列表版本，給需要總筆數的呼叫端）。
+    :return: 公司名稱列表，讀取失敗時為空列表。
+    """
+    company_list = open_company_list(input_file, column, candidates, log_enable)
+    try:
+        return list(company_list) if company_list is not None else []
+    except (OSError, ValueError) as e:
+        log_print(f"[錯誤] 讀取公司清單失敗: {e}", log_enable)
+        return []
+
+
+def save_results(data, output_dir, prefix, fieldnames, output_format='json',
+                 timestamp=None, json_indent=4, log_enable=True):
+    """
+    將結果存成 {output_dir}/{prefix}_{timestamp}.{json|csv}。
+    :param fieldnames: CSV 欄位順序；不在其中的欄位會被忽略。
+    :return: 寫入的檔名，失敗或無資料時為 None。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = os.path.join(output_dir, f"{prefix}_{timestamp}.{output_format}")
+
+    if output_format == 'json':
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=json_indent)
+        except Exception as e:
+            log_print(f"[ERROR] 儲存 JSON 檔案時發生錯誤 {filename}: {e}", log_enable)
+            return None
+    elif output_format == 'csv':
+        if not data:
+            log_print("[INFO] 沒有資料可儲存至 CSV。", log_enable)
+            return None
+        try:
+            with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(data)
+        except Exception as e:
+            log_print(f"[ERROR] 儲存 CSV 檔案時發生錯誤 {filename}: {e}", log_enable)
+            return None
+    elif output_format in ('parquet', 'arrow'):
+        if not data:
+            log_print(f"[INFO] 沒有資料可儲存至 {output_format}。", log_enable)
+            return None
+        try:
+            write_columnar(data, filename, fieldnames, output_format)
+        except ImportError:
+            log_print(f"[ERROR] 輸出 {output_format} 需要 pyarrow，請先執行 pip install pyarrow", log_enable)
+            return None
+        except Exception as e:
+            log_print(f"[ERROR] 儲存 {output_format} 檔案時發生錯誤 {filename}: {e}", log_enable)
+            return None
+    else:
+        log_print(f"[錯誤] 輸出格式無效: {output_format}，請選擇 'json'、'csv'、'parquet' 或 'arrow'。", log_enable)
+        return None
+
+    log_print(f"[SUCCESS] 資料已儲存至 {filename}", log_enable)
+    return filename
+
+
+def write_columnar(data, filename, fieldnames, output_format):
+    """以 pyarrow 寫出 Parquet 或 Arrow IPC (Feather v2)；欄位型別由值推斷（整數欄允許空值）。"""
+    import pyarrow as pa
+    columns = {name: [row.get(name) for row in data] for name in fieldnames}
+    table = pa.table(columns)
+    if output_format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, filename)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, filename)
@@ -0,0 +1,318 @@
+"""
+爬行模式的 URL frontier：記憶體用量固定，可處理數百萬個發現的網址。
+
+- 已見集合：BloomFilter（位元陣列，容量與誤判率決定大小，例如 500 萬筆 / 0.1% 約 9 MB），
+  不把每個網址放進 Python set；誤判時極少數新網址會被當成已見而略過。
+- 待抓網址：存在 SQLite（與 WorkQueue / ResultStore 相同的做法），依主機分佇列，
+  每個主機內依優先順序（預設為深度，廣度優先）與發現順序取出；派發時輪流取各主機，
+  實際抓取前再以 wait_for_host() 保證同一主機兩次抓取至少間隔 host_delay 秒。
+- 可中斷續跑：已見集合定期（與新增網址同一交易）及結束時存回同一個資料庫；完成的網址先標記為 DONE，
+  存檔後才刪除，因此當機後重新啟動時，以上次存檔後新增的資料列補回已見集合，不會重複加入或重抓；
+  處理中與失敗的網址放回佇列。
+
+UrlFrontier 提供 items()（給 Scheduler.run 的非同步來源）與 complete / fail / close（與 WorkQueue 相同介面）。
+"""
+import asyncio
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import struct
+import time
+from urllib.parse import urldefrag, urlsplit
+
+from .log import log_print
+
+DEFAULT_CAPACITY = 5_000_000
+DEFAULT_ERROR_RATE = 0.001
+IDLE_POLL_INTERVAL = 0.5  # 佇列暫時為空、仍有處理中網址時的等待秒數
+BLOOM_SAVE_INTERVAL = 60.0  # 已見集合至少每幾秒存檔一次（有新網址時）
+
+PENDING, LEASED, FAILED, DONE = 0, 1, 2, 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    host TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    priority REAL NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_next ON frontier (host, state, priority, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+"""
+
+
+class BloomFilter:
+    """
+    :param capacity: 預計加入的網址數；超過後誤判率逐漸上升。
+    :param error_rate: 達到 capacity 時的誤判率。
+    """
+
+    HEADER = struct.Struct('<QIQ')  # 位元數、雜湊數、已加入筆數
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # 一次 blake2b 取兩個 64 位元值，以 double hashing 組出 k 個位置
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def add(self, key):
+        """加入 key；原本不在集合中（新網址）時回傳 True。"""
+        added = False
+        for pos in self._positions(key):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def to_bytes(self):
+        return self.HEADER.pack(self.size, self.hashes, self.count) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data, capacity):
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count = cls.HEADER.unpack_from(data)
+        bloom.capacity = capacity
+        bloom.bits = bytearray(data[cls.HEADER.size:])
+        return bloom
+
+
+def normalize_url(url):
+    """去掉 #fragment、scheme 與主機轉小寫；非 http(s) 網址回傳 None。"""
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in ('http', 'https') or not parts.netloc:
+        return None
+    return parts._replace(scheme=parts.scheme.lower(), netloc=parts.netloc.lower()).geturl()
+
+
+class UrlFrontier:
+    """
+    :param db_path: frontier 資料庫（待抓網址與已見集合）。
+    :param follow: 要跟隨的網址 regex 列表；空列表時只跟隨種子網址所在主機的連結。
+    :param max_depth: 從種子起最多跟隨幾層連結；None 表示不限。
+    :param max_pages: 最多派發幾個網址；None 表示不限。
+    :param host_delay: 同一主機兩次抓取之間至少間隔幾秒。
+    :param capacity: BloomFilter 容量；error_rate 為其誤判率。
+    """
+
+    def __init__(self, db_path, follow=(), max_depth=None, max_pages=None, host_delay=1.0,
+                 capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE, log_enable=True):
+        self.db_path = db_path
+        self.follow = [re.compile(pattern) for pattern in follow]
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.host_delay = host_delay
+        self.log_enable = log_enable
+        self.stats = {'discovered': 0, 'duplicates': 0, 'dispatched': 0, 'done': 0, 'failed': 0}
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # 上次中斷時處理中與失敗的網址放回佇列（失敗的每次啟動重試一次）
+        self.conn.execute("UPDATE frontier SET state = ? WHERE state IN (?, ?)", (PENDING, LEASED, FAILED))
+        self.conn.commit()
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'bloom'").fetchone()
+        self.seen = BloomFilter.from_bytes(row[0], capacity) if row else BloomFilter(capacity, error_rate)
+        # 上次存檔後新增的網址（當機時尚未存入已見集合）補回，DONE 列在存檔前不刪除正是為此
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'bloom_max_id'").fetchone()
+        for (url,) in self.conn.execute("SELECT url FROM frontier WHERE id > ?", (int(row[0]) if row else 0,)):
+            self.seen.add(url)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'seed_hosts'").fetchone()
+        self.seed_hosts = set(row[0].split('\n')) if row and row[0] else set()
+        # 各主機待抓筆數與下次可派發時間（主機數遠少於網址數，放在記憶體）
+        self.pending = dict(self.conn.execute(
+            "SELECT host, COUNT(*) FROM frontier WHERE state = ? GROUP BY host", (PENDING,)))
+        self.next_allowed = {}  # 主機 -> 下次可派發時間（派發時輪流取各主機）
+        self.fetch_at = {}      # 主機 -> 下次可開始抓取的時間（wait_for_host 保證間隔）
+        self._saved_at = time.monotonic()
+        self._held = {}     # Scheduler 輸入序號 -> (資料列 id, 網址)
+        self._depths = {}   # 處理中網址 -> 深度
+        self._index = 0
+        self._warned_capacity = False
+        if self.pending:
+            log_print(f"[INFO] 接續上次的爬行：{sum(self.pending.values())} 個待抓網址，"
+                      f"已見 {self.seen.count} 個", log_enable)
+
+    # ===== 加入網址 =====
+    def add_seeds(self, urls):
+        urls = [url for url in (normalize_url(url) for url in urls) if url]
+        self.seed_hosts.update(urlsplit(url).netloc for url in urls)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('seed_hosts', ?)",
+                              ('\n'.join(sorted(self.seed_hosts)),))
+        return self._insert(urls, 0)
+
+    def add_links(self, links, depth):
+        """加入從深度 depth - 1 頁面發現的連結（符合跟隨規則者）；回傳新加入的筆數。"""
+        if self.max_depth is not None and depth > self.max_depth:
+            return 0
+        urls = []
+        for link in links:
+            url = normalize_url(link)
+            if url and self._should_follow(url):
+                urls.append(url)
+        return self._insert(urls, depth)
+
+    def _should_follow(self, url):
+        if self.follow:
+            return any(pattern.search(url) for pattern in self.follow)
+        return urlsplit(url).netloc in self.seed_hosts
+
+    def _insert(self, urls, depth):
+        rows = []
+        for url in urls:
+            if not self.seen.add(url):
+                self.stats['duplicates'] += 1
+                continue
+            host = urlsplit(url).netloc
+            rows.append((url, host, depth, depth))
+            self.pending[host] = self.pending.get(host, 0) + 1
+        if rows:
+            with self.conn:
+                self.conn.executemany("INSERT INTO frontier (url, host, depth, priority) VALUES (?, ?, ?, ?)", rows)
+                if time.monotonic() - self._saved_at >= BLOOM_SAVE_INTERVAL:
+                    self._save_seen()
+            self.stats['discovered'] += len(rows)
+        if not self._warned_capacity and self.seen.count > self.seen.capacity:
+            self._warned_capacity = True
+            log_print(f"[WARN] 已見網址超過 Bloom filter 容量 {self.seen.capacity}，誤判率將上升（可調大 --crawl-capacity）",
+                      self.log_enable)
+        return len(rows)
+
+    def _save_seen(self):
+        """在呼叫端的交易中存檔已見集合，並刪除已涵蓋的完成網址。"""
+        max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM frontier").fetchone()[0]
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bloom', ?)", (self.seen.to_bytes(),))
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bloom_max_id', ?)", (max_id,))
+        self.conn.execute("DELETE FROM frontier WHERE state = ? AND id <= ?", (DONE, max_id))
+        self._saved_at = time.monotonic()
+
+    def depth_of(self, url):
+        """處理中網址的深度（給轉接器決定連結的深度）。"""
+        return self._depths.get(url, 0)
+
+    async def wait_for_host(self, url):
+        """抓取開始前呼叫：預約該主機的下一個抓取時段，距上次抓取未滿 host_delay 秒時等待。"""
+        host = urlsplit(url).netloc
+        now = time.monotonic()
+        start = max(now, self.fetch_at.get(host, 0))
+        self.fetch_at[host] = start + self.host_delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    # ===== 派發 =====
+    def _next(self):
+        """取出下一個可派發的網址 (id, 網址, 深度)；沒有待抓網址時回傳 None，需等待時回傳等待秒數。"""
+        hosts = [host for host, count in self.pending.items() if count > 0]
+        if not hosts:
+            return None
+        host = min(hosts, key=lambda h: self.next_allowed.get(h, 0))
+        wait = self.next_allowed.get(host, 0) - time.monotonic()
+        if wait > 0:
+            return wait
+        row = self.conn.execute(
+            "SELECT id, url, depth FROM frontier WHERE host = ? AND state = ? ORDER BY priority, id LIMIT 1",
+            (host, PENDING)).fetchone()
+        if row is None:
+            del self.pending[host]
+            return 0
+        with self.conn:
+            self.conn.execute("UPDATE frontier SET state = ? WHERE id = ?", (LEASED, row[0]))
+        self.pending[host] -= 1
+        if not self.pending[host]:
+            del self.pending[host]
+        self.next_allowed[host] = time.monotonic() + self.host_delay
+        return row
+
+    async def items(self):
+        """給 Scheduler.run 的非同步網址來源：待抓網址取完且沒有處理中的網址時結束。"""
+        while self.max_pages is None or self.stats['dispatched'] < self.max_pages:
+            entry = self._next()
+            if entry is None:
+                if not self._held:
+                    return
+                await asyncio.sleep(IDLE_POLL_INTERVAL)  # 處理中的頁面可能再發現新連結
+                continue
+            if not isinstance(entry, tuple):
+                await asyncio.sleep(entry)
+                continue
+            row_id, url, depth = entry
+            self._index += 1
+            self._held[self._index] = (row_id, url)
+            self._depths[url] = depth
+            self.stats['dispatched'] += 1
+            yield url
+
+    # ===== 回報 =====
+    def complete(self, index, record):
+        held = self._held.pop(index, None)
+        if held is None:
+            return
+        self._depths.pop(held[1], None)
+        with self.conn:
+            self.conn.execute("UPDATE frontier SET state = ? WHERE id = ?", (DONE, held[0]))
+        self.stats['done'] += 1
+
+    def fail(self, index, error=None):
+        held = self._held.pop(index, None)
+        if held is None:
+            return
+        self._depths.pop(held[1], None)
+        with self.conn:
+            self.conn.execute("UPDATE frontier SET state = ? WHERE id = ?", (FAILED, held[0]))
+        self.stats['failed'] += 1
+
+    async def close(self):
+        # 未完成的網址留在 LEASED，下次啟動時放回佇列
+        with self.conn:
+            self._save_seen()
+        remaining = self.conn.execute("SELECT COUNT(*) FROM frontier WHERE state IN (?, ?)",
+                                      (PENDING, LEASED)).fetchone()[0]
+        self.conn.close()
+        s = self.stats
+        log_print(f"[INFO] 爬行結束：發現 {s['discovered']} 個新網址（重複略過 {s['duplicates']}），"
+                  f"完成 {s['done']}、失敗 {s['failed']}，尚待抓 {remaining} 個", self.log_enable)
+
+
+def add_crawl_arguments(parser):
+    """在 argparse parser 加上共用的爬行模式參數。"""
+    parser.add_argument('--crawl', nargs='+', default=None, metavar='URL',
+                        help='爬行模式：從種子網址出發，跟隨符合 --follow 的連結')
+    parser.add_argument('--follow', action='append', default=[], metavar='REGEX',
+                        help='要跟隨的連結 regex（可重複指定）；未指定時只跟隨種子網址所在主機的連結')
+    parser.add_argument('--max-depth', type=int, default=None, help='從種子起最多跟隨幾層連結')
+    parser.add_argument('--max-pages', type=int, default=None, help='最多抓取幾頁')
+    parser.add_argument('--host-delay', type=float, default=1.0, help='同一主機兩次抓取之間至少間隔幾秒')
+    parser.add_argument('--crawl-capacity', type=int, default=DEFAULT_CAPACITY,
+                        help='已見網址 Bloom filter 的容量（超過後誤判率上升）')
+    parser.add_argument('--crawl-db', type=str, default=None, help='frontier 資料庫路徑（可中斷後續跑）')
+
+
+def frontier_from_args(args, default_db, log_enable=True):
+    """--crawl 時建立 UrlFrontier 並加入種子網址，否則回傳 None。"""
+    if not args.crawl:
+        return None
+    frontier = UrlFrontier(args.crawl_db or default_db, args.follow, args.max_depth, args.max_pages,
+                           args.host_delay, args.crawl_capacity, log_enable=log_enable)
+    frontier.add_seeds(args.crawl)
+    return frontier
@@ -0,0 +1,123 @@
+"""
+搜尋結果收集模式：逐頁翻閱某關鍵字的搜尋結果，一次記錄每筆結果的摘要欄位與 ID，
+不逐筆進入詳情頁；需要時再以收集到的 ID 直接抓詳情頁（跳過搜尋）。
+
+轉接器需額外提供：
+  harvest_key                            -> 每筆結果的唯一鍵欄位名稱（用於去重）
+  harvest_fieldnames                     -> 收集結果的 CSV 欄位
+  async harvest_page(page, keyword, n)   -> 第 n 頁的結果 dict 列表（無結果時為空列表）
+  harvest_ref(hit)                       -> 交給 fetch_detail 的參照
+"""
+from .adapter import SiteAdapter
+from .log import log_print
+from .scheduler import Scheduler
+from .writer import ResultWriter
+
+HARVEST_COMMON_FIELDS = ["搜尋關鍵字", "頁碼"]
+
+
+async def harvest(adapter, page, keyword, max_pages=None, log_enable=True):
+    """
+    翻頁收集搜尋結果，直到某頁沒有新結果或達到 max_pages。
+    :return: 依出現順序排列、已去重的結果列表。
+    """
+    hits = []
+    seen = set()
+    page_no = 0
+    while max_pages is None or page_no < max_pages:
+        page_no += 1
+        try:
+            page_hits = await adapter.harvest_page(page, keyword, page_no)
+        except Exception as e:
+            log_print(f"[ERROR] 收集 '{keyword}' 第 {page_no} 頁失敗: {e}", log_enable, keyword=keyword)
+            break
+        new_hits = []
+        for hit in page_hits:
+            key = hit.get(adapter.harvest_key)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            hit.setdefault("搜尋關鍵字", keyword)
+            hit.setdefault("頁碼", page_no)
+            new_hits.append(hit)
+        hits.extend(new_hits)
+        log_print(f"[INFO] 收集 '{keyword}' 第 {page_no} 頁：新增 {len(new_hits)} 筆，累計 {len(hits)} 筆",
+                  log_enable, keyword=keyword)
+        if not new_hits:
+            break
+    return hits
+
+
+class HarvestDetailAdapter(SiteAdapter):
+    """
+    以收集結果為工作項目的轉接器：工作項目是 harvest_key 的值，
+    search 直接回傳 hit 內的參照，詳情欄位與收集到的摘要欄位合併輸出。
+    """
+
+    def __init__(self, adapter, hits):
+        self.adapter = adapter
+        self.hits = {hit[adapter.harvest_key]: hit for hit in hits}
+        self.name = adapter.name
+        self.output_dir = adapter.output_dir
+        self.output_prefix = adapter.output_prefix
+        self.fieldnames = adapter.harvest_fieldnames + [f for f in adapter.fieldnames
+                                                        if f not in adapter.harvest_fieldnames]
+        self.needs_browser = adapter.needs_browser
+        self.typed_fieldnames = adapter.typed_fieldnames
+        self.record_key = adapter.record_key
+        self.record_name = adapter.record_name
+        self.normalize = adapter.normalize
+        self.is_challenge = adapter.is_challenge
+        # 封存、--fields 與變更偵測的設定沿用原轉接器，詳情頁照樣封存、比對規則一致
+        self.archive = adapter.archive
+        self.fields = adapter.fields
+        self.identity_fields = adapter.identity_fields
+        self.change_fields = adapter.change_fields
+        self.hash_exclude_fields = adapter.hash_exclude_fields
+
+    def progress_message(self, item, total):
+        hit = self.hits[item.name]
+        return f"[INFO] 詳情 {item.index}/{total if total is not None else '?'}：{hit.get('公司名稱', item.name)}"
+
+    async def search(self, page, key):
+        return self.adapter.harvest_ref(self.hits[key])
+
+    async def fetch_detail(self, page, ref):
+        return await self.adapter.fetch_detail(page, ref)
+
+    async def extract(self, page, ref, key, detail=None):
+        hit = self.hits[key]
+        record = await self.adapter.extract(page, ref, hit.get("公司名稱", key), detail)
+        return {**hit, **record} if record else None
+
+
+async def run_harvest_mode(adapter, pool, keyword, max_pages=None, with_details=False, concurrency=1,
+                           cache=None, log_enable=True, store=None, **writer_options):
+    """
+    收集模式主流程：翻頁收集並寫出 {prefix}_harvest_*；with_details 時再以收集到的 ID
+    併發抓詳情頁，寫出 {prefix}_harvest_detail_*。
+    :param store: ResultStore，詳情結果同時 upsert 至結果庫。
+    :param writer_options: 傳給 ResultWriter 的參數（formats、json_indent）。
+    :return: 收集到的結果列表。
+    """
+    page = await pool.page_for(0) if pool else None
+    hits = await harvest(adapter, page, keyword, max_pages, log_enable)
+    if not hits:
+        log_print(f"[INFO] '{keyword}' 沒有收集到任何結果。", log_enable)
+        return hits
+    writer = ResultWriter(adapter.output_dir, f"{adapter.output_prefix}_harvest", adapter.harvest_fieldnames,
+                          log_enable=log_enable, **writer_options)
+    for hit in hits:
+        writer.add(hit)
+    writer.save()
+
+    if with_details:
+        detail_adapter = HarvestDetailAdapter(adapter, hits)
+        detail_writer = ResultWriter(adapter.output_dir, f"{adapter.output_prefix}_harvest_detail",
+                                     detail_adapter.fieldnames, log_enable=log_enable, **writer_options)
+        scheduler = Scheduler(detail_adapter, concurrency=concurrency, pool=pool, cache=cache,
+                              writer=detail_writer, store=store, log_enable=log_enable)
+        await scheduler.run(list(detail_adapter.hits))
+        if detail_writer.records:
+            detail_writer.save()
+    return hits
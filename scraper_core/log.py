@@ -0,0 +1,188 @@
+"""
+共用 log：同時輸出到 CMD 與（可選）本地 log 檔。
+
+寫檔由背景執行緒負責：log_print 只把訊息放進佇列立即返回，
+背景執行緒累積一批後一次寫入並 flush，檔案全程保持開啟，
+不再於每一行 open/close，也不會佔用 event loop。
+支援依檔案大小或時間輪替，以及 JSON Lines 結構化格式。
+"""
+import atexit
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+_STOP = object()
+_LEVEL_RE = re.compile(r'^\s*\[([^\]]+)\]')
+
+ROTATE_INTERVALS = {
+    'hourly': 3600,
+    'daily': 86400,
+}
+
+
+class LogWriter:
+    """
+    背景批次寫入 log 檔。
+    :param path: log 檔路徑。
+    :param flush_interval: 最長多久寫入一次（秒）。
+    :param batch_size: 累積多少行就立即寫入。
+    :param max_bytes: 檔案超過此大小就輪替；0 表示不依大小輪替。
+    :param backup_count: 保留的舊檔數（path.1 ~ path.N）。
+    :param rotate_when: 'hourly' / 'daily' 或秒數；None 表示不依時間輪替。
+    :param json_format: True 時每行輸出一筆 JSON（ts / level / msg 及額外欄位）。
+    """
+
+    def __init__(self, path, flush_interval=1.0, batch_size=200, max_bytes=10 * 1024 * 1024,
+                 backup_count=5, rotate_when=None, json_format=False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_seconds = ROTATE_INTERVALS.get(rotate_when, rotate_when) if rotate_when else None
+        self.json_format = json_format
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._period_start = time.time()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+
+    def write(self, msg, **fields):
+        """非阻塞：只把訊息放入佇列。"""
+        if self.json_format:
+            match = _LEVEL_RE.match(msg)
+            entry = {
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'level': match.group(1) if match else 'INFO',
+                'msg': msg.strip(),
+            }
+            entry.update(fields)
+            line = json.dumps(entry, ensure_ascii=False, default=str)
+        else:
+            line = msg
+        self._queue.put(line + '\n')
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout=5)
+
+    # ===== 背景執行緒 =====
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                if self._file:
+                    self._file.close()
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        data = ''.join(batch)
+        try:
+            self._maybe_rotate(len(data.encode('utf-8')))
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(data)
+            self._file.flush()
+        except Exception as e:
+            print(f"[ERROR] 寫入 log 檔失敗: {e}")
+
+    def _maybe_rotate(self, incoming):
+        due_by_time = self.rotate_seconds and time.time() - self._period_start >= self.rotate_seconds
+        due_by_size = False
+        if self.max_bytes and os.path.exists(self.path):
+            due_by_size = os.path.getsize(self.path) + incoming > self.max_bytes
+        if not (due_by_time or due_by_size):
+            return
+        if self._file:
+            self._file.close()
+            self._file = None
+        self._period_start = time.time()
+        if not os.path.exists(self.path):
+            return
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+_writer = None
+
+
+def setup_log(path, **options):
+    """
+    啟用 log 檔（取代先前的設定）；options 見 LogWriter。
+    傳入 path=None 表示只顯示於 CMD。
+    """
+    global _writer
+    close_log()
+    _writer = LogWriter(path, **options) if path else None
+    return _writer
+
+
+def set_log_file(path):
+    """以預設參數設定 log 檔路徑；傳入 None 表示只顯示於 CMD。"""
+    return setup_log(path)
+
+
+def close_log():
+    """寫出佇列中剩餘訊息並關閉檔案；程式結束時會自動呼叫。"""
+    global _writer
+    if _writer:
+        _writer.close()
+        _writer = None
+
+
+def log_print(msg, log_enable=True, **fields):
+    """
+    :param log_enable: 是否顯示於 CMD；log 檔一律寫入。
+    :param fields: JSON 格式時附加的結構化欄位，例如 company="台積電"。
+    """
+    if log_enable:
+        print(msg)
+    if _writer:
+        _writer.write(msg, **fields)
+
+
+def add_log_arguments(parser, default_path=None):
+    """在 argparse parser 加上共用的 log 參數。"""
+    parser.add_argument('--log-file', type=str, default=default_path, help='log 檔路徑（未指定則只顯示於 CMD）')
+    parser.add_argument('--log-json', action='store_true', help='log 檔改為 JSON Lines 結構化格式')
+    parser.add_argument('--log-max-mb', type=float, default=10, help='log 檔超過此大小 (MB) 即輪替，0 表示不輪替')
+    parser.add_argument('--log-rotate', choices=sorted(ROTATE_INTERVALS), default=None, help='依時間輪替 log 檔')
+
+
+def setup_log_from_args(args):
+    return setup_log(
+        args.log_file,
+        json_format=args.log_json,
+        max_bytes=int(args.log_max_mb * 1024 * 1024),
+        rotate_when=args.log_rotate,
+    )
+
+
+atexit.register(close_log)
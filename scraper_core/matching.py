@@ -0,0 +1,52 @@
+"""
+公司名稱比對：正規化名稱並為搜尋結果候選打分，挑出最可能的目標公司。
+"""
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+ACTIVE_STATUS = "核准設立"
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_company_name(name):
+    """去除空白、全形轉半形、臺→台，用於名稱比對（不改變輸出內容）。"""
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKC", name)
+    name = _SPACE_RE.sub("", name)
+    return name.replace("臺", "台")
+
+
+def name_similarity(a, b):
+    return SequenceMatcher(None, normalize_company_name(a), normalize_company_name(b)).ratio()
+
+
+def score_candidate(query, name, status=None):
+    """
+    為單一候選打分。
+    排序依序為：名稱完全相符 > 登記現況為核准設立 > 名稱相似度。
+    :return: (排序鍵, 匹配信心 0~1)
+    """
+    exact = normalize_company_name(query) == normalize_company_name(name)
+    active = bool(status) and ACTIVE_STATUS in status
+    similarity = 1.0 if exact else name_similarity(query, name)
+    confidence = round(0.6 * similarity + 0.3 * exact + 0.1 * active, 2)
+    return (exact, active, similarity), confidence
+
+
+def pick_best_candidate(query, candidates, name_key="name", status_key="status"):
+    """
+    從候選 dict 列表挑出分數最高者，並寫入 candidate['confidence']。
+    同分時保留搜尋結果中較前面的一筆。
+    :return: 最佳候選 dict，無候選時為 None。
+    """
+    best = None
+    best_key = None
+    for candidate in candidates:
+        key, confidence = score_candidate(query, candidate.get(name_key, ""), candidate.get(status_key))
+        candidate["confidence"] = confidence
+        if best is None or key > best_key:
+            best, best_key = candidate, key
+    return best
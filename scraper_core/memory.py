@@ -0,0 +1,185 @@
+"""
+瀏覽器記憶體取樣：定期統計瀏覽器池自己的 playwright driver 行程樹（含 Chromium 各行程）的 RSS，
+記錄峰值，超過門檻時通知瀏覽器池回收 context。同一程式有多個瀏覽器池（combinebat）時各自只計算自己的瀏覽器；
+無法辨識 driver 行程時改計算本程式所有子行程（門檻即為全程式的瀏覽器總量）。
+取樣（讀取 /proc 或 psutil）在執行緒中進行，不佔用 event loop。
+
+優先使用 psutil（選用套件，Windows 也可用）；未安裝時在 Linux 改讀 /proc，其餘平台停用取樣。
+"""
+import asyncio
+import os
+
+from .log import log_print
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _proc_children_map():
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 第 2 欄 (comm) 可能含空白，從最後一個 ')' 之後取 state、ppid
+        ppid = int(stat[stat.rindex(b')') + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid):
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def can_sample():
+    try:
+        import psutil  # noqa: F401
+        return True
+    except ImportError:
+        return os.path.isdir('/proc')
+
+
+def child_pids(pid=None):
+    """直接子行程的 pid 集合；無法取樣時為 None。"""
+    pid = pid or os.getpid()
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return {child.pid for child in psutil.Process(pid).children()}
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    return set(_proc_children_map().get(pid, []))
+
+
+def process_rss(pid=None):
+    """單一行程的 RSS（bytes）；無法取樣時為 0。"""
+    pid = pid or os.getpid()
+    try:
+        import psutil
+    except ImportError:
+        return _proc_rss(pid)
+    try:
+        return psutil.Process(pid).memory_info().rss
+    except psutil.Error:
+        return 0
+
+
+def process_tree_rss(pid=None):
+    """
+    :return: (本行程 RSS, 子行程 RSS 總和)，單位 bytes；無法取樣時為 None。
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            proc = psutil.Process(pid)
+            children = 0
+            for child in proc.children(recursive=True):
+                try:
+                    children += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return proc.memory_info().rss, children
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    tree = _proc_children_map()
+    total = 0
+    stack = list(tree.get(pid, []))
+    while stack:
+        child = stack.pop()
+        total += _proc_rss(child)
+        stack.extend(tree.get(child, []))
+    return _proc_rss(pid), total
+
+
+class MemoryMonitor:
+    """
+    背景 task 定期取樣行程樹 RSS。
+    :param limit_mb: 瀏覽器 RSS 超過此值時呼叫 on_limit；0 表示只取樣不回收。
+    :param interval: 取樣間隔（秒）。
+    :param on_limit: 超過門檻時呼叫的函數（無參數）。
+    :param root_pid: 瀏覽器池的 playwright driver pid，只計算此行程樹；None 時計算本程式所有子行程。
+    """
+
+    def __init__(self, limit_mb=0, interval=10.0, on_limit=None, log_enable=True, root_pid=None):
+        self.limit_bytes = int(limit_mb * 1024 * 1024)
+        self.interval = interval
+        self.on_limit = on_limit
+        self.log_enable = log_enable
+        self.samples = 0
+        self.peak_browser = 0
+        self.peak_self = 0
+        self.limit_hits = 0
+        self.root_pid = root_pid
+        self._task = None
+
+    def start(self):
+        if not can_sample():
+            log_print("[警告] 此平台無法取樣記憶體（可安裝 psutil），停用記憶體監控", self.log_enable)
+            return self
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def measure(self):
+        """:return: (本程式 RSS, 瀏覽器 RSS)；無法取樣（例如 driver 已結束）時為 None。"""
+        if self.root_pid is None:
+            return process_tree_rss()
+        usage = process_tree_rss(self.root_pid)
+        if usage is None or not usage[0]:
+            return None
+        return process_rss(), usage[0] + usage[1]
+
+    def sample(self, usage=None):
+        usage = self.measure() if usage is None else usage
+        if usage is None:
+            return None
+        own, browser = usage
+        self.samples += 1
+        self.peak_self = max(self.peak_self, own)
+        self.peak_browser = max(self.peak_browser, browser)
+        if self.limit_bytes and browser > self.limit_bytes:
+            self.limit_hits += 1
+            log_print(f"[MEMORY] 瀏覽器 RSS {browser / 1048576:.0f} MB 超過門檻 "
+                      f"{self.limit_bytes / 1048576:.0f} MB，回收 context", self.log_enable)
+            if self.on_limit:
+                self.on_limit()
+        return usage
+
+    async def _run(self):
+        while True:
+            # 讀取 /proc 的全部行程在執行緒進行；門檻判斷與 on_limit 回到 event loop 執行
+            self.sample(await asyncio.to_thread(self.measure))
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.sample(await asyncio.to_thread(self.measure))
+
+    def summary(self):
+        if not self.samples:
+            return None
+        return (f"[INFO] 記憶體峰值：瀏覽器 {self.peak_browser / 1048576:.0f} MB、"
+                f"主程式 {self.peak_self / 1048576:.0f} MB（取樣 {self.samples} 次，超過門檻 {self.limit_hits} 次）")
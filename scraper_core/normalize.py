@@ -0,0 +1,153 @@
+"""
+欄位正規化：把頁面原始文字轉成型別化欄位（整數金額、整數人數、乾淨統編、狀態代碼、拆分地址），
+下游分析可直接載入，不需再各自解析字串。
+"""
+import re
+from enum import Enum
+
+MISSING_VALUES = {"", "查無資料", "暫不提供", "N/A"}
+
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_AMOUNT_PART_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*(億|萬|千)?")
+_UNITS = {"億": 100_000_000, "萬": 10_000, "千": 1_000, None: 1}
+_BAN_RE = re.compile(r"(?<!\d)(\d{8})(?!\d)")
+_ADDRESS_NOISE_RE = re.compile(r"地址所屬公司家數\s*[:：]\s*\d+|電子地圖|Google搜尋")
+# 22 個直轄市、縣市（臺/台 兩種寫法皆可）
+TW_CITIES = [
+    "臺北市", "新北市", "桃園市", "臺中市", "臺南市", "高雄市", "基隆市", "新竹市", "嘉義市",
+    "新竹縣", "苗栗縣", "彰化縣", "南投縣", "雲林縣", "嘉義縣", "屏東縣", "宜蘭縣", "花蓮縣",
+    "臺東縣", "澎湖縣", "金門縣", "連江縣",
+]
+_CITY_RE = re.compile("|".join(sorted({c for city in TW_CITIES for c in (city, city.replace("臺", "台"))})))
+# 鄉鎮市區依字尾 區 > 鄉 > 鎮 > 市 的順序比對：名稱本身可能含「鎮」「市」（前鎮區、平鎮區、新市區），
+# 不能停在第一個出現的字尾；「區」不會出現在其他層級的名稱內，先比對可避免截斷
+_DISTRICT_RES = [re.compile(rf"^(\S{{1,3}}?{suffix})") for suffix in "區鄉鎮市"]
+_SPACE_RE = re.compile(r"\s+")
+
+
+class CompanyStatus(str, Enum):
+    ACTIVE = "ACTIVE"                # 核准設立
+    SUSPENDED = "SUSPENDED"          # 停業
+    REORGANIZING = "REORGANIZING"    # 重整
+    DISSOLVED = "DISSOLVED"          # 解散、撤銷、廢止、歇業、破產
+    UNKNOWN = "UNKNOWN"
+
+
+# 依序比對，先比對到者優先（「合併解散」須歸為解散而非核准）
+_STATUS_KEYWORDS = [
+    ("解散", CompanyStatus.DISSOLVED),
+    ("撤銷", CompanyStatus.DISSOLVED),
+    ("廢止", CompanyStatus.DISSOLVED),
+    ("歇業", CompanyStatus.DISSOLVED),
+    ("破產", CompanyStatus.DISSOLVED),
+    ("停業", CompanyStatus.SUSPENDED),
+    ("重整", CompanyStatus.REORGANIZING),
+    ("核准設立", CompanyStatus.ACTIVE),
+]
+
+
+def is_missing(text):
+    return text is None or (isinstance(text, str) and (text.strip() in MISSING_VALUES or text.startswith("N/A_")))
+
+
+def clean_text(text):
+    """合併連續空白並去除頭尾；缺值回傳 None。"""
+    if is_missing(text):
+        return None
+    return _SPACE_RE.sub(" ", str(text)).strip() or None
+
+
+def parse_amount(text):
+    """
+    金額轉整數（元）。
+    支援 "600,000,000,000"、"1億2,000萬"、"新台幣 500 萬元"；無法解析時回傳 None。
+    """
+    if is_missing(text):
+        return None
+    text = str(text).replace("，", ",")
+    if not any(unit in text for unit in ("億", "萬", "千")):
+        match = _NUMBER_RE.search(text)
+        return int(float(match.group().replace(",", ""))) if match else None
+    total = 0
+    found = False
+    for number, unit in _AMOUNT_PART_RE.findall(text):
+        total += float(number.replace(",", "")) * _UNITS[unit or None]
+        found = True
+    return int(round(total)) if found else None
+
+
+def parse_headcount(text):
+    """員工人數轉整數，例如 "1,234人"、"約 500 人"；範圍取下限；無法解析時回傳 None。"""
+    if is_missing(text):
+        return None
+    match = _NUMBER_RE.search(str(text))
+    return int(float(match.group().replace(",", ""))) if match else None
+
+
+def clean_ban(text):
+    """取出 8 碼統一編號，例如 "03795904   訂閱" -> "03795904"。"""
+    if is_missing(text):
+        return None
+    match = _BAN_RE.search(str(text))
+    return match.group(1) if match else None
+
+
+def parse_status(text):
+    """
+    :return: (狀態代碼, 乾淨的狀態文字)；例如
+             "核准設立  「查詢最新營業狀況請至 財政部稅務入口網 」" -> (ACTIVE, "核准設立")
+    """
+    if is_missing(text):
+        return CompanyStatus.UNKNOWN.value, None
+    head = re.split(r"[\s「(（]", str(text).strip(), maxsplit=1)[0]
+    for keyword, status in _STATUS_KEYWORDS:
+        if keyword in head:
+            return status.value, head
+    return CompanyStatus.UNKNOWN.value, head or None
+
+
+def split_address(text):
+    """
+    去除「地址所屬公司家數」「電子地圖」等雜訊並拆出縣市、鄉鎮市區。
+    :return: {"地址", "縣市", "鄉鎮市區", "路段門牌"}，缺值時各欄為 None。
+
+    >>> split_address("高雄市前鎮區成功二路88號")["鄉鎮市區"]
+    '前鎮區'
+    >>> split_address("桃園市平鎮區環南路100號")["鄉鎮市區"]
+    '平鎮區'
+    >>> split_address("臺南市新市區中華路1號")["路段門牌"]
+    '中華路1號'
+    >>> split_address("臺北市中正區市府路1號")["鄉鎮市區"]
+    '中正區'
+    >>> split_address("彰化縣員林市中山路1號")["鄉鎮市區"]
+    '員林市'
+    """
+    address = None if is_missing(text) else _SPACE_RE.sub("", _ADDRESS_NOISE_RE.sub("", str(text)))
+    result = {"地址": address or None, "縣市": None, "鄉鎮市區": None, "路段門牌": None}
+    if not address:
+        return result
+    rest = address
+    # 縣市通常在開頭，但也有「新竹科學園區新竹市…」這類前綴，取第一個出現的縣市
+    city = _CITY_RE.search(rest)
+    if city:
+        result["縣市"] = city.group(0)
+        rest = rest[city.end():]
+        district = next((m for m in (pattern.match(rest) for pattern in _DISTRICT_RES) if m), None)
+        if district:
+            result["鄉鎮市區"] = district.group(1)
+            rest = rest[district.end():]
+    result["路段門牌"] = rest or None
+    return result
+
+
+def clean_company_name(text):
+    """
+    商工登記頁的公司名稱欄會夾帶「Google搜尋」與出進口廠商英文名稱。
+    :return: (中文名稱, 英文名稱或 None)
+    """
+    if is_missing(text):
+        return None, None
+    text = str(text)
+    english = re.search(r"出進口廠商英文名稱[:：]\s*([^)）]+)", text)
+    name = re.split(r"\s{2,}|Google搜尋|「", text.strip(), maxsplit=1)[0].strip()
+    return name or None, english.group(1).strip() if english else None
@@ -0,0 +1,252 @@
+"""
+效能剖析（`--profile`）：找出批次執行時間花在哪裡。
+
+- 取樣：背景執行緒每 interval 秒讀取一次主執行緒（事件迴圈）的呼叫堆疊，不需安裝其他套件。
+  事件迴圈正在執行 Python 時記為 CPU（堆疊含 Playwright 通訊層時另計為 IPC 處理）；
+  閒置等待時記為等待，依當下是否有尚未完成的網路請求分成「網路等待」與「瀏覽器/IPC 等待」，
+  並展開各 worker 正在 await 的呼叫鏈，看得出在等哪一個 selector、哪一次導航。
+- 輸出 profile_*.folded（collapsed stacks，可用 https://www.speedscope.app 或 flamegraph.pl 產生火焰圖），
+  結束時於 log 列出時間分布與耗時最多的函式。
+- `--profile-traces N`：每 N 家公司錄一份 Playwright trace（traces/*.zip，以 `playwright show-trace` 檢視）。
+"""
+import asyncio
+import contextlib
+import os
+import sys
+import sysconfig
+import threading
+import time
+import weakref
+from collections import Counter
+from datetime import datetime
+
+from .log import log_print
+
+DEFAULT_INTERVAL_MS = 10
+TOP_FUNCTIONS = 10
+# 事件迴圈閒置（等待 I/O）時最上層的模組
+IDLE_MODULES = ('selectors.py', 'windows_events.py')
+PLAYWRIGHT_MARKER = f"{os.sep}playwright{os.sep}"
+# 標準函式庫與第三方套件的路徑：「耗時最多的函式」只列出專案本身的程式碼
+LIBRARY_PATHS = tuple({os.path.normcase(path) for key, path in sysconfig.get_paths().items()
+                       if key in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+# 屬於排程中項目的 task：呼叫鏈含有這些 Scheduler 函式
+ITEM_FRAMES = ('_process', '_resume_parked')
+
+CATEGORY_LABELS = {
+    'cpu': 'Python CPU',
+    'ipc_cpu': 'Playwright 通訊處理（CPU）',
+    'browser_wait': '瀏覽器/IPC 等待',
+    'network_wait': '網路等待',
+}
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame):
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _await_chain(task):
+    """task 目前 await 中的 coroutine 呼叫鏈（外層在前）。"""
+    chain = []
+    obj = task.get_coro()
+    while obj is not None:
+        frame = getattr(obj, 'cr_frame', None) or getattr(obj, 'ag_frame', None) or getattr(obj, 'gi_frame', None)
+        if frame is not None:
+            chain.append(frame.f_code)
+        obj = getattr(obj, 'cr_await', None) or getattr(obj, 'ag_await', None) or getattr(obj, 'gi_yieldfrom', None)
+    return chain
+
+
+def _is_library(code):
+    filename = code.co_filename
+    return filename.startswith('<') or os.path.normcase(filename).startswith(LIBRARY_PATHS)
+
+
+class SamplingProfiler:
+    """
+    :param output_dir: 輸出資料夾（profile_*.folded 與 traces/）。
+    :param interval_ms: 取樣間隔（毫秒）。
+    :param trace_every: 每幾家公司錄一份 Playwright trace；0 表示不錄。
+    """
+
+    def __init__(self, output_dir, interval_ms=DEFAULT_INTERVAL_MS, trace_every=0, log_enable=True):
+        self.output_dir = output_dir
+        self.interval = interval_ms / 1000
+        self.trace_every = trace_every
+        self.log_enable = log_enable
+        self.stacks = Counter()      # "分類;frame;frame..." -> 樣本數
+        self.categories = Counter()  # 分類 -> 樣本數（以事件迴圈的時間計）
+        self.self_cpu = Counter()    # 函式 -> CPU 樣本數（最上層的非函式庫 frame）
+        self.waiting = Counter()     # 函式 -> 等待樣本數（各 worker 呼叫鏈中最內層的非函式庫 frame）
+        self.samples = 0
+        self.traces = []
+        self._inflight = 0           # 尚未完成的網路請求數（事件迴圈執行緒更新）
+        self._watched = weakref.WeakSet()
+        self._tracing = weakref.WeakSet()
+        self._loop = None
+        self._thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._started_at = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='scraper-profiler', daemon=True)
+        self._thread.start()
+        log_print(f"[INFO] 效能剖析已啟動（每 {self.interval * 1000:.0f} ms 取樣）", self.log_enable)
+        return self
+
+    async def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        path = await asyncio.to_thread(self._write)
+        for line in self.report_lines():
+            log_print(line, self.log_enable)
+        log_print(f"[SUCCESS] 火焰圖資料已儲存至 {path}（可用 https://www.speedscope.app 開啟）", self.log_enable)
+        if self.traces:
+            log_print(f"[INFO] 已錄製 {len(self.traces)} 份 Playwright trace 於 {os.path.join(self.output_dir, 'traces')}"
+                      f"（playwright show-trace <檔案> 檢視）", self.log_enable)
+
+    # ===== 取樣 =====
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample()
+            except Exception:
+                pass  # 事件迴圈同時修改 task 集合等競態：略過該次取樣
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+        stack = _thread_stack(frame)
+        self.samples += 1
+        if stack and os.path.basename(stack[-1].co_filename) in IDLE_MODULES:
+            category = 'network_wait' if self._inflight > 0 else 'browser_wait'
+            self.categories[category] += 1
+            for task in asyncio.all_tasks(self._loop):
+                chain = _await_chain(task)
+                if not any(code.co_name in ITEM_FRAMES for code in chain):
+                    continue
+                self.stacks[';'.join([category] + [_label(code) for code in chain])] += 1
+                own = [code for code in chain if not _is_library(code)]
+                if own:
+                    self.waiting[_label(own[-1])] += 1
+            return
+        category = 'ipc_cpu' if any(PLAYWRIGHT_MARKER in code.co_filename for code in stack[-3:]) else 'cpu'
+        self.categories[category] += 1
+        self.stacks[';'.join([category] + [_label(code) for code in stack])] += 1
+        own = [code for code in stack if not _is_library(code)]
+        if own:
+            self.self_cpu[_label(own[-1])] += 1
+
+    # ===== 網路請求與 trace =====
+    def watch(self, page):
+        """記錄 page 的網路請求數，用來區分網路等待與瀏覽器/IPC 等待；同一 page 只掛一次。"""
+        if page is None or page in self._watched:
+            return
+        self._watched.add(page)
+        pending = set()
+
+        def started(request):
+            pending.add(request)
+            self._inflight += 1
+
+        def finished(request):
+            if request in pending:
+                pending.discard(request)
+                self._inflight -= 1
+
+        def closed(_):
+            self._inflight -= len(pending)
+            pending.clear()
+
+        page.on('request', started)
+        page.on('requestfinished', finished)
+        page.on('requestfailed', finished)
+        page.on('close', closed)
+
+    @contextlib.asynccontextmanager
+    async def trace(self, page, item):
+        """處理一家公司期間：掛上網路請求計數；抽中時錄製 Playwright trace。"""
+        self.watch(page)
+        if page is None or not self.trace_every or item.index % self.trace_every:
+            yield
+            return
+        tracing = page.context.tracing
+        try:
+            if page.context in self._tracing:
+                await tracing.start_chunk(title=item.name)
+            else:
+                await tracing.start(screenshots=True, snapshots=True, title=item.name)
+                self._tracing.add(page.context)
+        except Exception as e:
+            log_print(f"  [剖析] {item.name} 無法開始 trace: {e}", self.log_enable)
+            yield
+            return
+        try:
+            yield
+        finally:
+            safe_name = ''.join(c if c.isalnum() else '_' for c in item.name)[:40]
+            path = os.path.join(self.output_dir, 'traces', f"{item.index:05d}_{safe_name}.zip")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                await tracing.stop_chunk(path=path)
+                self.traces.append(path)
+            except Exception as e:
+                log_print(f"  [剖析] {item.name} trace 儲存失敗: {e}", self.log_enable)
+
+    # ===== 輸出 =====
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def report_lines(self):
+        total = sum(self.categories.values())
+        if not total:
+            return ["[剖析] 沒有取樣資料"]
+        elapsed = time.monotonic() - self._started_at
+        parts = [f"{CATEGORY_LABELS[key]} {self.categories[key] / total:.1%}" for key in CATEGORY_LABELS]
+        lines = [f"[剖析] {total} 個樣本（{elapsed:.0f} 秒）｜" + "、".join(parts)]
+        if self.self_cpu:
+            lines.append("[剖析] CPU 耗時最多的函式:")
+            lines += [f"  {count / total:6.1%}  {name}" for name, count in self.self_cpu.most_common(TOP_FUNCTIONS)]
+        if self.waiting:
+            waited = sum(self.waiting.values())
+            lines.append("[剖析] 各 worker 等待最久的位置:")
+            lines += [f"  {count / waited:6.1%}  {name}" for name, count in self.waiting.most_common(TOP_FUNCTIONS)]
+        return lines
+
+
+def add_profile_arguments(parser):
+    """在 argparse parser 加上共用的效能剖析參數。"""
+    parser.add_argument('--profile', action='store_true',
+                        help='效能剖析：取樣呼叫堆疊，輸出火焰圖資料與 CPU/IPC/網路等待的時間分布')
+    parser.add_argument('--profile-interval', type=float, default=DEFAULT_INTERVAL_MS, help='剖析取樣間隔（毫秒）')
+    parser.add_argument('--profile-traces', type=int, default=0, metavar='N',
+                        help='剖析時每 N 家公司錄一份 Playwright trace，0 表示不錄')
+
+
+def profiler_from_args(args, output_dir, log_enable=True):
+    """--profile 時建立 SamplingProfiler（須在事件迴圈內呼叫 start()），否則回傳 None。"""
+    if not args.profile:
+        return None
+    return SamplingProfiler(output_dir, args.profile_interval, args.profile_traces, log_enable)
@@ -0,0 +1,177 @@
+"""
+即時進度面板：長時間批次執行時定期顯示完成/失敗/重試數、每分鐘處理家數、滾動 ETA、
+各 worker 目前處理的公司與錯誤類別統計。
+
+資料直接讀取 Scheduler 的計數器，每處理一筆不額外寫檔或輸出；
+背景 task 每秒彙整一次快照，終端機每 interval 秒輸出一次，
+另可開啟本機 HTTP 狀態頁（`--status-port`，僅綁定 127.0.0.1，/status.json 提供 JSON）。
+"""
+import asyncio
+import html
+import json
+import threading
+import time
+from collections import deque
+
+from .log import log_print
+
+SNAPSHOT_INTERVAL = 1.0  # 快照更新間隔（秒）
+ROLLING_WINDOW = 300.0   # 計算處理速度的滾動視窗（秒）
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressMonitor:
+    """
+    :param interval: 終端機輸出間隔（秒）；0 表示不輸出（仍可使用 HTTP 狀態頁）。
+    :param port: 本機 HTTP 狀態頁埠號；0 表示不開啟。
+    """
+
+    def __init__(self, interval=30.0, port=0, log_enable=True):
+        self.interval = interval
+        self.port = port
+        self.log_enable = log_enable
+        self.snapshot = {}
+        self._scheduler = None
+        self._samples = deque()  # (時間, 已處理筆數)
+        self._started_at = None
+        self._task = None
+        self._server = None
+
+    def start(self, scheduler):
+        self._scheduler = scheduler
+        self._started_at = time.monotonic()
+        self._samples.clear()
+        self._update()
+        self._task = asyncio.create_task(self._run())
+        if self.port and self._server is None:
+            self._start_server()
+        return self
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._scheduler:
+            self._update()
+            if self.interval:
+                self._print()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    async def _run(self):
+        last_print = time.monotonic()
+        while True:
+            await asyncio.sleep(SNAPSHOT_INTERVAL)
+            self._update()
+            if self.interval and time.monotonic() - last_print >= self.interval:
+                last_print = time.monotonic()
+                self._print()
+
+    # ===== 快照 =====
+    def _update(self):
+        scheduler = self._scheduler
+        now = time.monotonic()
+        stats = dict(scheduler.stats)
+        processed = stats['done'] + stats['failed']
+        self._samples.append((now, processed))
+        while len(self._samples) > 2 and now - self._samples[0][0] > ROLLING_WINDOW:
+            self._samples.popleft()
+        first_time, first_processed = self._samples[0]
+        rate = (processed - first_processed) / (now - first_time) * 60 if now - first_time >= 1 else None
+        total = scheduler.total
+        remaining = total - processed if total is not None else None
+        eta = remaining / rate * 60 if rate and remaining is not None else None
+        workers = {}
+        for worker_id, state in sorted(scheduler.worker_state.items()):
+            workers[worker_id] = {'company': state[0], 'seconds': round(now - state[1], 1)} if state else None
+        self.snapshot = {
+            'elapsed': round(now - self._started_at, 1),
+            'total': total,
+            'processed': processed,
+            **stats,
+            'retrying': scheduler.retrying,
+            'parked_now': scheduler.parked_now,
+            'rate_per_min': round(rate, 2) if rate is not None else None,
+            'eta_seconds': round(eta) if eta is not None else None,
+            'workers': workers,
+            'errors': dict(scheduler.errors.most_common()),
+        }
+
+    def lines(self):
+        s = self.snapshot
+        if s['total']:
+            head = f"[進度] {s['processed']}/{s['total']} ({s['processed'] / s['total']:.1%})"
+        else:
+            head = f"[進度] 已處理 {s['processed']}"
+        rate = f"{s['rate_per_min']:.1f}" if s['rate_per_min'] is not None else "?"
+        lines = [f"{head} 成功 {s['done']}（快取 {s['cached']}）、失敗 {s['failed']}、重試中 {s['retrying']}、"
+                 f"暫停 {s['parked_now']}｜每分鐘 {rate} 家｜已執行 {format_duration(s['elapsed'])}、"
+                 f"預估剩餘 {format_duration(s['eta_seconds'])}"]
+        for worker_id, state in s['workers'].items():
+            lines.append(f"  worker {worker_id}: " + (f"{state['company']}（{state['seconds']:.0f} 秒）" if state else "閒置"))
+        if s['errors']:
+            lines.append("  錯誤類別: " + "、".join(f"{name} {count}" for name, count in s['errors'].items()))
+        return lines
+
+    def _print(self):
+        for line in self.lines():
+            log_print(line, self.log_enable)
+
+    # ===== HTTP 狀態頁 =====
+    def _start_server(self):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        monitor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/status.json'):
+                    body = json.dumps(monitor.snapshot, ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                else:
+                    rows = ''.join(f"<div>{html.escape(line)}</div>" for line in monitor.lines())
+                    body = (f"<html><head><meta charset='utf-8'><meta http-equiv='refresh' content='2'>"
+                            f"<title>scraper 進度</title></head><body style='font-family:monospace'>{rows}"
+                            f"</body></html>").encode('utf-8')
+                    content_type = 'text/html; charset=utf-8'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        except OSError as e:
+            log_print(f"[警告] 無法開啟狀態頁埠 {self.port}: {e}", self.log_enable)
+            return
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        log_print(f"[INFO] 進度狀態頁: http://127.0.0.1:{self.port}/", self.log_enable)
+
+
+def add_progress_arguments(parser):
+    """在 argparse parser 加上共用的進度面板參數。"""
+    parser.add_argument('--progress-interval', type=float, default=30,
+                        help='每幾秒輸出一次進度摘要（完成數、每分鐘家數、ETA、各 worker 狀態），0 表示停用')
+    parser.add_argument('--status-port', type=int, default=0, help='開啟本機 HTTP 進度頁的埠號（例如 8765），0 表示不開啟')
+
+
+def progress_from_args(args, log_enable=True):
+    """依參數建立 ProgressMonitor；兩者皆停用時回傳 None。"""
+    if not args.progress_interval and not args.status_port:
+        return None
+    return ProgressMonitor(args.progress_interval, args.status_port, log_enable)
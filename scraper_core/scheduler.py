@@ -0,0 +1,477 @@
+"""
+共用排程器：以 asyncio worker 併發處理公司清單。
+名稱來源可以是 list、任意 iterable（逐筆讀取，不需一次載入記憶體）或 async iterable（例如 WorkQueue.items()）。
+
+遭封鎖的項目不會卡住其他 worker：
+  - ChallengeError（有頭模式、可人工驗證）：連同 context/page 移到暫停區，
+    worker 換新 context 繼續處理下一筆；驗證完成後以原 page 接續處理。
+  - BlockedError（無頭模式）或暫停逾時：移到重試佇列，主清單跑完後冷卻一段時間再以新身分重試。
+
+時間預算（見 budget.py）：每一筆最多處理 item_budget 秒，逾時放棄並回收 context；
+設定 deadline 時，估計剩餘名稱無法在截止前處理完就改依 priority 由高到低處理，
+截止後不再開始新的一筆，其餘名稱記入 unprocessed。
+"""
+import asyncio
+import heapq
+import time
+from collections import Counter, deque
+
+from .browser import BlockedError, ChallengeError, is_navigation_error
+from .budget import BudgetExceeded, ItemBudget, reset_budget, set_budget
+from .files import save_results
+from .log import log_print
+
+CHALLENGE_POLL_INTERVAL = 1.0  # 暫停中的 page 多久檢查一次驗證是否完成（秒）
+UNPROCESSED_FIELDS = ['查詢公司名稱', '輸入序號', '狀態']
+
+
+class WorkItem:
+    __slots__ = ('index', 'name', 'attempts', 'blocks', 'error')
+
+    def __init__(self, index, name):
+        self.index = index      # 從 1 開始的輸入序號
+        self.name = name
+        self.attempts = 0
+        self.blocks = 0         # 遭封鎖次數
+        self.error = None       # 最後一次例外類別；None 表示查詢正常結束（沒有結果即查無此公司）
+
+
+def _with_input_columns(name, record):
+    """輸入檔同一列的其他欄位（CompanyName.extra）併入輸出；與結果同名的欄位以結果為準。"""
+    extra = getattr(name, 'extra', None)
+    if not extra:
+        return record
+    return {**record, **{key: value for key, value in extra.items() if key not in record}}
+
+
+async def _aenumerate(names):
+    index = 0
+    async for name in names:
+        index += 1
+        yield WorkItem(index, name)
+
+
+class Scheduler:
+    """
+    :param adapter: SiteAdapter 實例。
+    :param concurrency: 同時處理的 worker 數。
+    :param pool: BrowserPool；adapter.needs_browser 為 False 時可為 None。
+    :param cache: ResultCache，命中時略過查詢。
+    :param writer: ResultWriter，成功結果會依輸入順序加入（名稱帶有輸入欄位時一併加入）。
+    :param store: ResultStore，成功結果同時 upsert 至 SQLite 結果庫。
+    :param tracker: ChangeTracker，實際重抓（非快取）的結果先與結果庫比對內容變更。
+    :param work_queue: WorkQueue 或 NameWatcher，以輸入序號回報每筆的完成/失敗（分散式模式、監看模式）。
+    :param progress: ProgressMonitor，run() 期間定期彙整 stats / worker_state / errors 顯示進度。
+    :param profiler: SamplingProfiler，處理每一筆時記錄網路請求並依抽樣錄製 Playwright trace。
+    :param delay: 每個 worker 處理完一筆後的等待秒數（配合網站速度限制）。
+    :param max_retries: 發生例外時的重試次數。
+    :param block_retries: 遭封鎖的項目最多進入重試佇列幾次（與 max_retries 分開計算）。
+    :param retry_delay: 處理重試佇列前的冷卻秒數（非同步來源在執行期間即送回，其餘在主清單跑完後處理）。
+    :param park_timeout: 暫停區等待人工驗證的最長秒數，逾時移至重試佇列。
+    :param max_parked: 暫停區上限（每筆佔用一個 context），預設等於 concurrency；已滿時改進重試佇列。
+    :param item_budget: 每一筆（含重試）最多處理幾秒，0 表示不限。
+    :param deadline: 整批截止時間（time.time() 秒數）；None 表示不限。
+    :param priority: (名稱) -> 數字，越大越優先；接近截止時間時依此排序剩餘名稱。
+    :param keep_results: False 時不在記憶體保留成功結果（監看模式長時間執行，結果已由 writer 逐筆寫出）。
+    """
+
+    def __init__(self, adapter, concurrency=1, pool=None, cache=None, writer=None,
+                 delay=0.0, max_retries=0, log_enable=True, store=None, tracker=None, block_retries=2,
+                 retry_delay=30.0, park_timeout=600.0, max_parked=None, work_queue=None,
+                 progress=None, item_budget=0, deadline=None, priority=None, profiler=None,
+                 keep_results=True):
+        self.adapter = adapter
+        self.concurrency = max(1, concurrency)
+        self.pool = pool
+        self.cache = cache
+        self.writer = writer
+        self.store = store
+        self.tracker = tracker
+        self.work_queue = work_queue
+        self.progress = progress
+        self.profiler = profiler
+        self.delay = delay
+        self.max_retries = max_retries
+        self.block_retries = block_retries
+        self.retry_delay = retry_delay
+        self.park_timeout = park_timeout
+        self.max_parked = self.concurrency if max_parked is None else max_parked
+        self.item_budget = item_budget
+        self.deadline = deadline
+        self.priority = priority
+        self.keep_results = keep_results
+        self.log_enable = log_enable
+        self.total = None
+        self.stats = {'done': 0, 'failed': 0, 'cached': 0, 'blocked': 0, 'parked': 0, 'requeued': 0,
+                      'unprocessed': 0}
+        self.errors = Counter()  # 例外類別 -> 次數
+        self.worker_state = {}   # worker_id -> (公司名稱, 開始時間) 或 None（閒置）
+        self.unprocessed = []    # 截止時間前未處理的 WorkItem
+        self._results = []
+        self._retry = []      # 等待重試的 WorkItem
+        self._parked = {}     # 等待人工驗證的 task -> WorkItem
+        self._scraped = 0         # 實際查詢（非快取）的筆數
+        self._scrape_seconds = 0.0  # 實際查詢的總耗時
+        self._prioritized = False
+
+    @property
+    def retrying(self):
+        return len(self._retry)
+
+    @property
+    def parked_now(self):
+        return len(self._parked)
+
+    @property
+    def results(self):
+        """依輸入序號索引的成功結果 {index: record}。"""
+        return dict(self._results)
+
+    async def run(self, names):
+        """處理所有名稱（含暫停區與重試佇列），回傳依輸入順序排列的成功結果。"""
+        self.total = len(names) if hasattr(names, '__len__') else None
+        if self.progress:
+            self.progress.start(self)
+        try:
+            if hasattr(names, '__aiter__'):
+                await self._run_items(_aenumerate(names))
+            else:
+                items = (WorkItem(index, name) for index, name in enumerate(names, 1))
+                await self._run_items(self._by_priority(items) if self.total is not None else items)
+            await self._wait_parked()
+            while self._retry:
+                items, self._retry = self._retry, []
+                if self._past_deadline():
+                    for item in items:
+                        self._skip(item)
+                    break
+                log_print(f"[INFO] 重試佇列 {len(items)} 筆，{self.retry_delay:.0f} 秒後以新身分重試", self.log_enable)
+                await asyncio.sleep(min(self.retry_delay, self._time_left()))
+                await self._run_items(self._by_priority(items))
+                await self._wait_parked()
+        finally:
+            for task in list(self._parked):
+                task.cancel()
+            if self.unprocessed:
+                log_print(f"[INFO] 截止時間已到，{len(self.unprocessed)} 筆未處理", self.log_enable)
+            if self.cache:
+                self.cache.flush()
+            if self.store:
+                self.store.flush()
+            if self.progress:
+                await self.progress.stop()
+        return [record for _, record in sorted(self._results, key=lambda r: r[0])]
+
+    async def _run_items(self, items):
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def producer():
+            if hasattr(items, '__aiter__'):
+                # 非同步來源（監看、分散式佇列、爬取）可能長時間不結束，重試佇列須在來源執行期間送回
+                feeder = asyncio.create_task(self._feed_retries(queue))
+                try:
+                    async for item in items:
+                        if self._past_deadline():
+                            # 不再向來源租用新項目；已取得的這筆記為未處理（佇列模式由 close() 放回）
+                            self._skip(item)
+                            break
+                        await queue.put(item)
+                finally:
+                    # 先停止送回重試，確保結束標記排在所有項目之後；未送回的留給 run() 結束前處理
+                    feeder.cancel()
+                    await asyncio.gather(feeder, return_exceptions=True)
+            else:
+                for item in items:
+                    if self._past_deadline():
+                        self._skip(item)
+                    else:
+                        await queue.put(item)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        tasks = [asyncio.create_task(producer())]
+        tasks += [asyncio.create_task(self._worker(worker_id, queue)) for worker_id in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _feed_retries(self, queue):
+        """來源執行期間，重試佇列有項目時冷卻 retry_delay 秒後送回工作佇列。"""
+        while True:
+            while not self._retry:
+                await asyncio.sleep(1.0)
+            if self._past_deadline():
+                return
+            log_print(f"[INFO] 重試佇列 {len(self._retry)} 筆，{self.retry_delay:.0f} 秒後以新身分重試", self.log_enable)
+            await asyncio.sleep(min(self.retry_delay, self._time_left()))
+            while self._retry:
+                item = self._retry.pop(0)
+                try:
+                    await queue.put(item)
+                except asyncio.CancelledError:
+                    self._retry.insert(0, item)
+                    raise
+
+    async def _wait_parked(self):
+        while self._parked:
+            tasks = list(self._parked)
+            if self.deadline is None:
+                await asyncio.gather(*tasks, return_exceptions=True)
+                continue
+            await asyncio.wait(tasks, timeout=self._time_left())
+            if self._past_deadline():
+                for task, item in list(self._parked.items()):
+                    task.cancel()
+                    self._skip(item)
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ===== 時間預算 =====
+    def _time_left(self):
+        if self.deadline is None:
+            return float('inf')
+        return max(0.0, self.deadline - time.time())
+
+    def _past_deadline(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def _near_deadline(self, pending):
+        """以目前的平均耗時估計，剩餘 pending 筆是否無法在截止前處理完。"""
+        if self.deadline is None or not self._scraped:
+            return False
+        per_item = self._scrape_seconds / self._scraped / self.concurrency
+        return pending * per_item >= self._time_left()
+
+    def _by_priority(self, items):
+        """
+        依序產生項目；設定 deadline 與 priority 時，一旦估計剩餘項目無法在截止前處理完，
+        其餘項目改依優先順序由高到低（同分維持輸入順序）產生。
+        """
+        if self.deadline is None or self.priority is None:
+            yield from items
+            return
+        pending = deque(items)
+        while pending:
+            if self._near_deadline(len(pending)):
+                if not self._prioritized:
+                    self._prioritized = True
+                    log_print(f"[INFO] 剩餘 {len(pending)} 筆預估無法在截止前完成，改依優先順序處理", self.log_enable)
+                heap = [(-self.priority(item.name), item.index, item) for item in pending]
+                heapq.heapify(heap)
+                while heap:
+                    yield heapq.heappop(heap)[2]
+                return
+            yield pending.popleft()
+
+    def _skip(self, item):
+        self.stats['unprocessed'] += 1
+        self.unprocessed.append(item)
+
+    def save_unprocessed(self, output_dir, prefix):
+        """
+        將截止時間前未處理的名稱（依輸入序號排列）存成 {prefix}_unprocessed_*.csv，可直接作為下次的輸入清單。
+        :return: 寫入的檔名，沒有未處理名稱時為 None。
+        """
+        if not self.unprocessed:
+            return None
+        rows = [{'查詢公司名稱': item.name, '輸入序號': item.index, '狀態': '未處理（截止時間）'}
+                for item in sorted(self.unprocessed, key=lambda item: item.index)]
+        return save_results(rows, output_dir, f"{prefix}_unprocessed", UNPROCESSED_FIELDS, 'csv',
+                            log_enable=self.log_enable)
+
+    async def _scrape(self, page, item, budget):
+        if self.profiler:
+            async with self.profiler.trace(page, item):
+                return await self._scrape_within(page, item.name, budget)
+        return await self._scrape_within(page, item.name, budget)
+
+    async def _scrape_within(self, page, name, budget):
+        remaining = budget.remaining() if budget else None
+        if remaining is None:
+            return await self.adapter.scrape(page, name)
+        try:
+            return await asyncio.wait_for(self.adapter.scrape(page, name), remaining)
+        except asyncio.TimeoutError:
+            if budget.remaining() > 0:
+                raise  # 轉接器本身的逾時，不是預算用完
+            if self.item_budget and (self.deadline is None or budget.expires_at < self.deadline):
+                raise BudgetExceeded(f"超過單筆時間預算 {self.item_budget:.0f} 秒") from None
+            raise BudgetExceeded("已到截止時間") from None
+
+    async def _worker(self, worker_id, queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                self.worker_state.pop(worker_id, None)
+                return
+            if self._past_deadline():
+                self._skip(item)
+                continue
+            self.worker_state[worker_id] = (item.name, time.monotonic())
+            await self._process(worker_id, item)
+            self.worker_state[worker_id] = None
+            if self.delay:
+                await asyncio.sleep(self.delay)
+
+    async def _process(self, worker_id, item):
+        log_print(self.adapter.progress_message(item, self.total), self.log_enable, company=item.name)
+        record = self.cache.get(self.adapter.name, item.name) if self.cache else None
+        if record is not None:
+            log_print(f"  [快取] {item.name} 使用快取結果", self.log_enable)
+            self.stats['cached'] += 1
+            self._finish(item, record, cached=True)
+            return
+        started = time.monotonic()
+        budget = ItemBudget(self.item_budget, self.deadline) if self.item_budget or self.deadline else None
+        token = set_budget(budget)
+        try:
+            record = await self._attempt(worker_id, item, budget)
+        finally:
+            reset_budget(token)
+            self._scraped += 1
+            self._scrape_seconds += time.monotonic() - started
+        if record is not False:
+            self._finish(item, record)
+
+    async def _attempt(self, worker_id, item, budget):
+        """查詢一筆（含重試）；回傳結果或 None（失敗），已交由封鎖處理或列入未處理時回傳 False。"""
+        while True:
+            item.attempts += 1
+            started = time.monotonic()
+            try:
+                page = await self.pool.page_for(worker_id) if self.pool else None
+                record = await self._scrape(page, item, budget)
+                if self.pool:
+                    self.pool.report(worker_id, 'ok', time.monotonic() - started)
+                item.error = None
+                return record
+            except BlockedError as e:
+                if self.pool:
+                    self.pool.report(worker_id, 'blocked')
+                await self._handle_blocked(worker_id, item, e)
+                return False
+            except BudgetExceeded as e:
+                if self.pool:
+                    # 中斷的導航/等待可能讓 page 停在任意狀態：換新的 context 給下一筆
+                    await self.pool.recycle(worker_id)
+                if self._past_deadline():
+                    log_print(f"  [截止] {item.name}: 已到截止時間，中止並列入未處理", self.log_enable,
+                              company=item.name)
+                    self._skip(item)
+                    return False
+                log_print(f"[ERROR] {item.name}: {e}，放棄", self.log_enable, company=item.name,
+                          error='BudgetExceeded')
+                self.errors['BudgetExceeded'] += 1
+                item.error = 'BudgetExceeded'
+                if self.pool:
+                    self.pool.report(worker_id, 'error')
+                return None
+            except Exception as e:
+                log_print(f"[ERROR] {item.name}: {e}", self.log_enable, company=item.name,
+                          error=type(e).__name__)
+                self.errors[type(e).__name__] += 1
+                item.error = type(e).__name__
+                retries = self.max_retries
+                if self.pool and (is_navigation_error(e) or type(e).__name__ == 'TimeoutError'):
+                    self.pool.report(worker_id, 'error')  # 代理評分：導航失敗與逾時計為失敗
+                if self.pool and is_navigation_error(e):
+                    # 導航失敗/分頁崩潰多半是 context 狀態異常：回收後以新的 context 再試同一筆
+                    await self.pool.recycle(worker_id)
+                    retries += 1
+                if item.attempts > retries:
+                    return None
+
+    def _finish(self, item, record, cached=False):
+        if not record:
+            self.stats['failed'] += 1
+            if self.work_queue:
+                if item.error:
+                    self.work_queue.fail(item.index, item.error)  # 例外失敗：放回佇列由任一 worker 重試
+                else:
+                    self.work_queue.complete(item.index, {})  # 查無此公司為終態，重試也不會有結果
+            return
+        if self.cache and not cached:
+            self.cache.put(self.adapter.name, item.name, record)
+        self.stats['done'] += 1
+        if self.keep_results:
+            self._results.append((item.index, record))
+        if self.writer:
+            self.writer.add(_with_input_columns(item.name, record), item.index)
+        if self.tracker and not cached:
+            self.tracker.observe(self.adapter, record, item.name)
+        if self.store:
+            self.store.upsert_record(self.adapter, record, item.name)
+        if self.work_queue:
+            self.work_queue.complete(item.index, record)
+
+    # ===== 封鎖處理 =====
+    async def _handle_blocked(self, worker_id, item, error):
+        self.stats['blocked'] += 1
+        self.errors[type(error).__name__] += 1
+        if isinstance(error, ChallengeError) and self.pool and len(self._parked) < self.max_parked:
+            slot = self.pool.detach(worker_id)
+            if slot:
+                self.stats['parked'] += 1
+                log_print(f"[PARKED] {item.name}: {error}；請在瀏覽器視窗中完成驗證，其他 worker 繼續執行",
+                          self.log_enable, company=item.name, error='ChallengeError')
+                task = asyncio.create_task(self._resume_parked(item, *slot))
+                self._parked[task] = item
+                task.add_done_callback(lambda done: self._parked.pop(done, None))
+                return
+        log_print(f"[BLOCKED] {item.name}: {error}，回收 worker {worker_id} 的 context", self.log_enable,
+                  company=item.name, error='BlockedError')
+        if self.pool:
+            await self.pool.recycle(worker_id)
+        self._requeue(item)
+
+    def _requeue(self, item):
+        item.blocks += 1
+        if item.blocks <= self.block_retries:
+            self.stats['requeued'] += 1
+            self._retry.append(item)
+            log_print(f"  [重試佇列] {item.name} 稍後以新身分重試（{item.blocks}/{self.block_retries}）",
+                      self.log_enable, company=item.name)
+        else:
+            self.stats['failed'] += 1
+            log_print(f"[ERROR] {item.name}: 多次遭封鎖，放棄", self.log_enable, company=item.name)
+            if self.work_queue:
+                self.work_queue.fail(item.index, "blocked")
+
+    async def _resume_parked(self, item, context, page):
+        """等待人工完成驗證後，以原 page 接續處理；逾時或再次遭封鎖則移至重試佇列。"""
+        try:
+            if not await self._wait_challenge(page):
+                log_print(f"[PARKED] {item.name}: {self.park_timeout:.0f} 秒內未完成驗證，移至重試佇列",
+                          self.log_enable, company=item.name)
+                self._requeue(item)
+                return
+            log_print(f"[RESUMED] {item.name}: 驗證完成，接續處理", self.log_enable, company=item.name)
+            try:
+                record = await self.adapter.scrape(page, item.name)
+            except BlockedError as e:
+                log_print(f"[BLOCKED] {item.name}: {e}", self.log_enable, company=item.name, error='BlockedError')
+                self._requeue(item)
+                return
+            except Exception as e:
+                log_print(f"[ERROR] {item.name}: {e}", self.log_enable, company=item.name,
+                          error=type(e).__name__)
+                item.error = type(e).__name__
+                record = None
+            self._finish(item, record)
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    async def _wait_challenge(self, page):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.park_timeout
+        while loop.time() < deadline:
+            if page.is_closed():
+                return False
+            if not self.adapter.is_challenge(page):
+                return True
+            await asyncio.sleep(CHALLENGE_POLL_INTERVAL)
+        return False
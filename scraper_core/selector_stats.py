@@ -0,0 +1,200 @@
+"""
+自適應 selector 排序：依站點、欄位記錄每個候選 selector 的命中/未命中次數並跨次執行保存，
+下次先試歷史命中率最高的 selector；多次嘗試皆未命中的 selector 視為失效，
+只以短逾時探測（頁面改版恢復時仍能重新命中），不再每筆耗掉完整的等待時間。
+
+命令列健康報告：
+    python -m scraper_core.selector_stats output/selector_stats.json
+    python -m scraper_core.selector_stats output/selector_stats.json --csv selector_health.csv
+"""
+import argparse
+import csv
+import json
+import os
+from datetime import datetime
+
+from .budget import phase_timeout
+from .log import log_print
+
+DEFAULT_TIMEOUT_MS = 5000
+DEAD_TIMEOUT_MS = 300   # 失效 selector 的探測逾時
+MIN_TRIALS = 5          # 至少嘗試幾次才判定失效
+DEAD_HIT_RATE = 0.05    # 命中率低於此值視為失效
+
+
+class SelectorRegistry:
+    """
+    :param path: 統計 JSON 檔路徑；None 時只保存在記憶體。
+    :param min_trials: 至少嘗試幾次才判定失效。
+    :param dead_hit_rate: 命中率低於此值視為失效。
+    """
+
+    def __init__(self, path=None, min_trials=MIN_TRIALS, dead_hit_rate=DEAD_HIT_RATE, log_enable=True):
+        self.path = path
+        self.min_trials = min_trials
+        self.dead_hit_rate = dead_hit_rate
+        self.log_enable = log_enable
+        self._stats = {}   # "站點|欄位" -> {selector: [命中, 未命中, 最後命中時間]}
+        self._fields = {}  # "站點|欄位" -> [取得, 未取得]
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._stats = data.get('selectors', {})
+                self._fields = data.get('fields', {})
+            except Exception as e:
+                log_print(f"[警告] selector 統計讀取失敗，將重新建立 {path}: {e}", log_enable)
+
+    @staticmethod
+    def _key(site, field):
+        return f"{site}|{field}"
+
+    def _entry(self, site, field, selector):
+        return self._stats.setdefault(self._key(site, field), {}).setdefault(selector, [0, 0, None])
+
+    def _is_dead(self, entry):
+        hits, misses = entry[0], entry[1]
+        trials = hits + misses
+        return trials >= self.min_trials and hits / trials < self.dead_hit_rate
+
+    def is_dead(self, site, field, selector):
+        entry = self._stats.get(self._key(site, field), {}).get(selector)
+        return bool(entry) and self._is_dead(entry)
+
+    def order(self, site, field, selectors):
+        """
+        依歷史表現排序候選 selector：失效者排最後，其餘依命中率（Laplace 平滑）由高到低；
+        沒有紀錄或同分時維持原本順序。
+        """
+        stats = self._stats.get(self._key(site, field), {})
+
+        def rank(item):
+            index, selector = item
+            entry = stats.get(selector)
+            if not entry:
+                return False, -0.5, index
+            return self._is_dead(entry), -(entry[0] + 1) / (entry[0] + entry[1] + 2), index
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=rank)]
+
+    def timeout_for(self, site, field, selector, default=DEFAULT_TIMEOUT_MS):
+        return DEAD_TIMEOUT_MS if self.is_dead(site, field, selector) else default
+
+    def record(self, site, field, selector, hit):
+        entry = self._entry(site, field, selector)
+        if hit:
+            entry[0] += 1
+            entry[2] = datetime.now().isoformat(timespec='seconds')
+        else:
+            entry[1] += 1
+        self._dirty = True
+
+    def record_field(self, site, field, ok):
+        counts = self._fields.setdefault(self._key(site, field), [0, 0])
+        counts[0 if ok else 1] += 1
+        self._dirty = True
+
+    async def first_text(self, page, site, field, selectors, get_text=None, timeout=DEFAULT_TIMEOUT_MS):
+        """
+        依 order() 的順序嘗試 selector，回傳第一個非空文字；每次嘗試都記入統計。
+        只有排第一的有效 selector 最多等待 timeout 毫秒，其後每個候選只等 DEAD_TIMEOUT_MS。
+        :param get_text: async (locator) -> str；預設取 inner_text。
+        :return: 文字，全部未命中時為 None。
+        """
+        for attempt, selector in enumerate(self.order(site, field, selectors)):
+            text = None
+            # 逾時套用在等待本身：第一個候選等頁面渲染出元素，之後頁面已就緒，其餘候選與失效者只短暫探測
+            wait_ms = self.timeout_for(site, field, selector, timeout) if attempt == 0 else DEAD_TIMEOUT_MS
+            try:
+                el = page.locator(selector).first
+                await el.wait_for(state='attached', timeout=phase_timeout(wait_ms))
+                text = await get_text(el) if get_text else await el.inner_text()
+            except Exception as e:
+                if type(e).__name__ != 'TimeoutError':  # 逾時即未命中，不另外警告
+                    log_print(f"[警告] {field} selector 失敗: {selector}，錯誤: {e}", self.log_enable)
+            text = text.strip() if text else None
+            self.record(site, field, selector, bool(text))
+            if text:
+                self.record_field(site, field, True)
+                return text
+        self.record_field(site, field, False)
+        return None
+
+    def flush(self):
+        if not self._dirty or not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'selectors': self._stats, 'fields': self._fields}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    # ===== 健康報告 =====
+    def report_rows(self):
+        rows = []
+        for key in sorted(set(self._stats) | set(self._fields)):
+            site, field = key.split('|', 1)
+            ok, fail = self._fields.get(key, (0, 0))
+            for selector, entry in self._stats.get(key, {}).items():
+                hits, misses, last_hit = entry
+                trials = hits + misses
+                rows.append({
+                    'site': site, 'field': field, 'selector': selector, 'hits': hits, 'misses': misses,
+                    'hit_rate': round(hits / trials, 3) if trials else None,
+                    'status': 'dead' if self._is_dead(entry) else 'ok',
+                    'last_hit': last_hit,
+                    'field_success_rate': round(ok / (ok + fail), 3) if ok + fail else None,
+                })
+        return rows
+
+    def report_lines(self, only_problems=False):
+        """
+        每個欄位一行：取得率與各 selector 的命中率；only_problems 時只列出有失效 selector 或取得率未滿 100% 的欄位。
+        """
+        lines = []
+        by_field = {}
+        for row in self.report_rows():
+            by_field.setdefault((row['site'], row['field']), []).append(row)
+        for (site, field), rows in by_field.items():
+            success = rows[0]['field_success_rate']
+            has_dead = any(row['status'] == 'dead' for row in rows)
+            if only_problems and not has_dead and success in (None, 1.0):
+                continue
+            parts = [f"{row['selector']} {row['hits']}/{row['hits'] + row['misses']}"
+                     + ("（失效）" if row['status'] == 'dead' else "") for row in rows]
+            rate = f"{success:.1%}" if success is not None else "?"
+            lines.append(f"[selector] {site} {field}: 取得率 {rate}｜" + "；".join(parts))
+        return lines
+
+    def log_report(self, only_problems=True):
+        for line in self.report_lines(only_problems):
+            log_print(line, self.log_enable)
+
+    def write_report(self, path):
+        rows = self.report_rows()
+        fieldnames = ['site', 'field', 'selector', 'hits', 'misses', 'hit_rate', 'status', 'last_hit',
+                      'field_success_rate']
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="selector 健康報告")
+    parser.add_argument('path', help='selector 統計 JSON 檔路徑')
+    parser.add_argument('--csv', default=None, help='另外輸出 CSV 報告')
+    parser.add_argument('--problems', action='store_true', help='只列出有失效 selector 或取得率未滿 100% 的欄位')
+    args = parser.parse_args()
+    registry = SelectorRegistry(args.path)
+    for line in registry.report_lines(args.problems):
+        log_print(line)
+    if args.csv:
+        log_print(f"[SUCCESS] 報告已儲存至 {registry.write_report(args.csv)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+SQLite 結果庫：以 (站點, 公司鍵) 為主鍵 upsert 每次抓到的結果，
+公司鍵為 104 company_id 或商工統一編號；名稱與抓取時間皆有索引，
+查詢某公司最新資料不需再掃描所有時間戳檔案，CSV/JSON 可隨時由資料庫匯出。
+
+WAL 模式 + 批次交易：寫入先累積在記憶體，每 batch_size 筆以單一交易寫入；
+變更偵測等附帶寫入以 stage() 排入同一批次，不另外逐筆提交。
+
+命令列匯出：
+    python -m scraper_core.store output_biz/results.db export --site biz --format csv
+    python -m scraper_core.store output/results.db find 台積電
+"""
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from .files import save_results
+from .log import log_print
+from .matching import normalize_company_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    site          TEXT NOT NULL,
+    company_key   TEXT NOT NULL,
+    name          TEXT,
+    name_norm     TEXT,
+    query_name    TEXT,
+    data          TEXT NOT NULL,
+    typed         TEXT,
+    first_seen_at TEXT NOT NULL,
+    scraped_at    TEXT NOT NULL,
+    PRIMARY KEY (site, company_key)
+);
+CREATE INDEX IF NOT EXISTS idx_companies_name ON companies (site, name_norm);
+CREATE INDEX IF NOT EXISTS idx_companies_query ON companies (site, query_name);
+CREATE INDEX IF NOT EXISTS idx_companies_scraped_at ON companies (site, scraped_at);
+"""
+
+UPSERT_SQL = """
+INSERT INTO companies (site, company_key, name, name_norm, query_name, data, typed, first_seen_at, scraped_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (site, company_key) DO UPDATE SET
+    name = excluded.name,
+    name_norm = excluded.name_norm,
+    query_name = excluded.query_name,
+    data = excluded.data,
+    typed = excluded.typed,
+    scraped_at = excluded.scraped_at
+"""
+
+
+def now_iso():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class ResultStore:
+    """
+    :param path: SQLite 檔路徑。
+    :param batch_size: 累積多少筆寫入一次（單一交易）。
+    """
+
+    def __init__(self, path, batch_size=100):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._pending = []
+        self._staged = []     # 附帶寫入 (sql, params)，與 upsert 同一交易
+        self._staged_rows = {}  # 可在寫入前讀回的附帶資料列：鍵 -> params
+
+    # ===== 寫入 =====
+    def upsert(self, site, company_key, record, name=None, query_name=None, typed=None, scraped_at=None):
+        """加入待寫佇列；累積 batch_size 筆後自動寫入。"""
+        ts = scraped_at or now_iso()
+        self._pending.append((
+            site, str(company_key), name, normalize_company_name(name) if name else None, query_name,
+            json.dumps(record, ensure_ascii=False),
+            json.dumps(typed, ensure_ascii=False) if typed is not None else None,
+            ts, ts,
+        ))
+        self._flush_if_full()
+
+    def stage(self, sql, params, key=None):
+        """
+        將附帶寫入（例如變更偵測狀態）排入同一批次，flush 時與 upsert 同一交易寫入。
+        :param key: 給定時，寫入前可用 staged(key) 讀回 params（同一鍵以最後一次為準）。
+        """
+        self._staged.append((sql, params))
+        if key is not None:
+            self._staged_rows[key] = params
+        self._flush_if_full()
+
+    def staged(self, key):
+        """讀回尚未寫入的附帶資料列；已寫入或不存在時為 None。"""
+        return self._staged_rows.get(key)
+
+    def _flush_if_full(self):
+        if len(self._pending) + len(self._staged) >= self.batch_size:
+            self.flush()
+
+    def upsert_record(self, adapter, record, query_name=None):
+        """
+        以轉接器的 record_key / record_name / normalize 取出主鍵、名稱與型別化資料後 upsert。
+        :return: 公司鍵；無法取得主鍵（例如頁面缺統編）時為 None，不寫入。
+        """
+        key = adapter.record_key(record)
+        if not key:
+            return None
+        self.upsert(adapter.name, key, record, name=adapter.record_name(record),
+                    query_name=query_name, typed=adapter.normalize(record))
+        return key
+
+    def flush(self):
+        if not self._pending and not self._staged:
+            return
+        with self.conn:  # 單一交易
+            self.conn.executemany(UPSERT_SQL, self._pending)
+            for sql, params in self._staged:
+                self.conn.execute(sql, params)
+        self._pending = []
+        self._staged = []
+        self._staged_rows = {}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    # ===== 查詢 =====
+    def get(self, site, company_key):
+        self.flush()
+        row = self.conn.execute(
+            "SELECT * FROM companies WHERE site = ? AND company_key = ?", (site, str(company_key))).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def peek(self, site, company_key):
+        """與 get 相同但不強制寫入：先找待寫佇列中最新的一筆，沒有才查資料庫。"""
+        company_key = str(company_key)
+        for row in reversed(self._pending):
+            if row[0] == site and row[1] == company_key:
+                return {'site': row[0], 'company_key': row[1], 'name': row[2], 'name_norm': row[3],
+                        'query_name': row[4], 'data': json.loads(row[5]),
+                        'typed': json.loads(row[6]) if row[6] else None,
+                        'first_seen_at': row[7], 'scraped_at': row[8]}
+        row = self.conn.execute(
+            "SELECT * FROM companies WHERE site = ? AND company_key = ?", (site, company_key)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def find_by_name(self, site, name):
+        """以正規化名稱或查詢名稱找公司（最新抓取者在前）。"""
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT * FROM companies WHERE site = ? AND (name_norm = ? OR query_name = ?) ORDER BY scraped_at DESC",
+            (site, normalize_company_name(name), name)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def iter_rows(self, site=None, since=None):
+        self.flush()
+        sql = "SELECT * FROM companies WHERE 1 = 1"
+        params = []
+        if site:
+            sql += " AND site = ?"
+            params.append(site)
+        if since:
+            sql += " AND scraped_at >= ?"
+            params.append(since)
+        sql += " ORDER BY site, scraped_at"
+        for row in self.conn.execute(sql, params):
+            yield self._row_to_dict(row)
+
+    @staticmethod
+    def _row_to_dict(row):
+        result = dict(row)
+        result['data'] = json.loads(result['data'])
+        result['typed'] = json.loads(result['typed']) if result['typed'] else None
+        return result
+
+    # ===== 匯出 =====
+    def export(self, output_dir, prefix, site=None, output_format='csv', typed=False, since=None, log_enable=True):
+        """
+        由資料庫匯出 CSV/JSON/Parquet；每家公司一筆（最新資料），附 company_key 與 scraped_at。
+        :return: 匯出檔名或 None。
+        """
+        rows = []
+        fieldnames = ['site', 'company_key', 'scraped_at']
+        for row in self.iter_rows(site, since):
+            data = row['typed'] if typed else row['data']
+            if data is None:
+                continue
+            for key in data:
+                if key not in fieldnames:
+                    fieldnames.append(key)
+            rows.append({'site': row['site'], 'company_key': row['company_key'],
+                         'scraped_at': row['scraped_at'], **data})
+        return save_results(rows, output_dir, prefix, fieldnames, output_format, json_indent=2, log_enable=log_enable)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite 結果庫查詢與匯出")
+    parser.add_argument('db', help='SQLite 檔路徑')
+    sub = parser.add_subparsers(dest='command', required=True)
+    export_parser = sub.add_parser('export', help='匯出 CSV/JSON/Parquet')
+    export_parser.add_argument('--site', default=None, help='只匯出指定站點（104 / biz）')
+    export_parser.add_argument('--format', default='csv', choices=['csv', 'json', 'parquet', 'arrow'])
+    export_parser.add_argument('--typed', action='store_true', help='匯出型別化欄位')
+    export_parser.add_argument('--since', default=None, help='只匯出此時間之後抓取的資料 (ISO 格式)')
+    export_parser.add_argument('-o', '--output-dir', default='.', help='輸出資料夾')
+    find_parser = sub.add_parser('find', help='以公司名稱查詢最新資料')
+    find_parser.add_argument('name')
+    find_parser.add_argument('--site', default=None)
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    try:
+        if args.command == 'export':
+            prefix = f"{args.site or 'all'}_export{'_typed' if args.typed else ''}"
+            store.export(args.output_dir, prefix, args.site, args.format, args.typed, args.since)
+        else:
+            sites = [args.site] if args.site else [r[0] for r in store.conn.execute("SELECT DISTINCT site FROM companies")]
+            for site in sites:
+                for row in store.find_by_name(site, args.name):
+                    log_print(json.dumps({k: row[k] for k in ('site', 'company_key', 'scraped_at', 'data')},
+                                         ensure_ascii=False, indent=2))
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
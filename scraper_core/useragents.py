@@ -0,0 +1,103 @@
+"""
+UA 池本地快取：以 fake_useragent 抽樣一批 UA 存成 JSON，快取有效期間內不再載入 fake_useragent。
+IdentityPool 由 UA 池組合出每個 worker 的瀏覽器身分（UA、viewport、locale）。
+"""
+import json
+import os
+import random
+import sys
+import time
+
+from .log import log_print
+
+UA_CACHE_FILENAME = "ua_cache.json"
+UA_CACHE_TTL_DAYS = 7
+UA_POOL_SIZE = 50
+FALLBACK_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+]
+
+
+def ua_cache_path(script_file):
+    """快取放在腳本旁；打包成執行檔時 __file__ 位於暫存解壓目錄，改放在執行檔旁。"""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.path.dirname(os.path.abspath(script_file))
+    return os.path.join(base_dir, UA_CACHE_FILENAME)
+
+
+def load_ua_pool(cache_path, refresh=False):
+    """
+    取得 UA 池：優先讀取本地快取，過期或 refresh 時才以 fake_useragent 重新抽樣。
+    :param cache_path: 快取檔路徑。
+    :param refresh: 是否強制重建快取。
+    :return: UA 字串列表。
+    """
+    if not refresh and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            age = time.time() - cache.get('created_at', 0)
+            if cache.get('user_agents') and age < UA_CACHE_TTL_DAYS * 86400:
+                return cache['user_agents']
+        except Exception as e:
+            log_print(f"[警告] UA 快取讀取失敗，將重新建立: {e}")
+    try:
+        from fake_useragent import UserAgent
+        ua = UserAgent()
+        pool = sorted({ua.random for _ in range(UA_POOL_SIZE * 2)})[:UA_POOL_SIZE]
+    except Exception as e:
+        log_print(f"[警告] fake_useragent 無法使用，改用內建 UA 清單: {e}")
+        return list(FALLBACK_USER_AGENTS)
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'user_agents': pool}, f, ensure_ascii=False, indent=2)
+    except Exception as e:
+        log_print(f"[警告] UA 快取寫入失敗 {cache_path}: {e}")
+    return pool
+
+
+# 常見桌機解析度與繁中 locale，與 UA 隨機組合
+VIEWPORTS = [
+    {"width": 1280, "height": 800},
+    {"width": 1366, "height": 768},
+    {"width": 1440, "height": 900},
+    {"width": 1536, "height": 864},
+    {"width": 1600, "height": 900},
+    {"width": 1920, "height": 1080},
+]
+LOCALES = ["zh-TW", "zh-Hant-TW"]
+
+
+class IdentityPool:
+    """
+    BrowserPool 的 context_options：每次建立 context 時抽一組新身分，
+    並避開其他 worker 正在使用的 UA（UA 數量足夠時）。
+    :param user_agents: UA 列表（通常來自 load_ua_pool）。
+    """
+
+    def __init__(self, user_agents, viewports=None, locales=None, timezone_id="Asia/Taipei"):
+        self.user_agents = list(user_agents) or list(FALLBACK_USER_AGENTS)
+        self.viewports = viewports or VIEWPORTS
+        self.locales = locales or LOCALES
+        self.timezone_id = timezone_id
+        self._in_use = {}  # worker_id -> UA
+
+    def __call__(self, worker_id):
+        self._in_use.pop(worker_id, None)
+        taken = set(self._in_use.values())
+        choices = [ua for ua in self.user_agents if ua not in taken] or self.user_agents
+        user_agent = random.choice(choices)
+        self._in_use[worker_id] = user_agent
+        locale = random.choice(self.locales)
+        return {
+            "user_agent": user_agent,
+            "viewport": random.choice(self.viewports),
+            "locale": locale,
+            "timezone_id": self.timezone_id,
+            "extra_http_headers": {"Accept-Language": f"{locale},zh;q=0.9,en;q=0.6"},
+        }
@@ -0,0 +1,250 @@
+"""
+監看模式（`--watch`）：常駐執行，持續把新出現的公司名稱送進已啟動的瀏覽器池，不必每批重新啟動。
+
+來源：
+  - 檔案：像 tail -f 一樣讀取新附加的行（檔案被截斷或輪替時從頭重讀）
+  - 資料夾：新放入的 .txt / .csv 檔（大小穩定後才讀取，檔案內容變更時重讀）
+  - csv 的標題列與公司名稱欄依 files.ColumnLayout 判斷（與 CompanyList 相同），其他欄位隨名稱帶到輸出
+  - `-`：標準輸入，每行一個名稱，EOF 時結束
+
+已處理過的名稱記錄在 {prefix}_watch_seen.tsv（時間、結果、名稱），重新啟動後照樣略過；
+`--dedupe-hours` 設定多久之後同名可再查一次（0 表示永不重查）。
+NameWatcher 同時提供 complete / fail / close（與 WorkQueue 相同介面），由 Scheduler 回報每筆處理完成。
+"""
+import asyncio
+import csv
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from .files import ColumnLayout
+from .log import log_print
+
+DEFAULT_POLL_INTERVAL = 2.0
+WATCH_EXTENSIONS = ('.txt', '.csv')
+
+
+class _LineParser:
+    """
+    一行輸入 -> 公司名稱（空行回傳 None）。CSV 每個檔案的第一個非空行以 ColumnLayout 判斷標題列，
+    公司名稱欄與其他欄位的規則與 CompanyList 相同；txt 與標準輸入每行一個名稱。
+    """
+
+    def __init__(self):
+        self._layout = None
+
+    def reset(self):
+        """開始讀取新檔案（或檔案被截斷、輪替後從頭重讀）。"""
+        self._layout = None
+
+    def parse(self, line, is_csv):
+        if not is_csv:
+            return line.strip() or None
+        row = next(csv.reader([line]), None)
+        if not row or not any(cell.strip() for cell in row):
+            return None
+        if self._layout is None:
+            self._layout = ColumnLayout(row)
+            if self._layout.has_header:
+                return None
+        return self._layout.name(row)
+
+
+class NameWatcher:
+    """
+    :param source: 檔案路徑、資料夾路徑或 '-'（標準輸入）。
+    :param ledger_path: 已處理名稱紀錄檔。
+    :param poll_interval: 檢查新內容的間隔（秒）。
+    :param dedupe_hours: 已處理的名稱多久後可再次處理；0 表示永不重複處理。
+    :param deadline: time.time() 秒數；到達時停止監看（搭配 --deadline / --max-runtime）。
+    """
+
+    def __init__(self, source, ledger_path, poll_interval=DEFAULT_POLL_INTERVAL, dedupe_hours=0.0,
+                 deadline=None, log_enable=True):
+        self.source = source
+        self.ledger_path = ledger_path
+        self.poll_interval = poll_interval
+        self.dedupe_seconds = dedupe_hours * 3600
+        self.deadline = deadline
+        self.log_enable = log_enable
+        self.accepted = 0
+        self.duplicates = 0
+        self._seen = self._load_ledger()  # 名稱 -> 最後處理時間（time.time()）
+        self._in_flight = set()
+        self._held = {}   # Scheduler 輸入序號 -> 名稱
+        self._index = 0
+        self._ledger = None
+
+    # ===== 已處理紀錄 =====
+    def _load_ledger(self):
+        seen = {}
+        if not os.path.exists(self.ledger_path):
+            return seen
+        with open(self.ledger_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) == 3:
+                    try:
+                        seen[parts[2]] = datetime.fromisoformat(parts[0]).timestamp()
+                    except ValueError:
+                        continue
+        return seen
+
+    def _record(self, index, status):
+        name = self._held.pop(index, None)
+        if name is None:
+            return
+        self._in_flight.discard(name)
+        self._seen[name] = time.time()
+        if self._ledger is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.ledger_path)), exist_ok=True)
+            self._ledger = open(self.ledger_path, 'a', encoding='utf-8', buffering=1)
+        self._ledger.write(f"{datetime.now().isoformat(timespec='seconds')}\t{status}\t{name}\n")
+
+    def complete(self, index, record):
+        self._record(index, 'done')
+
+    def fail(self, index, error=None):
+        self._record(index, 'failed')
+
+    async def close(self):
+        if self._ledger:
+            self._ledger.close()
+            self._ledger = None
+        log_print(f"[INFO] 監看結束：接收 {self.accepted} 筆新名稱，略過重複 {self.duplicates} 筆", self.log_enable)
+
+    def _is_new(self, name):
+        if name in self._in_flight:
+            return False
+        processed_at = self._seen.get(name)
+        if processed_at is None:
+            return True
+        return bool(self.dedupe_seconds) and time.time() - processed_at >= self.dedupe_seconds
+
+    # ===== 名稱來源 =====
+    def _expired(self):
+        return self.deadline is not None and time.time() >= self.deadline
+
+    async def items(self):
+        """給 Scheduler.run 的非同步名稱來源：持續產生新的、未處理過的名稱。"""
+        if self.source == '-':
+            lines = self._stdin_lines()
+            log_print("[INFO] 監看標準輸入（每行一個名稱，EOF 結束）", self.log_enable)
+        elif os.path.isdir(self.source):
+            lines = self._directory_lines()
+            log_print(f"[INFO] 監看資料夾 {self.source}（新的 .txt / .csv 檔），Ctrl+C 結束", self.log_enable)
+        else:
+            lines = self._file_lines()
+            log_print(f"[INFO] 監看檔案 {self.source}（新附加的行），Ctrl+C 結束", self.log_enable)
+        parser = _LineParser()
+        async for line, is_csv, first in lines:
+            if first:
+                parser.reset()
+            name = parser.parse(line, is_csv)
+            if not name:
+                continue
+            if not self._is_new(name):
+                self.duplicates += 1
+                continue
+            self.accepted += 1
+            self._in_flight.add(name)
+            self._index += 1
+            self._held[self._index] = name
+            yield name
+
+    async def _stdin_lines(self):
+        # 以 daemon 執行緒讀取：阻塞中的 readline 不會讓 Ctrl+C 後的結束流程卡住
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def reader():
+            try:
+                for line in sys.stdin:
+                    loop.call_soon_threadsafe(queue.put_nowait, line)
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+            except RuntimeError:
+                pass  # 事件迴圈已關閉
+
+        threading.Thread(target=reader, name='watch-stdin', daemon=True).start()
+        while not self._expired():
+            try:
+                line = await asyncio.wait_for(queue.get(), self.poll_interval)
+            except asyncio.TimeoutError:
+                continue
+            if line is None:
+                return
+            yield line, False, False
+
+    async def _file_lines(self):
+        is_csv = self.source.lower().endswith('.csv')
+        handle, inode, buffer = None, None, ''
+        try:
+            while not self._expired():
+                if handle is None and os.path.exists(self.source):
+                    handle = open(self.source, 'r', encoding='utf-8-sig', newline='')
+                    inode = os.fstat(handle.fileno()).st_ino
+                    first = True  # 重新開檔：下一行起重新判斷標題列
+                if handle is not None:
+                    chunk = handle.read()
+                    if chunk:
+                        buffer += chunk
+                        *complete, buffer = buffer.split('\n')
+                        for line in complete:
+                            yield line, is_csv, first
+                            first = False
+                        continue
+                    try:
+                        stat = os.stat(self.source)
+                    except FileNotFoundError:
+                        stat = None
+                    if stat is None or stat.st_ino != inode or stat.st_size < handle.tell():
+                        # 檔案被輪替或截斷：從頭讀取新檔（重複的名稱由已處理紀錄略過）
+                        handle.close()
+                        handle, buffer = None, ''
+                        continue
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if handle:
+                handle.close()
+
+    async def _directory_lines(self):
+        consumed = {}  # 路徑 -> (大小, 修改時間)
+        candidates = {}
+        while not self._expired():
+            for entry in sorted(os.scandir(self.source), key=lambda e: e.stat().st_mtime):
+                if not entry.is_file() or not entry.name.lower().endswith(WATCH_EXTENSIONS):
+                    continue
+                stat = entry.stat()
+                signature = (stat.st_size, stat.st_mtime)
+                if consumed.get(entry.path) == signature:
+                    continue
+                if candidates.get(entry.path) != signature:
+                    candidates[entry.path] = signature  # 等下一輪大小不變才讀取，避免讀到寫入一半的檔案
+                    continue
+                consumed[entry.path] = candidates.pop(entry.path)
+                is_csv = entry.name.lower().endswith('.csv')
+                with open(entry.path, 'r', encoding='utf-8-sig', newline='') as f:
+                    lines = f.read().splitlines()
+                log_print(f"[INFO] 讀取新檔案 {entry.name}（{len(lines)} 行）", self.log_enable)
+                for number, line in enumerate(lines):
+                    yield line, is_csv, number == 0
+            await asyncio.sleep(self.poll_interval)
+
+
+def add_watch_arguments(parser):
+    """在 argparse parser 加上共用的監看模式參數。"""
+    parser.add_argument('--watch', type=str, default=None, metavar='PATH',
+                        help='監看模式：持續讀取檔案新附加的行、資料夾中新放入的 txt/csv，或 -（標準輸入）')
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_POLL_INTERVAL, help='監看模式檢查新內容的間隔（秒）')
+    parser.add_argument('--dedupe-hours', type=float, default=0,
+                        help='監看模式中已處理的名稱多久後可再查一次（小時），0 表示永不重查')
+
+
+def watcher_from_args(args, output_dir, prefix, deadline=None, log_enable=True):
+    """--watch 時建立 NameWatcher（已處理紀錄存於 {output_dir}/{prefix}_watch_seen.tsv），否則回傳 None。"""
+    if not args.watch:
+        return None
+    ledger = os.path.join(output_dir, f"{prefix}_watch_seen.tsv")
+    return NameWatcher(args.watch, ledger, args.watch_interval, args.dedupe_hours, deadline, log_enable)
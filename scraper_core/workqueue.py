@@ -0,0 +1,343 @@
+"""
+分散式工作佇列：把一份大型公司清單分給多台機器的 104bat.py / bizbat.py 處理。
+
+協調端把名稱載入共用的 SQLite 佇列；各 worker 以 `--queue` 啟動後分批租用（lease）項目，
+租約有可見逾時（visibility timeout），處理中的項目由背景心跳定期延長。
+worker 端的資料庫操作（租用、回報、心跳）在執行緒中進行，等待共享檔案鎖時不會卡住事件迴圈。
+worker 中斷或失聯時租約到期，項目自動回到待處理狀態由其他 worker 接手；
+重試超過 max_attempts 次的項目標記為失敗。結果寫回佇列，由協調端合併匯出。
+
+多台機器共用時，佇列檔需放在支援檔案鎖的共享位置（SMB 共用資料夾可用；NFS 的鎖可能不可靠）。
+
+命令列（協調端）：
+    python -m scraper_core.workqueue queue.db load company_list.txt --queue 104
+    python -m scraper_core.workqueue queue.db status --queue 104
+    python -m scraper_core.workqueue queue.db export --queue 104 --format csv -o output
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from .files import open_company_list, save_results
+from .log import log_print
+from .store import now_iso
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    queue       TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    name        TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    updated_at  TEXT,
+    PRIMARY KEY (queue, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (queue, status, lease_until);
+"""
+
+STATUSES = ('pending', 'leased', 'done', 'failed')
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    :param path: SQLite 佇列檔路徑（所有機器共用）。
+    :param queue: 佇列名稱，同一檔案可放多個佇列（例如 104、biz）。
+    :param owner: worker 識別碼，預設為「主機名稱-PID」。
+    :param lease_seconds: 租約秒數；worker 失聯超過此時間，其項目會被重新租用。
+    :param max_attempts: 每個項目最多租用幾次，超過後標記為失敗。
+    """
+
+    def __init__(self, path, queue, owner=None, lease_seconds=600.0, max_attempts=3, log_enable=True):
+        self.path = path
+        self.queue = queue
+        self.owner = owner or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.log_enable = log_enable
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # worker 端操作經 asyncio.to_thread 在其他執行緒執行，以 _lock 串行化同一連線
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._held = {}  # Scheduler 輸入序號 -> 佇列 seq
+        self._index = 0
+        self._heartbeat = None
+        self._lock = threading.Lock()
+        self._writes = set()  # 尚未完成的 complete / fail 寫入
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE：同一時間只有一個行程能租用，避免兩台機器拿到同一筆。"""
+        conn = self.conn
+
+        class _Tx:
+            def __enter__(self):
+                conn.execute("BEGIN IMMEDIATE")
+                return conn
+
+            def __exit__(self, exc_type, exc, tb):
+                conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+        return _Tx()
+
+    # ===== 協調端 =====
+    def load(self, names, reset=False):
+        """把名稱加入佇列尾端；reset 時先清空此佇列。回傳加入筆數。"""
+        with self._transaction() as conn:
+            if reset:
+                conn.execute("DELETE FROM work_items WHERE queue = ?", (self.queue,))
+            start = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM work_items WHERE queue = ?",
+                                 (self.queue,)).fetchone()[0]
+            ts = now_iso()
+            # 逐筆產生，大型清單不需先整份載入記憶體
+            rows = ((self.queue, start + offset, str(name), ts) for offset, name in enumerate(names, 1))
+            conn.executemany("INSERT INTO work_items (queue, seq, name, updated_at) VALUES (?, ?, ?, ?)", rows)
+            end = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM work_items WHERE queue = ?",
+                               (self.queue,)).fetchone()[0]
+        return end - start
+
+    def counts(self):
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self.conn.execute("SELECT status, COUNT(*) FROM work_items WHERE queue = ? GROUP BY status",
+                                     (self.queue,)):
+            counts[row[0]] = row[1]
+        return counts
+
+    def active_leases(self):
+        """目前仍在租約內的項目數（依 worker）。"""
+        rows = self.conn.execute(
+            "SELECT owner, COUNT(*) FROM work_items WHERE queue = ? AND status = 'leased' AND lease_until > ? "
+            "GROUP BY owner ORDER BY owner", (self.queue, time.time()))
+        return {row[0]: row[1] for row in rows}
+
+    def failed_items(self):
+        return [dict(row) for row in self.conn.execute(
+            "SELECT seq, name, attempts, error FROM work_items WHERE queue = ? AND status = 'failed' ORDER BY seq",
+            (self.queue,))]
+
+    def iter_results(self):
+        """依載入順序產生已完成的 (查詢名稱, 結果)。"""
+        for row in self.conn.execute(
+                "SELECT name, result FROM work_items WHERE queue = ? AND status = 'done' ORDER BY seq", (self.queue,)):
+            yield row['name'], json.loads(row['result'])
+
+    def export(self, output_dir, prefix, output_format='csv', log_enable=True):
+        """合併所有 worker 的結果匯出；欄位依第一次出現的順序，附查詢公司名稱。"""
+        rows = []
+        fieldnames = ['查詢公司名稱']
+        for name, record in self.iter_results():
+            for key in record:
+                if key not in fieldnames:
+                    fieldnames.append(key)
+            rows.append({**record, '查詢公司名稱': record.get('查詢公司名稱', name)})
+        return save_results(rows, output_dir, prefix, fieldnames, output_format, json_indent=2, log_enable=log_enable)
+
+    # ===== worker 端 =====
+    def lease(self, limit=1):
+        """
+        租用最多 limit 筆待處理項目；租約已過期的項目先回到待處理（或超過 max_attempts 時標記失敗）。
+        :return: [(seq, name)]
+        """
+        now = time.time()
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, error = 'lease expired', updated_at = ? "
+                "WHERE queue = ? AND status = 'leased' AND lease_until <= ?",
+                (self.max_attempts, now_iso(), self.queue, now))
+            rows = conn.execute(
+                "SELECT seq, name FROM work_items WHERE queue = ? AND status = 'pending' ORDER BY seq LIMIT ?",
+                (self.queue, limit)).fetchall()
+            conn.executemany(
+                "UPDATE work_items SET status = 'leased', owner = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE queue = ? AND seq = ?",
+                [(self.owner, now + self.lease_seconds, now_iso(), self.queue, row['seq']) for row in rows])
+        return [(row['seq'], row['name']) for row in rows]
+
+    def _others_pending(self):
+        """佇列中是否還有待處理，或其他 worker 租用中（可能失聯）的項目。"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM work_items WHERE queue = ? AND "
+                "(status = 'pending' OR (status = 'leased' AND owner != ?))", (self.queue, self.owner)).fetchone()
+        return row[0] > 0
+
+    async def items(self, batch_size=1, poll_interval=5.0):
+        """
+        給 Scheduler.run 的非同步名稱來源：逐批租用並依序產生名稱。
+        佇列已空但本 worker 或其他 worker 仍有租用中的項目時持續等待（失敗放回或租約到期即接手）；全部結束才停止。
+        產生順序即 Scheduler 的輸入序號（從 1 開始），complete / fail 以此序號回報。
+        """
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        while True:
+            rows = await asyncio.to_thread(self.lease, batch_size)
+            if not rows:
+                # 本 worker 仍有處理中的項目時不能結束：失敗的項目會放回待處理，需由這裡再租用
+                if not self._held and not await asyncio.to_thread(self._others_pending):
+                    return
+                await asyncio.sleep(poll_interval)
+                continue
+            for seq, name in rows:
+                self._index += 1
+                self._held[self._index] = seq
+                yield name
+
+    def complete(self, index, record):
+        seq = self._held.pop(index, None)
+        if seq is None:
+            return
+        self._write(self._complete, seq, json.dumps(record, ensure_ascii=False))
+
+    def _complete(self, seq, result):
+        # 租約過期後仍完成的項目照樣收下（另一個 worker 的重複結果會覆蓋成相同狀態）
+        with self._lock:
+            self.conn.execute(
+                "UPDATE work_items SET status = 'done', owner = NULL, result = ?, error = NULL, updated_at = ? "
+                "WHERE queue = ? AND seq = ?",
+                (result, now_iso(), self.queue, seq))
+
+    def fail(self, index, error=None):
+        """回報失敗：未達 max_attempts 時放回待處理，由任一 worker 稍後重試。"""
+        seq = self._held.pop(index, None)
+        if seq is None:
+            return
+        self._write(self._fail, seq, str(error) if error else None)
+
+    def _fail(self, seq, error):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "owner = NULL, error = ?, updated_at = ? "
+                "WHERE queue = ? AND seq = ? AND status = 'leased' AND owner = ?",
+                (self.max_attempts, error, now_iso(), self.queue, seq, self.owner))
+
+    def _write(self, func, *args):
+        """在事件迴圈中（Scheduler 回報）改於執行緒寫入、不等待結果，close() 前全部完成；否則直接寫入。"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            func(*args)
+            return
+        task = asyncio.create_task(asyncio.to_thread(func, *args))
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task):
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception():
+            log_print(f"[WARN] 佇列回報寫入失敗: {task.exception()}", self.log_enable)
+
+    def extend(self, seqs=None):
+        """延長本 worker 所有租用中項目（或指定 seqs）的租約。"""
+        seqs = list(self._held.values()) if seqs is None else seqs
+        if not seqs:
+            return
+        placeholders = ','.join('?' * len(seqs))
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE work_items SET lease_until = ? WHERE queue = ? AND owner = ? AND status = 'leased' "
+                f"AND seq IN ({placeholders})",
+                (time.time() + self.lease_seconds, self.queue, self.owner, *seqs))
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.extend, list(self._held.values()))
+            except sqlite3.Error as e:
+                log_print(f"[WARN] 佇列心跳失敗: {e}", self.log_enable)
+
+    async def close(self):
+        """停止心跳，並把尚未完成的項目（例如中斷時）立即放回待處理，不必等租約到期。"""
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+        if self._held:
+            seqs = list(self._held.values())
+            placeholders = ','.join('?' * len(seqs))
+            self.conn.execute(
+                f"UPDATE work_items SET status = 'pending', owner = NULL, attempts = attempts - 1, updated_at = ? "
+                f"WHERE queue = ? AND owner = ? AND status = 'leased' AND seq IN ({placeholders})",
+                (now_iso(), self.queue, self.owner, *seqs))
+            log_print(f"[INFO] 已將 {len(seqs)} 筆未完成項目放回佇列", self.log_enable)
+            self._held.clear()
+        self.conn.close()
+
+
+def add_queue_arguments(parser):
+    """在 argparse parser 加上 worker 端的佇列參數。"""
+    parser.add_argument('--queue', type=str, default=None, metavar='DB',
+                        help='分散式模式：從共用 SQLite 佇列租用公司名稱，結果寫回佇列')
+    parser.add_argument('--queue-name', type=str, default=None, help='佇列名稱（預設為站點代號）')
+    parser.add_argument('--worker-id', type=str, default=None, help='worker 識別碼（預設 主機名稱-PID）')
+    parser.add_argument('--lease-seconds', type=float, default=600, help='租約秒數，worker 失聯超過此時間其項目會被重新分配')
+
+
+def queue_from_args(args, default_queue, log_enable=True):
+    """依參數建立 WorkQueue；未指定 --queue 時回傳 None。"""
+    if not args.queue:
+        return None
+    work_queue = WorkQueue(args.queue, args.queue_name or default_queue, args.worker_id, args.lease_seconds,
+                           log_enable=log_enable)
+    log_print(f"[INFO] 分散式模式：佇列 {work_queue.queue}（{args.queue}），worker {work_queue.owner}", log_enable)
+    return work_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分散式工作佇列（協調端）")
+    parser.add_argument('db', help='SQLite 佇列檔路徑')
+    parser.add_argument('--queue', required=True, help='佇列名稱（104 / biz）')
+    sub = parser.add_subparsers(dest='command', required=True)
+    load_parser = sub.add_parser('load', help='載入公司名稱清單')
+    load_parser.add_argument('input_file', help='公司名稱清單檔案（txt / csv / tsv / xlsx / jsonl）')
+    load_parser.add_argument('--name-column', default=None, help='公司名稱欄位名稱（預設自動偵測）')
+    load_parser.add_argument('--reset', action='store_true', help='先清空此佇列')
+    sub.add_parser('status', help='顯示進度、租用中的 worker 與失敗項目')
+    export_parser = sub.add_parser('export', help='合併匯出已完成的結果')
+    export_parser.add_argument('--format', default='csv', choices=['csv', 'json', 'parquet', 'arrow'])
+    export_parser.add_argument('-o', '--output-dir', default='.', help='輸出資料夾')
+    args = parser.parse_args()
+
+    work_queue = WorkQueue(args.db, args.queue)
+    try:
+        if args.command == 'load':
+            names = open_company_list(args.input_file, args.name_column)
+            if names is None:
+                return
+            count = work_queue.load(names, reset=args.reset)
+            log_print(f"[INFO] 已載入 {count} 筆至佇列 {args.queue}")
+        elif args.command == 'status':
+            counts = work_queue.counts()
+            log_print(f"[INFO] 佇列 {args.queue}：" + "、".join(f"{k} {v}" for k, v in counts.items()))
+            for owner, count in work_queue.active_leases().items():
+                log_print(f"  租用中 {owner}: {count} 筆")
+            for item in work_queue.failed_items():
+                log_print(f"  [失敗] #{item['seq']} {item['name']}（{item['attempts']} 次）: {item['error']}")
+        else:
+            work_queue.export(args.output_dir, f"{args.queue}_queue_export", args.format)
+    finally:
+        work_queue.conn.close()
+
+
+if __name__ == '__main__':
+    main()
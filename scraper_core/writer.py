@@ -0,0 +1,124 @@
+"""
+結果輸出層：收集各 worker 的結果，依輸入順序一次寫出 CSV/JSON；
+監看模式改用 StreamWriter，每筆結果立即附加寫出。
+"""
+import csv
+import json
+import os
+from datetime import datetime
+
+from .files import save_results
+from .log import log_print
+
+# 型別化輸出預設格式：CSV 給人看、Parquet 給分析工具直接載入
+TYPED_FORMATS = ('csv', 'parquet')
+
+
+class ResultWriter:
+    """
+    :param output_dir: 輸出資料夾。
+    :param prefix: 檔名前綴，例如 "104_company_info"。
+    :param fieldnames: CSV 欄位順序。
+    :param formats: 要輸出的格式，依序寫出。
+    :param normalizer: 正規化函數 record -> 型別化 record；搭配 typed_formats 另外寫出 {prefix}_typed_*。
+    :param typed_fieldnames: 型別化輸出的欄位順序。
+    :param typed_formats: 型別化輸出的格式，例如 ('csv', 'parquet')。
+    """
+
+    def __init__(self, output_dir, prefix, fieldnames, formats=('csv', 'json'), json_indent=4, log_enable=True,
+                 normalizer=None, typed_fieldnames=None, typed_formats=()):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.fieldnames = fieldnames
+        self.formats = formats
+        self.json_indent = json_indent
+        self.log_enable = log_enable
+        self.normalizer = normalizer
+        self.typed_fieldnames = typed_fieldnames
+        self.typed_formats = typed_formats if normalizer else ()
+        self._rows = []  # (輸入序號, 結果)
+
+    def add(self, record, index=None):
+        self._rows.append((len(self._rows) if index is None else index, record))
+
+    @property
+    def records(self):
+        return [record for _, record in sorted(self._rows, key=lambda r: r[0])]
+
+    def save(self):
+        """寫出所有格式，同一次輸出共用時間戳；回傳成功寫入的檔名列表。"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        data = self.records
+        paths = []
+        for fmt in self.formats:
+            path = save_results(data, self.output_dir, self.prefix, self.fieldnames, fmt,
+                                timestamp=timestamp, json_indent=self.json_indent, log_enable=self.log_enable)
+            if path:
+                paths.append(path)
+        if self.typed_formats and data:
+            typed = [self.normalizer(record) for record in data]
+            for fmt in self.typed_formats:
+                path = save_results(typed, self.output_dir, f"{self.prefix}_typed", self.typed_fieldnames, fmt,
+                                    timestamp=timestamp, json_indent=self.json_indent, log_enable=self.log_enable)
+                if path:
+                    paths.append(path)
+        return paths
+
+
+class StreamWriter:
+    """
+    逐筆附加寫出（監看模式、爬行模式）：每筆結果處理完立即寫入 {prefix}_stream_YYYYMMDD.csv / .jsonl，跨日自動換檔，
+    不在記憶體累積結果。參數同 ResultWriter；formats 可含 'csv'、'jsonl'（'json' 視為 'jsonl'）。
+    """
+
+    def __init__(self, output_dir, prefix, fieldnames, formats=('csv', 'jsonl'), log_enable=True,
+                 normalizer=None, typed_fieldnames=None, typed_formats=(), **_):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.fieldnames = fieldnames
+        self.formats = tuple(dict.fromkeys('jsonl' if fmt == 'json' else fmt for fmt in formats
+                                           if fmt in ('csv', 'json', 'jsonl')))
+        self.log_enable = log_enable
+        self.normalizer = normalizer
+        self.typed_fieldnames = typed_fieldnames
+        self.typed = normalizer is not None and bool(typed_formats)
+        self.count = 0
+        self.paths = set()
+
+    def add(self, record, index=None):
+        day = datetime.now().strftime("%Y%m%d")
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._append(f"{self.prefix}_stream_{day}", record, self.fieldnames)
+        if self.typed:
+            self._append(f"{self.prefix}_typed_stream_{day}", self.normalizer(record),
+                         self.typed_fieldnames or self.fieldnames)
+        self.count += 1
+
+    def _append(self, stem, record, fieldnames):
+        for fmt in self.formats:
+            path = os.path.join(self.output_dir, f"{stem}.{fmt}")
+            try:
+                if fmt == 'csv':
+                    new_file = not os.path.exists(path)
+                    with open(path, 'a', newline='', encoding='utf-8-sig' if new_file else 'utf-8') as f:
+                        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                        if new_file:
+                            writer.writeheader()
+                        writer.writerow(record)
+                else:
+                    with open(path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            except Exception as e:
+                log_print(f"[ERROR] 附加寫入 {path} 失敗: {e}", self.log_enable)
+                continue
+            self.paths.add(path)
+
+    @property
+    def records(self):
+        return []  # 結果已逐筆寫出，不保留在記憶體
+
+    def save(self):
+        """結果已逐筆寫出；只輸出摘要並回傳寫入過的檔名列表。"""
+        paths = sorted(self.paths)
+        log_print(f"[INFO] 逐筆輸出共寫出 {self.count} 筆" + (f"：{', '.join(paths)}" if paths else ""), self.log_enable)
+        return paths
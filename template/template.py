@@ -1,8 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
 import time
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Tuple
+
+# 共用核心套件 scraper_core 位於 repo 根目錄
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scraper_core import Scheduler, SiteAdapter, StreamWriter
+from scraper_core.frontier import UrlFrontier, add_crawl_arguments, frontier_from_args
+
+# requests / bs4 / pandas 匯入成本高，改於使用時才載入
+if TYPE_CHECKING:
+    import pandas as pd
 
 # ----------- 1. 設定 selector 模板 -----------
 # 請根據實際需求填寫 selector
@@ -27,50 +38,141 @@ def load_urls_from_txt(file_path: str) -> List[str]:
 
 def load_urls_from_csv(file_path: str, url_column: str) -> List[str]:
     """從 CSV 檔案讀取網址清單，指定欄位。"""
+    import pandas as pd
     df = pd.read_csv(file_path)
     return df[url_column].dropna().tolist()
 
 # ----------- 3. 網頁爬取主流程 -----------
 def fetch_page(url: str, timeout: int = 10) -> str:
+    import requests
     resp = requests.get(url, timeout=timeout)
     resp.raise_for_status()
     return resp.text
 
-def parse_with_selectors(html: str, selectors: Dict[str, str]) -> Dict[str, str]:
-    soup = BeautifulSoup(html, 'html.parser')
+def _select_fields(soup, selectors: Dict[str, str]) -> Dict[str, str]:
     result = {}
     for field, selector in selectors.items():
         elem = soup.select_one(selector)
         result[field] = elem.get_text(strip=True) if elem else ''
     return result
 
+def parse_with_selectors(html: str, selectors: Dict[str, str]) -> Dict[str, str]:
+    from bs4 import BeautifulSoup
+    return _select_fields(BeautifulSoup(html, 'html.parser'), selectors)
+
+def parse_page(html: str, selectors: Dict[str, str], base_url: str) -> Tuple[Dict[str, str], List[str]]:
+    """爬行模式用：擷取欄位並收集頁面上所有連結（轉為絕對網址），同一份 HTML 只解析一次。"""
+    from urllib.parse import urljoin
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [urljoin(base_url, a['href']) for a in soup.select('a[href]')]
+    return _select_fields(soup, selectors), links
+
 # ----------- 3.5. Log 機制 -----------
 def print_log(msg: str):
     print(f"[LOG] {time.strftime('%Y-%m-%d %H:%M:%S')} - {msg}")
 
 # ----------- 4. 批次處理 -----------
-def batch_scrape(urls: List[str], selectors: Dict[str, str], delay: float = 1.0) -> pd.DataFrame:
-    data = []
-    for idx, url in enumerate(urls, 1):
-        print_log(f"({idx}/{len(urls)}) 開始處理: {url}")
+class TemplateAdapter(SiteAdapter):
+    """以 requests 下載網頁、selector 擷取欄位；不需瀏覽器。"""
+    name = "template"
+    needs_browser = False
+
+    def __init__(self, selectors: Dict[str, str]):
+        self.selectors = selectors
+
+    def progress_message(self, item, total):
+        return f"[LOG] {time.strftime('%Y-%m-%d %H:%M:%S')} - ({item.index}/{total if total is not None else '?'}) 開始處理: {item.name}"
+
+    async def search(self, page, url: str):
+        return url
+
+    async def fetch_detail(self, page, url: str):
+        # requests 為同步呼叫，放到執行緒避免阻塞其他 worker
+        return await asyncio.to_thread(fetch_page, url)
+
+    async def extract(self, page, url: str, query: str, detail=None):
+        row = parse_with_selectors(detail, self.selectors)
+        row['url'] = url
+        return row
+
+    async def scrape(self, page, url: str):
         try:
-            html = fetch_page(url)
-            row = parse_with_selectors(html, selectors)
-            row['url'] = url
-            data.append(row)
+            row = await super().scrape(page, url)
             print_log(f"完成: {url}")
         except Exception as e:
             print_log(f"[ERROR] {url}: {e}")
-            data.append({'url': url, **{k: '' for k in selectors}})
-        time.sleep(delay)
+            row = {'url': url, **{k: '' for k in self.selectors}}
+        return row
+
+class CrawlAdapter(TemplateAdapter):
+    """爬行模式：擷取欄位的同時，把頁面上符合跟隨規則的連結加入 frontier。"""
+    name = "template_crawl"
+
+    def __init__(self, selectors: Dict[str, str], frontier: UrlFrontier):
+        super().__init__(selectors)
+        self.frontier = frontier
+
+    async def fetch_detail(self, page, url: str):
+        # 同主機間隔在實際抓取前才保證（派發後可能在 Scheduler 佇列中等待）
+        await self.frontier.wait_for_host(url)
+        return await super().fetch_detail(page, url)
+
+    async def extract(self, page, url: str, query: str, detail=None):
+        depth = self.frontier.depth_of(url)
+        row, links = parse_page(detail, self.selectors, url)
+        self.frontier.add_links(links, depth + 1)
+        row['url'] = url
+        row['depth'] = depth
+        return row
+
+    async def scrape(self, page, url: str):
+        # 例外交給 Scheduler 記為失敗，frontier 才會把該網址標記為失敗而非完成
+        row = await SiteAdapter.scrape(self, page, url)
+        print_log(f"完成: {url}")
+        return row
+
+def batch_scrape(urls: List[str], selectors: Dict[str, str], delay: float = 1.0, concurrency: int = 1) -> pd.DataFrame:
+    import pandas as pd
+    scheduler = Scheduler(TemplateAdapter(selectors), concurrency=concurrency, delay=delay)
+    data = asyncio.run(scheduler.run(urls))
     return pd.DataFrame(data)
 
+def crawl(frontier: UrlFrontier, selectors: Dict[str, str], output_dir: str = '.', delay: float = 0.0,
+          concurrency: int = 1) -> List[str]:
+    """爬行模式：結果逐筆附加至 crawl_stream_YYYYMMDD.csv / .jsonl，回傳寫入的檔名。"""
+    writer = StreamWriter(output_dir, 'crawl', ['url', 'depth', *selectors], formats=('csv', 'jsonl'))
+    scheduler = Scheduler(CrawlAdapter(selectors, frontier), concurrency=concurrency, delay=delay,
+                          writer=writer, work_queue=frontier, keep_results=False)
+
+    async def run():
+        try:
+            await scheduler.run(frontier.items())
+        finally:
+            await frontier.close()
+
+    asyncio.run(run())
+    return writer.save()
+
 # ----------- 5. 儲存結果 -----------
 def save_to_csv(df: pd.DataFrame, file_path: str):
     df.to_csv(file_path, index=False, encoding='utf-8-sig')
 
 # ----------- 6. 主程式範例 -----------
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='同時處理的網址數')
+    add_crawl_arguments(parser)
+    args = parser.parse_args()
+
+    # 爬行模式範例：
+    # python template.py --crawl https://example.com/list --follow "/list\?page=" --follow "/article/" --max-depth 3
+    frontier = frontier_from_args(args, 'crawl_frontier.db')
+    if frontier:
+        crawl(frontier, SELECTORS, delay=0, concurrency=args.concurrency)
+        sys.exit(0)
+
     # 1. 讀取網址清單模板說明：
     # 請將欲爬取的網址一行一個寫在 template/urls.txt
     # 範例：
@@ -82,7 +184,7 @@ if __name__ == "__main__":
     print_log(f"共載入 {len(urls)} 筆網址，開始批次爬取...")
 
     # 2. 執行批次爬取
-    df = batch_scrape(urls, SELECTORS, delay=1)
+    df = batch_scrape(urls, SELECTORS, delay=1, concurrency=args.concurrency)
 
     # 3. 儲存結果
     save_to_csv(df, 'result.csv')
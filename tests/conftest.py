@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 測試直接從原始碼樹匯入 scraper_core（本專案沒有安裝成套件）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from scraper_core.budget import (
+    MIN_PHASE_TIMEOUT_MS, ItemBudget, add_budget_arguments, deadline_from_args, parse_deadline, phase_timeout,
+    reset_budget, set_budget,
+)
+
+NOW = datetime(2026, 3, 2, 12, 0, 30)
+
+
+def test_parse_deadline_clock_today_or_tomorrow():
+    assert parse_deadline('18:30', NOW) == datetime(2026, 3, 2, 18, 30).timestamp()
+    assert parse_deadline(' 09:00 ', NOW) == datetime(2026, 3, 3, 9, 0).timestamp()
+    assert parse_deadline('12:00', NOW) == datetime(2026, 3, 3, 12, 0).timestamp()  # 已過（同一分鐘內）
+
+
+def test_parse_deadline_full_datetime():
+    assert parse_deadline('2026-03-05 08:15', NOW) == datetime(2026, 3, 5, 8, 15).timestamp()
+    assert parse_deadline('2026-03-05T08:15:00', NOW) == datetime(2026, 3, 5, 8, 15).timestamp()
+
+
+def test_deadline_from_args_takes_earliest_and_ignores_bad_value():
+    parser = argparse.ArgumentParser()
+    add_budget_arguments(parser)
+    assert deadline_from_args(parser.parse_args([]), log_enable=False) is None
+    args = parser.parse_args(['--deadline', '2999-01-01 00:00', '--max-runtime', '1'])
+    assert abs(deadline_from_args(args, log_enable=False) - (time.time() + 60)) < 5
+    args = parser.parse_args(['--deadline', 'soon'])
+    assert deadline_from_args(args, log_enable=False) is None
+
+
+def test_phase_timeout_without_budget_keeps_default():
+    assert phase_timeout(30000) == 30000
+    token = set_budget(ItemBudget())
+    try:
+        assert phase_timeout(30000) == 30000
+    finally:
+        reset_budget(token)
+
+
+def test_phase_timeout_is_capped_by_remaining_budget():
+    token = set_budget(ItemBudget(seconds=2))
+    try:
+        assert 1500 < phase_timeout(30000) <= 2000
+        assert phase_timeout(500) == 500
+    finally:
+        reset_budget(token)
+    token = set_budget(ItemBudget(seconds=60, deadline=time.time() - 1))  # 截止時間優先
+    try:
+        assert phase_timeout(30000) == MIN_PHASE_TIMEOUT_MS
+    finally:
+        reset_budget(token)
+
+
+def test_phase_timeout_budget_is_per_task():
+    async def worker(seconds):
+        token = set_budget(ItemBudget(seconds=seconds))
+        try:
+            await asyncio.sleep(0)
+            return phase_timeout(60000)
+        finally:
+            reset_budget(token)
+
+    async def run():
+        return await asyncio.gather(worker(1), worker(30))
+
+    short, long = asyncio.run(run())
+    assert short <= 1000 < 29000 < long
@@ -0,0 +1,57 @@
+import importlib.util
+import os
+
+_spec = importlib.util.spec_from_file_location(
+    "combinebat", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "combined", "combinebat.py"))
+combinebat = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(combinebat)
+join_results = combinebat.join_results
+
+TSMC_BIZ = {"公司名稱": "台灣積體電路製造股份有限公司", "統一編號": "22099131"}
+TSMC_104 = {"公司名稱": "台灣積體電路製造股份有限公司", "公司網址": "https://www.104.com.tw/company/a1"}
+
+
+def bases(merged):
+    return [(index, record["合併依據"]) for index, record in merged]
+
+
+def test_same_index_merge():
+    merged = join_results(["台積電"], {1: TSMC_BIZ}, {1: TSMC_104}, log_enable=False)
+    assert bases(merged) == [(1, "名稱")]
+    assert merged[0][1]["104公司網址"] == TSMC_104["公司網址"]
+
+
+def test_name_match_across_indexes_is_not_repeated_as_104_only():
+    merged = join_results(["台積電", "台灣積體電路製造"], {1: TSMC_BIZ}, {2: TSMC_104}, log_enable=False)
+    assert bases(merged) == [(1, "名稱")]
+
+
+def test_claimed_record_before_its_biz_row_is_not_emitted():
+    merged = join_results(["台灣積體電路製造", "台積電"], {2: TSMC_BIZ}, {1: TSMC_104}, log_enable=False)
+    assert bases(merged) == [(2, "名稱")]
+
+
+def test_unrelated_104_result_stays_104_only():
+    other = {"公司名稱": "鴻海精密工業股份有限公司", "公司網址": "https://www.104.com.tw/company/b2"}
+    merged = join_results(["台積電", "鴻海"], {1: TSMC_BIZ}, {1: TSMC_104, 2: other}, log_enable=False)
+    assert bases(merged) == [(1, "名稱"), (2, "僅104")]
+
+
+def test_displaced_same_index_record_is_logged(capsys):
+    wrong = {"公司名稱": "台積電子材料有限公司", "公司網址": "https://www.104.com.tw/company/c3"}
+    merged = join_results(["台積電", "台灣積體電路製造"], {1: TSMC_BIZ}, {1: wrong, 2: TSMC_104})
+    assert bases(merged) == [(1, "名稱")]
+    assert merged[0][1]["104公司網址"] == TSMC_104["公司網址"]
+    assert "台積電子材料有限公司" in capsys.readouterr().out
+
+
+def test_low_similarity_is_not_merged():
+    wrong = {"公司名稱": "鴻海精密工業股份有限公司"}
+    merged = join_results(["台積電"], {1: TSMC_BIZ}, {1: wrong}, log_enable=False)
+    assert bases(merged) == [(1, "僅商工")]
+    assert merged[0][1]["104公司名稱"] is None
+
+
+def test_duplicate_ban_is_emitted_once():
+    merged = join_results(["台積電", "台積電"], {1: TSMC_BIZ, 2: TSMC_BIZ}, {}, log_enable=False)
+    assert bases(merged) == [(1, "僅商工")]
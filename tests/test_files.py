@@ -0,0 +1,31 @@
+from scraper_core.files import CompanyList
+from scraper_core.watch import _LineParser
+
+
+def test_company_list_detects_name_column_and_extras(tmp_path):
+    path = tmp_path / "list.csv"
+    path.write_text("統一編號,公司名稱,priority\n22099131,台積電,5\n,,\n12345678,鴻海,\n", encoding="utf-8-sig")
+    company_list = CompanyList(str(path))
+    names = list(company_list)
+    assert company_list.has_header
+    assert company_list.extra_columns == ["統一編號", "priority"]
+    assert names == ["台積電", "鴻海"]
+    assert names[0].extra == {"統一編號": "22099131", "priority": "5"}
+
+
+def test_company_list_without_header_uses_first_column(tmp_path):
+    path = tmp_path / "list.csv"
+    path.write_text("台積電,x\n鴻海,y\n", encoding="utf-8")
+    company_list = CompanyList(str(path))
+    assert not company_list.has_header
+    assert list(company_list) == ["台積電", "鴻海"]
+
+
+def test_watch_lines_follow_company_list_header_rules():
+    parser = _LineParser()
+    lines = ["統一編號,公司名稱", "22099131,台積電", "", "12345678,鴻海"]
+    names = [parser.parse(line, True) for line in lines]
+    assert names == [None, "台積電", None, "鴻海"]
+    assert names[1].extra == {"統一編號": "22099131"}
+    parser.reset()
+    assert parser.parse("聯發科,1", True) == "聯發科"  # 新檔案沒有標題列：第一欄為名稱
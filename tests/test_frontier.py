@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from scraper_core import frontier as frontier_module
+from scraper_core.frontier import BloomFilter, UrlFrontier, normalize_url
+
+SEED = 'https://example.com/'
+
+
+def make_frontier(tmp_path, **kwargs):
+    kwargs.setdefault('host_delay', 0)
+    return UrlFrontier(str(tmp_path / 'frontier.db'), capacity=1000, log_enable=False, **kwargs)
+
+
+def take(frontier, count):
+    """由 items() 取出 count 個網址（不耗盡來源）。"""
+    async def run():
+        source = frontier.items()
+        urls = [await source.__anext__() for _ in range(count)]
+        await source.aclose()
+        return urls
+    return asyncio.run(run())
+
+
+def test_bloom_filter_add_contains_and_round_trip():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    assert bloom.add('a') is True
+    assert bloom.add('a') is False
+    assert 'a' in bloom and 'b' not in bloom
+    restored = BloomFilter.from_bytes(bloom.to_bytes(), 1000)
+    assert (restored.size, restored.hashes, restored.count) == (bloom.size, bloom.hashes, 1)
+    assert 'a' in restored and 'b' not in restored
+
+
+def test_bloom_filter_error_rate_at_capacity():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        bloom.add(f'https://example.com/{i}')
+    false_positives = sum(f'https://other.com/{i}' in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_normalize_url():
+    assert normalize_url(' HTTPS://Example.COM/Path?q=1#top ') == 'https://example.com/Path?q=1'
+    assert normalize_url('mailto:a@example.com') is None
+    assert normalize_url('/relative') is None
+
+
+def test_dedupe_and_follow_rules(tmp_path):
+    frontier = make_frontier(tmp_path, max_depth=1)
+    assert frontier.add_seeds([SEED, SEED + '#x']) == 1
+    links = [SEED + 'a', SEED + 'a#frag', 'https://other.com/b', SEED + 'c']
+    assert frontier.add_links(links, 1) == 2
+    assert frontier.add_links(links, 1) == 0
+    assert frontier.add_links([SEED + 'd'], 2) == 0  # 超過 max_depth
+    assert frontier.stats['duplicates'] == 5
+    assert take(frontier, 3) == [SEED, SEED + 'a', SEED + 'c']
+
+
+def test_crash_resume_does_not_recrawl_or_rediscover(tmp_path, monkeypatch):
+    frontier = make_frontier(tmp_path)
+    frontier.add_seeds([SEED])
+    frontier.add_links([SEED + 'a', SEED + 'b'], 1)
+    [seed] = take(frontier, 1)
+    frontier.complete(1, {'url': seed})
+    monkeypatch.setattr(frontier_module, 'BLOOM_SAVE_INTERVAL', 0)
+    frontier.add_links([SEED + 'c'], 1)  # 與新增同一交易存檔已見集合
+    monkeypatch.setattr(frontier_module, 'BLOOM_SAVE_INTERVAL', 3600)
+    frontier.add_links([SEED + 'd'], 1)  # 存檔後才新增，只在資料表中
+    [leased] = take(frontier, 1)
+    frontier.conn.close()  # 當機：沒有呼叫 close()
+
+    resumed = make_frontier(tmp_path)
+    assert resumed.add_seeds([SEED]) == 0
+    assert resumed.add_links([SEED + x for x in 'abcd'], 1) == 0
+    urls = take(resumed, 4)
+    assert sorted(urls) == [SEED + x for x in 'abcd']
+    assert leased in urls and seed not in urls
+    asyncio.run(resumed.close())
+
+
+def test_wait_for_host_spaces_fetches(tmp_path):
+    frontier = make_frontier(tmp_path, host_delay=0.1)
+
+    async def run():
+        started = []
+
+        async def fetch(url):
+            await frontier.wait_for_host(url)
+            started.append((url, time.monotonic()))
+
+        await asyncio.gather(*(fetch(url) for url in (SEED + '1', SEED + '2', 'https://other.com/1')))
+        return started
+
+    times = dict(asyncio.run(run()))
+    assert times[SEED + '2'] - times[SEED + '1'] >= 0.09
+    assert times['https://other.com/1'] - times[SEED + '1'] < 0.05
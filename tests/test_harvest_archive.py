@@ -0,0 +1,52 @@
+import asyncio
+import gc
+
+from scraper_core.adapter import SiteAdapter
+from scraper_core.archive import ArchiveReplayAdapter
+from scraper_core.harvest import HarvestDetailAdapter
+
+
+class FakeAdapter(SiteAdapter):
+    name = "fake"
+    fieldnames = ["公司名稱", "統一編號", "簡介"]
+    harvest_key = "統一編號"
+    harvest_fieldnames = ["統一編號", "公司名稱"]
+    change_fields = ["公司名稱"]
+    hash_exclude_fields = ["簡介"]
+
+
+def test_harvest_detail_adapter_forwards_archive_and_fields():
+    adapter = FakeAdapter()
+    adapter.archive = object()
+    adapter.project_fields(["公司名稱"])
+    wrapper = HarvestDetailAdapter(adapter, [{"統一編號": "12345678", "公司名稱": "甲"}])
+    assert wrapper.archive is adapter.archive
+    assert wrapper.fields == adapter.fields
+    assert wrapper.change_fields == ["公司名稱"]
+    assert wrapper.hash_exclude_fields == ["簡介"]
+
+
+class FakePage:
+    def __init__(self):
+        self.routes = 0
+
+    async def route(self, pattern, handler):
+        self.routes += 1
+
+
+def test_replay_routes_every_new_page():
+    replay = ArchiveReplayAdapter(FakeAdapter(), archive=None, entries=[])
+
+    async def run():
+        page = FakePage()
+        await replay.fetch_detail(page, "ref")
+        await replay.fetch_detail(page, "ref")
+        assert page.routes == 1
+        del page
+        gc.collect()
+        # 回收後的新 page（可能拿到相同 id）仍須重新攔截
+        fresh = FakePage()
+        await replay.fetch_detail(fresh, "ref")
+        assert fresh.routes == 1
+
+    asyncio.run(run())
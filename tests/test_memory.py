@@ -0,0 +1,52 @@
+import asyncio
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scraper_core.memory import MemoryMonitor, can_sample, child_pids
+
+pytestmark = pytest.mark.skipif(not can_sample(), reason='無法取樣行程 RSS')
+
+SLEEPER = "import time; time.sleep(30)"
+
+
+def _spawn(code):
+    return subprocess.Popen([sys.executable, '-c', code])
+
+
+def test_root_pid_only_counts_its_own_subtree():
+    ours, other = _spawn(SLEEPER), _spawn("x = bytearray(200 << 20); import time; time.sleep(30)")
+    try:
+        time.sleep(0.5)
+        assert {ours.pid, other.pid} <= child_pids()
+        _, scoped = MemoryMonitor(root_pid=ours.pid).measure()
+        _, total = MemoryMonitor().measure()
+        assert total - scoped > 150 << 20
+    finally:
+        for proc in (ours, other):
+            proc.kill()
+            proc.wait()
+
+
+def test_limit_hits_call_on_limit_on_loop():
+    proc = _spawn(SLEEPER)
+    hits = []
+
+    async def run():
+        monitor = MemoryMonitor(limit_mb=1, interval=0.05, log_enable=False, root_pid=proc.pid,
+                                on_limit=lambda: hits.append(asyncio.get_running_loop()))
+        monitor.start()
+        await asyncio.sleep(0.3)
+        await monitor.stop()
+        return monitor
+
+    try:
+        time.sleep(0.2)
+        monitor = asyncio.run(run())
+    finally:
+        proc.kill()
+        proc.wait()
+    assert hits and monitor.limit_hits == len(hits)
+    assert MemoryMonitor(root_pid=proc.pid).measure() is None  # driver 已結束
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from scraper_core.workqueue import WorkQueue
+
+
+def make_queue(tmp_path, owner='w1', **kwargs):
+    return WorkQueue(str(tmp_path / 'queue.db'), 'test', owner=owner, log_enable=False, **kwargs)
+
+
+def test_lease_hands_out_each_item_once(tmp_path):
+    q1, q2 = make_queue(tmp_path, 'w1'), make_queue(tmp_path, 'w2')
+    assert q1.load(['A', 'B', 'C']) == 3
+    assert q1.lease(2) == [(1, 'A'), (2, 'B')]
+    assert q2.lease(2) == [(3, 'C')]
+    assert q2.lease(2) == []
+    assert q1.counts()['leased'] == 3
+
+
+def test_fail_requeues_until_max_attempts(tmp_path):
+    q = make_queue(tmp_path, max_attempts=2)
+    q.load(['A'])
+    q._held[1] = q.lease()[0][0]
+    q.fail(1, 'boom')  # 不在事件迴圈中：直接寫入
+    assert q.counts()['pending'] == 1
+    q._held[2] = q.lease()[0][0]
+    q.fail(2, 'boom')
+    assert q.counts()['failed'] == 1
+    assert q.failed_items()[0]['error'] == 'boom'
+
+
+def test_expired_lease_is_taken_over_by_another_worker(tmp_path):
+    q1 = make_queue(tmp_path, 'w1', lease_seconds=0.05, max_attempts=2)
+    q2 = make_queue(tmp_path, 'w2', lease_seconds=0.05, max_attempts=2)
+    q1.load(['A'])
+    assert q1.lease() == [(1, 'A')]
+    assert q2.lease() == []
+    time.sleep(0.1)
+    assert q2.lease() == [(1, 'A')]
+    time.sleep(0.1)
+    # 第二次租約也到期且已達 max_attempts：標記失敗而不是再放回
+    assert q1.lease() == []
+    assert q1.counts()['failed'] == 1
+
+
+def test_items_waits_for_own_leases_and_releases_failures(tmp_path):
+    """佇列已空但自己仍有處理中的項目時不可結束，失敗放回的項目要由同一個 worker 再租用。"""
+    q = make_queue(tmp_path)
+    q.load(['A', 'B'])
+
+    async def run():
+        names = q.items(batch_size=1, poll_interval=0.01)
+        assert await names.__anext__() == 'A'
+        assert await names.__anext__() == 'B'
+        waiting = asyncio.create_task(names.__anext__())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        q.complete(2, {'公司名稱': 'B'})
+        q.fail(1, 'timeout')
+        assert await asyncio.wait_for(waiting, 2) == 'A'
+        q.complete(3, {'公司名稱': 'A'})
+        rest = [name async for name in names]
+        await q.close()
+        return rest
+
+    assert asyncio.run(run()) == []
+    q = make_queue(tmp_path)
+    assert q.counts() == {'pending': 0, 'leased': 0, 'done': 2, 'failed': 0}
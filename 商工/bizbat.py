@@ -1,20 +1,51 @@
 import asyncio
-from playwright.async_api import async_playwright
-import json
-import csv
+import argparse
 import os
+import re
+import time
+import weakref
 from datetime import datetime
 import sys
 
+# 共用核心套件 scraper_core 位於 repo 根目錄
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scraper_core import (
+    HARVEST_COMMON_FIELDS, TYPED_FORMATS, BrowserPool, ResultCache, ResultStore, ResultWriter, Scheduler, SiteAdapter,
+    StreamWriter, add_change_arguments, add_log_arguments, log_print, run_harvest_mode, setup_log_from_args, tracker_from_args,
+)
+from scraper_core.adapter import add_field_arguments, parse_fields
+from scraper_core.archive import REPLAY_CONTEXT_OPTIONS, add_archive_arguments, archive_from_args, run_reextract_mode
+from scraper_core.budget import add_budget_arguments, deadline_from_args, phase_timeout
+from scraper_core.matching import pick_best_candidate
+from scraper_core.normalize import clean_ban, clean_company_name, clean_text, parse_amount, parse_status, split_address
+from scraper_core.profiling import add_profile_arguments, profiler_from_args
+from scraper_core.progress import add_progress_arguments, progress_from_args
+from scraper_core.proxies import add_proxy_arguments, proxy_pool_from_args
+from scraper_core.watch import add_watch_arguments, watcher_from_args
+from scraper_core.workqueue import add_queue_arguments, queue_from_args
+from scraper_core.files import has_priority_column, input_priority, open_company_list
+
 BASE_URL = "https://findbiz.nat.gov.tw/fts/query/QueryBar/queryInit.do"
 OUTPUT_DIR = "./output_biz"
+OUTPUT_PREFIX = "biz_company_info"
 COMPANY_LIST_FILE = "company_list.txt"
 CSV_HEADERS = [
-    "查詢公司名稱", "公司名稱", "統一編號", "登記現況", "資本總額(元)", "代表人姓名", "公司所在地"
+    "查詢公司名稱", "公司名稱", "統一編號", "登記現況", "資本總額(元)", "代表人姓名", "公司所在地", "匹配信心"
+]
+DETAIL_TABLE_SELECTOR = "#tabCmpyContent > div > table"
+QUERY_INTERVAL = 2.0  # 同一 worker 兩次查詢的最短間隔（秒）
+CONTEXT_MAX_REQUESTS = 200  # 每個 context 處理幾筆後回收，避免長時間執行記憶體持續成長
+BROWSER_MAX_RSS_MB = 3072   # 瀏覽器行程 RSS 超過此值 (MB) 時回收所有 context
+# 型別化輸出欄位（--typed）
+TYPED_FIELDS = [
+    "查詢公司名稱", "統一編號", "公司名稱", "英文名稱", "登記現況", "狀態代碼", "資本總額",
+    "代表人姓名", "地址", "縣市", "鄉鎮市區", "路段門牌", "匹配信心"
 ]
+HARVEST_FIELDS = ["公司名稱", "統一編號", "登記現況", "詳情網址", "搜尋摘要"] + HARVEST_COMMON_FIELDS
 SELECTORS = {
     "search_input": "#qryCond",
     "search_button": "#qryBtn",
+    "next_page": "a:has-text('下一頁')",
     # 其餘欄位將用標題自動判斷
 }
 
@@ -27,9 +58,46 @@ FIELD_KEYWORDS = {
     "company_address": "公司所在地",
 }
 
+# 對應中文欄位名稱
+FIELD_MAPPING = {
+    "company_name": "公司名稱",
+    "unified_business_number": "統一編號",
+    "company_status": "登記現況",
+    "capital": "資本總額(元)",
+    "representative": "代表人姓名",
+    "company_address": "公司所在地",
+}
+
+# 一次 evaluate 取回所有搜尋結果 panel（名稱、連結、狀態文字），避免逐一 inner_text 往返
+PANELS_JS = """
+panels => panels.map((panel, index) => {
+    const link = panel.querySelector('div.panel-heading > a');
+    const raw = link ? (link.getAttribute('href') || '') : '';
+    return {
+        index,
+        name: link ? link.innerText.trim() : '',
+        href: raw && !raw.startsWith('#') && !raw.startsWith('javascript') ? link.href : '',
+        text: panel.innerText,
+    };
+})
+"""
+
+async def collect_result_panels(page):
+    """
+    取回搜尋結果頁所有 panel 的摘要。
+    :return: [{index, name, href, text, status, ban}]，status/ban 由 text 解析。
+    """
+    panels = await page.eval_on_selector_all("#vParagraph > div", PANELS_JS)
+    for panel in panels:
+        status = re.search(r"登記現況：\s*(\S+)", panel["text"])
+        ban = re.search(r"統一編號：\s*(\d{8})", panel["text"])
+        panel["status"] = status.group(1) if status else ""
+        panel["ban"] = ban.group(1) if ban else ""
+    return panels
+
 # 自動根據標題關鍵字抓取欄位內容
 async def extract_field_by_title(page, field_keyword):
-    trs = page.locator("#tabCmpyContent > div > table > tbody > tr")
+    trs = page.locator(f"{DETAIL_TABLE_SELECTOR} > tbody > tr")
     count = await trs.count()
     for i in range(count):
         tds = trs.nth(i).locator("td")
@@ -57,103 +125,205 @@ LOG_FILENAME = "bizbat_log.txt"  # log檔名，預設與py同目錄
 import os
 LOGFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), LOG_FILENAME)
 
-# log_print: 預設CMD顯示，log_to_file控制是否寫入本地檔
-
-def log_print(msg, log_enable=True):
-    if log_enable:
-        print(msg)
-    if LOG_TO_FILE:
-        try:
-            with open(LOGFILE_PATH, 'a', encoding='utf-8') as f:
-                f.write(msg + '\n')
-        except Exception as e:
-            print(f"[ERROR] 寫入 log 檔失敗: {e}")
-
 def fix_cmd_encoding():
     try:
         sys.stdout.reconfigure(encoding='utf-8')
     except Exception:
         pass
 
-def read_company_list(input_file, log_enable=False):
-    if not os.path.exists(input_file):
-        print(f"[ERROR] Input file not found: {input_file}")
-        return []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        company_list = [line.strip() for line in f if line.strip()]
-    log_print(f"[INFO] 讀取公司列表完成，共 {len(company_list)} 筆", log_enable)
-    return company_list
+def read_company_list(input_file, log_enable=False, name_column=None):
+    """開啟公司列表（逐筆讀取，不一次載入記憶體）；失敗時回傳 None。"""
+    return open_company_list(input_file, name_column, log_enable=log_enable)
 
 def save_results(data, log_enable=False):
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base = os.path.join(OUTPUT_DIR, f"biz_company_info_{timestamp}")
-    with open(base + ".json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    if data:
-        with open(base + ".csv", "w", encoding="utf-8-sig", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-            writer.writeheader()
-            writer.writerows(data)
-    log_print(f"[SUCCESS] Data saved to {base}.json & {base}.csv", log_enable)
+    writer = ResultWriter(OUTPUT_DIR, OUTPUT_PREFIX, CSV_HEADERS, formats=('json', 'csv'),
+                          json_indent=2, log_enable=log_enable)
+    for record in data:
+        writer.add(record)
+    return writer.save()
 
-async def scrape_company_info(query_name, page, log_enable=False):
-    await page.goto(BASE_URL)
-    try:
+def build_browser_pool(headless=True, max_requests=CONTEXT_MAX_REQUESTS, max_rss_mb=BROWSER_MAX_RSS_MB, proxies=None):
+    return BrowserPool(headless=headless, launch_args=[], max_requests=max_requests, memory_limit_mb=max_rss_mb,
+                       proxies=proxies)
+
+# ===== 商工登記站點轉接器：供 scraper_core 排程器使用 =====
+class BizAdapter(SiteAdapter):
+    name = "biz"
+    output_dir = OUTPUT_DIR
+    output_prefix = OUTPUT_PREFIX
+    fieldnames = CSV_HEADERS
+
+    typed_fieldnames = TYPED_FIELDS
+    change_fields = ["公司名稱", "代表人姓名", "資本總額", "登記現況", "地址"]
+    hash_exclude_fields = ["查詢公司名稱", "匹配信心"]
+    identity_fields = ["查詢公司名稱"]
+    # 搜尋結果 panel 已含名稱、統編與登記現況，只需要這些欄位時不進入詳情頁
+    search_fields = ["查詢公司名稱", "公司名稱", "統一編號", "登記現況", "匹配信心"]
+    harvest_key = "統一編號"
+    harvest_fieldnames = HARVEST_FIELDS
+
+    def __init__(self, log_enable=False):
+        self.log_enable = log_enable
+        # page -> 上次送出查詢的時間；page 關閉或回收後隨之釋放，不會累積或因 id 重複使用而誤用
+        self._last_query = weakref.WeakKeyDictionary()
+
+    def record_key(self, record):
+        return clean_ban(record.get("統一編號"))
+
+    def record_name(self, record):
+        return clean_company_name(record.get("公司名稱"))[0]
+
+    def normalize(self, record):
+        """統編去除「訂閱」、名稱拆出英文名稱、資本總額轉整數、登記現況轉狀態代碼、地址去雜訊並拆分。"""
+        name, english_name = clean_company_name(record.get("公司名稱"))
+        status_code, status_text = parse_status(record.get("登記現況"))
+        return {
+            "查詢公司名稱": record.get("查詢公司名稱"),
+            "統一編號": clean_ban(record.get("統一編號")),
+            "公司名稱": name,
+            "英文名稱": english_name,
+            "登記現況": status_text,
+            "狀態代碼": status_code,
+            "資本總額": parse_amount(record.get("資本總額(元)")),
+            "代表人姓名": clean_text(record.get("代表人姓名")),
+            **split_address(record.get("公司所在地")),
+            "匹配信心": record.get("匹配信心"),
+        }
+
+    async def submit_query(self, page, query_name):
+        await page.goto(BASE_URL, timeout=phase_timeout(30000))
         await page.fill(SELECTORS["search_input"], query_name)
+        await self._wait_query_interval(page)
         await page.click(SELECTORS["search_button"])
-        await page.wait_for_load_state('networkidle', timeout=10000)
-        # 取得所有搜尋結果的div
-        result_panels = page.locator("#vParagraph > div")
-        count = await result_panels.count()
-        if count == 0:
-            log_print(f"[WARNING] No result for '{query_name}'", log_enable)
+        await page.wait_for_load_state('networkidle', timeout=phase_timeout(10000))
+
+    async def harvest_page(self, page, keyword, page_no):
+        """第 1 頁送出查詢，之後點擊「下一頁」；沒有下一頁時回傳空列表。"""
+        if page_no == 1:
+            await self.submit_query(page, keyword)
+        else:
+            next_link = page.locator(SELECTORS["next_page"]).first
+            if await next_link.count() == 0 or not await next_link.is_visible():
+                return []
+            await self._wait_query_interval(page)
+            await next_link.click()
+            await page.wait_for_load_state('networkidle', timeout=10000)
+        hits = []
+        for panel in await collect_result_panels(page):
+            summary = " | ".join(line.strip() for line in panel["text"].splitlines()
+                                 if line.strip() and line.strip() != panel["name"])
+            hits.append({
+                "公司名稱": panel["name"],
+                "統一編號": panel["ban"],
+                "登記現況": panel["status"],
+                "詳情網址": panel["href"],
+                "搜尋摘要": summary,
+            })
+        return hits
+
+    def harvest_ref(self, hit):
+        if not hit["詳情網址"]:
             return None
-        await asyncio.sleep(2)  # 點擊搜尋結果前等待2秒（配合查詢速度限制）
-        selected_idx = None
-        for i in range(count):
-            panel = result_panels.nth(i)
-            try:
-                status_div = panel.locator("div").nth(1)  # 第2個div為狀態
-                status_text = await status_div.inner_text(timeout=2000)
-            except Exception:
-                status_text = ""
-            if "登記現況：核准設立" in status_text and selected_idx is None:
-                selected_idx = i
-        if selected_idx is None:
-            selected_idx = 0
-        # 點擊該panel下的a連結
-        target_panel = result_panels.nth(selected_idx)
-        link = target_panel.locator("div.panel-heading > a")
-        await link.click()
-        await page.wait_for_load_state('networkidle', timeout=10000)
-        log_print(f"[INFO] 完成查詢：{query_name}", log_enable)
+        return {"href": hit["詳情網址"], "confidence": ""}
+
+    async def search(self, page, query_name):
+        """送出查詢，一次取回所有搜尋結果 panel 並挑出最佳候選。"""
+        await self.submit_query(page, query_name)
+        candidates = await collect_result_panels(page)
+        if not candidates:
+            log_print(f"[WARNING] No result for '{query_name}'", self.log_enable)
+            return None
+        best = pick_best_candidate(query_name, candidates)
+        log_print(f"[INFO] {query_name}: {len(candidates)} 筆候選，選擇「{best['name']}」"
+                  f"({best['status'] or '狀態不明'})，匹配信心 {best['confidence']}", self.log_enable)
+        return best
+
+    async def _wait_query_interval(self, page):
+        # 同一 worker 兩次查詢至少間隔 QUERY_INTERVAL 秒（配合查詢速度限制）；
+        # 一般情況下前一筆的詳情頁處理時間已超過間隔，不需額外等待
+        last = self._last_query.get(page)
+        if last is not None:
+            remaining = QUERY_INTERVAL - (time.monotonic() - last)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+        self._last_query[page] = time.monotonic()
+
+    def search_record(self, candidate, query_name):
+        record = {
+            "查詢公司名稱": query_name,
+            "公司名稱": candidate["name"],
+            "統一編號": candidate["ban"] or "查無資料",
+            "登記現況": candidate["status"] or "查無資料",
+            "匹配信心": candidate["confidence"],
+        }
+        return {k: v for k, v in record.items() if self.wants(k)}
+
+    async def fetch_detail(self, page, candidate):
+        # 直接導航至候選的詳情頁網址；連結不是一般網址時才退回點擊
+        if candidate["href"].startswith("http"):
+            await page.goto(candidate["href"], wait_until='domcontentloaded', timeout=phase_timeout(30000))
+        else:
+            link = page.locator("#vParagraph > div").nth(candidate["index"]).locator("div.panel-heading > a")
+            await link.click()
+        await page.wait_for_selector(DETAIL_TABLE_SELECTOR, state='attached', timeout=phase_timeout(10000))
+        return True
+
+    async def extract(self, page, candidate, query_name, detail=None):
+        log_print(f"[INFO] 完成查詢：{query_name}", self.log_enable)
         # 自動依 tr 標題關鍵字抓取所有欄位
-        fields = await extract_all_fields(page, FIELD_KEYWORDS)
+        # 指定 --fields 時只查找需要的欄位
+        keywords = {k: kw for k, kw in FIELD_KEYWORDS.items() if self.wants(FIELD_MAPPING[k])}
+        fields = await extract_all_fields(page, keywords)
         result = {"查詢公司名稱": query_name}
-        # 對應中文欄位名稱
-        mapping = {
-            "company_name": "公司名稱",
-            "unified_business_number": "統一編號",
-            "company_status": "登記現況",
-            "capital": "資本總額(元)",
-            "representative": "代表人姓名",
-            "company_address": "公司所在地",
-        }
-        for k, v in mapping.items():
+        for k, v in FIELD_MAPPING.items():
+            if k not in keywords:
+                continue
             val = fields.get(k, "查無資料")
             if not val or (isinstance(val, str) and val.strip() == ""):
                 val = "查無資料"
             result[v] = val
+        if self.wants("匹配信心"):
+            result["匹配信心"] = candidate["confidence"]
         return result
 
+async def scrape_company_info(query_name, page, log_enable=False):
+    try:
+        return await BizAdapter(log_enable).scrape(page, query_name)
     except Exception as e:
         print(f"[ERROR] {query_name}: {e}")
         return None
 
-import time  # for timing
+def parse_args():
+    parser = argparse.ArgumentParser(description="商工登記公示資料批次查詢")
+    parser.add_argument('-i', '--input-file', type=str, default=COMPANY_LIST_FILE,
+                        help='公司名稱清單檔案（txt / csv / tsv / xlsx / jsonl）')
+    parser.add_argument('--name-column', type=str, default=None, help='清單檔的公司名稱欄位名稱（預設自動偵測，其餘欄位一併輸出）')
+    parser.add_argument('--headed', action='store_true', help='顯示瀏覽器視窗（預設 headless）')
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='同時查詢的公司數（每個 worker 各自一個 context）')
+    parser.add_argument('--cache-ttl', type=float, default=0, help='結果快取有效時數，0 表示停用')
+    parser.add_argument('--recycle-after', type=int, default=CONTEXT_MAX_REQUESTS, help='每個 context 處理幾筆後回收，0 表示不回收')
+    parser.add_argument('--max-rss-mb', type=float, default=BROWSER_MAX_RSS_MB, help='瀏覽器記憶體超過此值 (MB) 時回收 context，0 表示不回收')
+    parser.add_argument('--harvest', type=str, default=None, metavar='KEYWORD', help='收集模式：翻頁記錄關鍵字的所有搜尋結果')
+    parser.add_argument('--max-pages', type=int, default=None, help='收集模式最多翻幾頁（預設翻到沒有新結果為止）')
+    parser.add_argument('--harvest-details', action='store_true', help='收集模式完成後，再以收集到的詳情網址抓取詳情頁')
+    parser.add_argument('--typed', action='store_true', help='另外輸出型別化欄位 (biz_company_info_typed_*.csv / .parquet)')
+    parser.add_argument('--db', type=str, default=os.path.join(OUTPUT_DIR, 'results.db'), help='SQLite 結果庫路徑（以統一編號 upsert）')
+    parser.add_argument('--no-db', action='store_true', help='不寫入 SQLite 結果庫')
+    add_change_arguments(parser)
+    add_queue_arguments(parser)
+    add_watch_arguments(parser)
+    add_progress_arguments(parser)
+    add_budget_arguments(parser)
+    add_profile_arguments(parser)
+    add_proxy_arguments(parser)
+    add_archive_arguments(parser, os.path.join(OUTPUT_DIR, 'archive'))
+    add_field_arguments(parser)
+    add_log_arguments(parser, LOGFILE_PATH if LOG_TO_FILE else None)
+    return parser.parse_args()
 
 async def main():
+    args = parse_args()
+    setup_log_from_args(args)
     # log_enable 預設為 True，CMD print 永遠開啟
     log_enable = True
 
@@ -161,43 +331,120 @@ async def main():
     log_print(f"[INFO] 啟動時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", log_enable)
 
     fix_cmd_encoding()
-    company_names = read_company_list(COMPANY_LIST_FILE, log_enable)
-    if not company_names:
-        print("[ERROR] No companies to process. Exiting.")
-        return
-    log_print(f"[INFO] Start scrape for {len(company_names)} companies.", log_enable)
-    results = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+    adapter = BizAdapter(log_enable)
+    if args.fields:
+        try:
+            fieldnames = adapter.project_fields(parse_fields(args.fields))
+        except ValueError as e:
+            log_print(f"[ERROR] --fields: {e}", log_enable)
+            return
+        log_print(f"[INFO] 只擷取欄位: {', '.join(fieldnames)}（不寫入結果庫、快取與變更偵測，避免以部分欄位覆蓋完整資料）",
+                  log_enable)
+        args.no_db = True
+        args.cache_ttl = 0
+    cache = ResultCache(os.path.join(OUTPUT_DIR, f"{OUTPUT_PREFIX}_cache.json"), args.cache_ttl)
+    store = None if args.no_db else ResultStore(args.db)
+    tracker = tracker_from_args(args, store)
+    archive = archive_from_args(args, log_enable)
+    profiler = profiler_from_args(args, os.path.join(OUTPUT_DIR, 'profile'), log_enable)
+    if profiler:
+        profiler.start()
+    try:
+        if args.reextract:
+            async with BrowserPool(headless=True, context_options=REPLAY_CONTEXT_OPTIONS, log_enable=log_enable) as pool:
+                await run_reextract_mode(adapter, pool, archive, args.concurrency, log_enable, store=store,
+                                         formats=('json', 'csv'), json_indent=2,
+                                         **adapter.writer_options(TYPED_FORMATS if args.typed else ()))
+            log_print(f"[INFO] 總運行時間: {time.time() - start_time:.2f} 秒", log_enable)
+            return
+        adapter.archive = archive
+        if args.harvest:
+            log_print(f"[INFO] 收集模式，關鍵字: {args.harvest}", log_enable)
+            async with build_browser_pool(not args.headed, args.recycle_after, args.max_rss_mb,
+                                          proxy_pool_from_args(args, log_enable)) as pool:
+                await run_harvest_mode(adapter, pool, args.harvest, args.max_pages,
+                                       args.harvest_details, args.concurrency, cache, log_enable,
+                                       store=store, formats=('json', 'csv'), json_indent=2)
+            log_print(f"[INFO] 總運行時間: {time.time() - start_time:.2f} 秒", log_enable)
+            return
+        await run_batch(args, adapter, cache, store, tracker, start_time, log_enable, profiler)
+    finally:
+        if profiler:
+            await profiler.stop()
+        if archive:
+            await archive.close()
+        if store:
+            store.close()
+
+async def run_batch(args, adapter, cache, store, tracker, start_time, log_enable, profiler=None):
+    deadline = deadline_from_args(args, log_enable)
+    input_list = None
+    work_queue = (watcher_from_args(args, OUTPUT_DIR, OUTPUT_PREFIX, deadline, log_enable)
+                  or queue_from_args(args, adapter.name, log_enable))
+    if args.watch:
+        company_names = work_queue.items()
+    elif work_queue:
+        company_names = work_queue.items(batch_size=args.concurrency)
+    else:
+        input_list = company_names = read_company_list(args.input_file, log_enable, args.name_column)
+        if input_list is None:
+            print("[ERROR] No companies to process. Exiting.")
+            return
+        if deadline:
+            # 接近截止時間時要依優先順序排序剩餘名稱，需要完整清單
+            company_names = list(input_list)
+    if args.incremental and not work_queue:
+        if tracker is None:
+            log_print("[WARN] 增量模式需要 SQLite 結果庫，已忽略 --incremental", log_enable)
+        else:
+            company_names = list(tracker.filter_due(adapter.name, company_names, log_enable))
+            if not company_names:
+                log_print("[INFO] 沒有到期需要重抓的公司", log_enable)
+                return
+    if isinstance(company_names, list):
+        log_print(f"[INFO] Start scrape for {len(company_names)} companies.", log_enable)
+    elif not work_queue:
+        log_print("[INFO] Start scrape, reading the company list as it goes.", log_enable)
+    fieldnames = [field for field in CSV_HEADERS if adapter.wants(field)]
+    fieldnames += [column for column in getattr(input_list, 'extra_columns', ()) if column not in fieldnames]
+    writer_class = StreamWriter if args.watch else ResultWriter
+    writer = writer_class(OUTPUT_DIR, OUTPUT_PREFIX, fieldnames, formats=('json', 'csv'),
+                          json_indent=2, log_enable=log_enable,
+                          **adapter.writer_options(TYPED_FORMATS if args.typed else ()))
+    async with build_browser_pool(not args.headed, args.recycle_after, args.max_rss_mb,
+                                  proxy_pool_from_args(args, log_enable)) as pool:
+        scheduler = Scheduler(adapter, concurrency=args.concurrency, pool=pool, cache=cache, writer=writer,
+                              store=store, tracker=tracker, log_enable=log_enable, work_queue=work_queue,
+                              progress=progress_from_args(args, log_enable), item_budget=args.item_budget,
+                              deadline=deadline,
+                              priority=input_priority if has_priority_column(input_list) else None,
+                              profiler=profiler, keep_results=not args.watch)
         try:
-            for idx, name in enumerate(company_names, 1):
-                log_print(f"[INFO] 處理第 {idx}/{len(company_names)} 筆：{name}", log_enable)
-                info = await scrape_company_info(name, page, log_enable)
-                if info:
-                    results.append(info)
+            await scheduler.run(company_names)
         except Exception as e:
-            print(f"[FATAL] 發生例外中斷：{e}")
-            # 儲存目前已抓到的資料
-            save_results(results, log_enable)
+            log_print(f"[FATAL] 發生例外中斷：{e}", log_enable)
+            # 目前已抓到的資料會於下方一併儲存
             try:
                 os.makedirs(OUTPUT_DIR, exist_ok=True)
                 ts = datetime.now().strftime("%Y%m%d_%H%M%S")
                 shot_path = os.path.join(OUTPUT_DIR, f"exception_{ts}.png")
-                await page.screenshot(path=shot_path)
-                print(f"[INFO] 已截圖於 {shot_path}")
-                if LOG_TO_FILE:
-                    with open(LOGFILE_PATH, 'a', encoding='utf-8') as f:
-                        f.write(f"[FATAL] 發生例外中斷：{e}\n[INFO] 已截圖於 {shot_path}\n")
+                page = pool.current_page(0)
+                if page:
+                    await page.screenshot(path=shot_path)
+                    log_print(f"[INFO] 已截圖於 {shot_path}", log_enable)
             except Exception as se:
                 print(f"[ERROR] 截圖失敗: {se}")
         finally:
+            if work_queue:
+                await work_queue.close()
             end_time = time.time()
             elapsed = end_time - start_time
             log_print(f"[INFO] 結束時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", log_enable)
             log_print(f"[INFO] 總運行時間: {elapsed:.2f} 秒", log_enable)
-            await browser.close()
-    save_results(results, log_enable)
+    writer.save()
+    scheduler.save_unprocessed(OUTPUT_DIR, OUTPUT_PREFIX)
+    if tracker:
+        tracker.write_report(OUTPUT_DIR, OUTPUT_PREFIX, log_enable)
 
 
 if __name__ == "__main__":
@@ -1,47 +1,50 @@
 import asyncio
 from playwright.async_api import async_playwright
-import json
-import csv
 import os
 from datetime import datetime
 import sys
 import argparse
 
+# 共用核心套件 scraper_core 位於 repo 根目錄
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scraper_core import ResultWriter, log_print, set_log_file
+from scraper_core import read_company_list as core_read_company_list
+from scraper_core.selector_stats import SelectorRegistry
+
 BASE_URL = "https://findbiz.nat.gov.tw/fts/query/QueryBar/queryInit.do"
 OUTPUT_DIR = "./output_biz"
 COMPANY_LIST_FILE = "company_list.txt"
 CSV_HEADERS = [
     "查詢公司名稱", "公司名稱", "統一編號", "公司狀況", "資本總額(元)", "代表人姓名", "公司所在地"
 ]
+DETAIL_ROWS = "#tabCmpyContent > div > table > tbody > tr"
+
+
+def label_selector(label):
+    """以第一欄標題文字定位同列的值，不受欄位列序變動影響。"""
+    return f'{DETAIL_ROWS}:has(> td:first-child:has-text("{label}")) > td:nth-child(2)'
+
+
+# 詳情欄位為候選 selector 清單，嘗試順序由 SelectorRegistry 依歷史命中率決定；
+# 只以標題定位：固定列序的 selector 在版面位移時會取到別列的值（而且照樣算命中），不列為候選
 SELECTORS = {
     "search_input": "#qryCond",
     "search_button": "#qryBtn",
     "first_result_link": "#vParagraph > div > div.panel-heading > a",
-    "company_name": "#tabCmpyContent > div > table > tbody > tr:nth-child(4) > td:nth-child(2)",
-    "unified_business_number": "#tabCmpyContent > div > table > tbody > tr:nth-child(1) > td:nth-child(2)",
-    "company_status": "#tabCmpyContent > div > table > tbody > tr:nth-child(2) > td:nth-child(2)",
-    "capital": "#tabCmpyContent > div > table > tbody > tr:nth-child(6) > td:nth-child(2)",
-    "representative": "#tabCmpyContent > div > table > tbody > tr:nth-child(10) > td:nth-child(2)",
-    "company_address": "#tabCmpyContent > div > table > tbody > tr:nth-child(11) > td:nth-child(2)",
+    "company_name": [label_selector("公司名稱")],
+    "unified_business_number": [label_selector("統一編號")],
+    "company_status": [label_selector("公司狀況")],
+    "capital": [label_selector("資本總額")],
+    "representative": [label_selector("代表人姓名")],
+    "company_address": [label_selector("公司所在地")],
 }
+SELECTOR_STATS_FILE = os.path.join(OUTPUT_DIR, "selector_stats_old.json")
 
 # === LOG 設定區 ===
 LOG_TO_FILE = True    # True=寫入本地log, False=只顯示於CMD（可於此一鍵切換）
 LOG_FILENAME = "bizbat_log.txt"  # log檔名，預設與py同目錄
-import os
 LOGFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), LOG_FILENAME)
-
-# log_print: 預設CMD顯示，log_to_file控制是否寫入本地檔
-
-def log_print(msg, log_enable=True):
-    if log_enable:
-        print(msg)
-    if LOG_TO_FILE:
-        try:
-            with open(LOGFILE_PATH, 'a', encoding='utf-8') as f:
-                f.write(msg + '\n')
-        except Exception as e:
-            print(f"[ERROR] 寫入 log 檔失敗: {e}")
+set_log_file(LOGFILE_PATH if LOG_TO_FILE else None)
 
 def fix_cmd_encoding():
     try:
@@ -50,28 +53,19 @@ def fix_cmd_encoding():
         pass
 
 def read_company_list(input_file, log_enable=False, logfile_path=None):
-    if not os.path.exists(input_file):
-        print(f"[ERROR] Input file not found: {input_file}")
-        return []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        company_list = [line.strip() for line in f if line.strip()]
+    company_list = core_read_company_list(input_file, log_enable=log_enable)
     log_print(f"[INFO] 讀取公司列表完成，共 {len(company_list)} 筆", log_enable)
     return company_list
 
 def save_results(data, log_enable=False, logfile_path=None):
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    base = os.path.join(OUTPUT_DIR, f"biz_company_info_{timestamp}")
-    with open(base + ".json", "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    if data:
-        with open(base + ".csv", "w", encoding="utf-8-sig", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
-            writer.writeheader()
-            writer.writerows(data)
-    log_print(f"[SUCCESS] Data saved to {base}.json & {base}.csv", log_enable)
-
-async def scrape_company_info(query_name, page, log_enable=False, logfile_path=None):
+    writer = ResultWriter(OUTPUT_DIR, "biz_company_info", CSV_HEADERS, formats=('json', 'csv'),
+                          json_indent=2, log_enable=log_enable)
+    for record in data:
+        writer.add(record)
+    return writer.save()
+
+async def scrape_company_info(query_name, page, log_enable=False, logfile_path=None, selectors=None):
+    selectors = selectors or SelectorRegistry(log_enable=log_enable)
     await page.goto(BASE_URL)
     try:
         await page.fill(SELECTORS["search_input"], query_name)
@@ -103,11 +97,11 @@ async def scrape_company_info(query_name, page, log_enable=False, logfile_path=N
         await page.wait_for_load_state('networkidle', timeout=10000)
         log_print(f"[INFO] 完成查詢：{query_name}", log_enable)
         async def safe_inner_text(selector_key, field_name):
-            try:
-                return await page.inner_text(SELECTORS[selector_key], timeout=5000)
-            except Exception as e:
-                log_print(f"[WARNING] {query_name}: 欄位『{field_name}』查無資料 ({str(e)})", log_enable)
+            text = await selectors.first_text(page, "biz", field_name, SELECTORS[selector_key])
+            if text is None:
+                log_print(f"[WARNING] {query_name}: 欄位『{field_name}』查無資料", log_enable)
                 return "查無資料"
+            return text
 
         return {
             "查詢公司名稱": query_name,
@@ -138,13 +132,14 @@ async def main():
         return
     log_print(f"[INFO] Start scrape for {len(company_names)} companies.", log_enable)
     results = []
+    selectors = SelectorRegistry(SELECTOR_STATS_FILE, log_enable=log_enable)
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
         try:
             for idx, name in enumerate(company_names, 1):
                 log_print(f"[INFO] 處理第 {idx}/{len(company_names)} 筆：{name}", log_enable)
-                info = await scrape_company_info(name, page, log_enable)
+                info = await scrape_company_info(name, page, log_enable, selectors=selectors)
                 if info:
                     results.append(info)
         except Exception as e:
@@ -168,6 +163,8 @@ async def main():
             log_print(f"[INFO] 結束時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", log_enable)
             log_print(f"[INFO] 總運行時間: {elapsed:.2f} 秒", log_enable)
             await browser.close()
+            selectors.flush()
+            selectors.log_report()
     save_results(results, log_enable)
 
 